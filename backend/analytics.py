@@ -0,0 +1,97 @@
+import threading
+
+import numpy as np
+
+from cells import CellGrid
+
+# Piecewise-linear waste risk (%) by days of stock coverage: 5% up to 1.5 days,
+# rising to ~23% at 3 days, ~51% at 7 days and capped at 76%.
+RISK_COVERAGE_DAYS = np.array([1.5, 3.0, 7.0, 13.25])
+RISK_PERCENT = np.array([5.0, 23.0, 51.0, 76.0])
+
+
+def waste_risk(coverage_days):
+    return np.interp(coverage_days, RISK_COVERAGE_DAYS, RISK_PERCENT)
+
+
+class StockAnalytics(CellGrid):
+    """Array-backed stock and sales state for coverage / overstock / waste analysis.
+
+    Stock is an outlets x products matrix; the expected daily demand per
+    cell is passed to ``analyze()`` (the demand forecast keeps the sales
+    history). Outlets and products are indexed by ``CellGrid``, so catalog
+    reloads never reshuffle rows. Every analysis is a handful of whole-array
+    operations regardless of the number of outlets.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.stock = np.zeros((0, 0), dtype=np.int64)
+        self._lock = threading.Lock()
+
+    def _grow(self, rows, cols):
+        old_rows, old_cols = self.stock.shape
+        self.stock = np.pad(self.stock, ((0, rows - old_rows), (0, cols - old_cols)))
+
+    def _index(self, outlet_id, prod_id):
+        return self._outlet(outlet_id), self._product(prod_id)
+
+    def set_stock(self, outlet_id, changes):
+        """Apply ``{product_id: qty}`` for one outlet (ledger change hook)."""
+        with self._lock:
+            for prod_id, qty in changes.items():
+                o, p = self._index(outlet_id, prod_id)
+                self.stock[o, p] = qty
+
+    def analyze(self, outlet_ids, product_ids, velocity, hub_total=0, outlet_capacity=180, hub_buffer=2000,
+                velocity_floor=80):
+        """Coverage, overstock and waste risk per outlet, per product and overall.
+
+        ``velocity`` is the expected daily demand per cell (e.g. a forecast),
+        an outlets x products array in the order of the ids.
+        """
+        with self._lock:
+            o_idx, p_idx = self._select(outlet_ids, product_ids)
+            stock = self.stock[np.ix_(o_idx, p_idx)].astype(np.float64)
+
+        n_outlets = max(len(outlet_ids), 1)
+        n_products = max(len(product_ids), 1)
+        velocity = np.asarray(velocity, dtype=np.float64)
+        network_velocity = float(velocity.sum())
+
+        outlet_stock = stock.sum(axis=1)
+        outlet_velocity = np.maximum(velocity.sum(axis=1), velocity_floor / n_outlets)
+        outlet_coverage = outlet_stock / outlet_velocity
+        outlet_overstock = np.maximum(outlet_stock - outlet_capacity, 0)
+        outlet_risk = np.maximum(waste_risk(outlet_coverage), np.divide(
+            outlet_overstock * 100.0, outlet_stock, out=np.zeros_like(outlet_stock), where=outlet_stock > 0
+        ))
+
+        product_stock = stock.sum(axis=0)
+        product_velocity = np.maximum(velocity.sum(axis=0), velocity_floor / n_products)
+        product_coverage = product_stock / product_velocity
+        product_risk = waste_risk(product_coverage)
+
+        # Network-wide figures (the dashboard "potensi waste").
+        total_outlet_stock = float(outlet_stock.sum())
+        total_stock = total_outlet_stock + hub_total
+        overstock_pcs = int(outlet_overstock.sum()) + int(max(0, hub_total - hub_buffer) * 0.5)
+        if total_stock <= 0:
+            percent = 0.0
+        else:
+            velocity_daily = max(network_velocity, velocity_floor)
+            baseline = float(waste_risk(total_outlet_stock / velocity_daily))
+            percent = round(min(100.0, max(baseline, overstock_pcs / total_stock * 100.0, 5.0)), 1)
+
+        return {
+            "outlets": {
+                "stock": outlet_stock, "velocity_daily": outlet_velocity, "coverage_days": outlet_coverage,
+                "overstock": outlet_overstock, "waste_risk": outlet_risk
+            },
+            "products": {
+                "stock": product_stock, "velocity_daily": product_velocity, "coverage_days": product_coverage,
+                "waste_risk": product_risk
+            },
+            "cells": {"stock": stock, "velocity_daily": velocity},
+            "waste": {"percent": percent, "pcs": overstock_pcs if total_stock > 0 else 0}
+        }
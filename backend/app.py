@@ -1,9 +1,36 @@
-from datetime import datetime, timedelta
-from flask import Flask, jsonify, request
+import atexit
+import csv
+import io
+import json
+import math
+import os
+import threading
+import time
+import zlib
+from collections import deque
+from datetime import date, datetime, timedelta
+import numpy as np
+from flask import Flask, Response, g, jsonify, request
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 
+from analytics import StockAnalytics
+from cache import Memo, StateVersion, VersionedCache
+from catalog import Catalog
+from forecast import DemandForecast
+from live import DashboardBroadcaster
+from metrics import MetricsRegistry, SamplingProfiler
+from refill import RefillRule, RefillScheduler
+from replenish import plan_replenishment
+from reports import ReportRollup
+from responses import Payload, compress, encode_json, payload_body, should_compress
+from rolling_sales import RollingSales
+from stock import IdSequence, InsufficientStock, StockLedger
+from storage import create_storage
+
 app = Flask(__name__)
-CORS(app)
+# Cross-origin scripts only see safelisted response headers unless they are exposed here.
+CORS(app, expose_headers=["X-Next-Cursor", "X-Total-Count", "ETag", "Retry-After", "X-Profile-Id"])
 
 # --- Constants & Initial Data ---
 
@@ -25,6 +52,9 @@ PRODUCTS = [
 
 HUB_ID = "hub_pusat"
 
+# Outlet/product registry with O(1) lookups, seeded from the lists above
+catalog = Catalog(OUTLETS, PRODUCTS)
+
 # Hub inventory (pusat). Sumber utama distribusi & refill otomatis.
 hub_inventory = {
     1: 400,  # Dada
@@ -51,37 +81,296 @@ last_updates = {
     "outlet_4": datetime.now() - timedelta(minutes=2)
 }
 
-last_hub_refill = datetime.now()
+# Hub auto-refill defaults: +50 pcs per product every full minute
+HUB_REFILL_INTERVAL_SECONDS = 60
+HUB_REFILL_RATE = 50
+
+# Waste thresholds: outlet stock above OUTLET_CAPACITY pcs is berlebih, hub stock above
+# HUB_BUFFER pcs counts half as potential waste, and daily velocity never drops below VELOCITY_FLOOR
+OUTLET_CAPACITY = 180
+HUB_BUFFER = 2000
+VELOCITY_FLOOR = 80
+
+# Replenishment planner defaults: top outlets up to 2 days of sales, skip drops under 5 pcs
+TARGET_COVERAGE_DAYS = 2.0
+MIN_DROP_QTY = 5
+
+# Closed-day report history, seeded as Final snapshots
+REPORT_HISTORY = [
+    {"day": date(2023, 12, 2), "outlet_id": "outlet_1", "transaksi": 150, "item_terjual": 340, "omzet": 3450000},
+    {"day": date(2023, 12, 2), "outlet_id": "outlet_2", "transaksi": 98, "item_terjual": 210, "omzet": 2150000}
+]
+
+# Persistent storage for stock, transactions, distributions and requests.
+# DKRIUK_STORAGE=memory keeps everything in process (tests), DKRIUK_STORAGE=log uses the event log.
+STORAGE_KIND = os.environ.get("DKRIUK_STORAGE", "sqlite")
+
+# Worker processes serving the same database (set by serve.py --workers). With more than one,
+# SQLite is the source of truth and each process syncs its in-memory state from it.
+WORKERS = int(os.environ.get("DKRIUK_WORKERS") or 1)
+SHARED_STATE = WORKERS > 1
+
+storage = create_storage(
+    STORAGE_KIND,
+    os.environ.get("DKRIUK_DB", os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "dkriuk.log" if STORAGE_KIND == "log" else "dkriuk.db"
+    )),
+    shared=SHARED_STATE
+)
+
+# What this process has seen of the shared database: PRAGMA data_version and the last sale fed in
+shared_sync = {"data_version": None, "transaction_id": 0}
+
+# Monotonic ids, restored from storage on startup
+transaction_ids = IdSequence()
+request_ids = IdSequence()
+
+# Atomic stock mutations with one lock per outlet (and the hub)
+stock_ledger = StockLedger(inventory, hub_inventory, HUB_ID)
+
+# Lazy hub refill; reads compute it from elapsed time, writes settle it first
+refill_scheduler = RefillScheduler(
+    hub_inventory, stock_ledger.lock(HUB_ID), datetime.now(),
+    interval_seconds=HUB_REFILL_INTERVAL_SECONDS, default_rate=HUB_REFILL_RATE
+)
+
+# Bumped by every mutation; keys the dashboard memo and the ETags
+state_version = StateVersion()
+
+# Idempotency keys of POS writes that are being applied right now
+idempotency_lock = threading.Lock()
+inflight_keys = set()
+
+# Upper bound on records accepted by one batch ingestion request
+MAX_BATCH_SIZE = 10000
+
+# Rolling per-minute sales totals, updated on every POS write
+sales_stats = RollingSales()
+
+# Revenue of all stored sales in whole rupiah, kept by feed_sales so the dashboard never sums the sales table
+revenue_total = {"rupiah": 0}
+revenue_lock = threading.Lock()
+
+# Per-(day, outlet) report rows, updated on every POS write
+# Writers in shared mode hold the storage lock for the whole request, so freezing must take it first
+report_rollup = ReportRollup(lock=storage.locked() if SHARED_STATE else None)
+
+# outlets x products stock matrix for the coverage / waste analysis
+analytics = StockAnalytics()
+
+# Bumped on every stock change of a location; keys the per-outlet cached payloads
+stock_versions = {}
+
+# Pre-encoded JSON for the catalog and the per-outlet product lists
+payload_cache = VersionedCache()
+
+# Hour-of-day/day-of-week demand model per outlet and product, stepped once per closed hour
+forecaster = DemandForecast()
+FORECAST_HISTORY_DAYS = 28
+
+# Prometheus metrics served by /api/metrics
+metrics = MetricsRegistry()
+http_latency = metrics.histogram(
+    "dkriuk_http_request_duration_seconds", "Time to build the response per route", ("method", "route")
+)
+http_requests = metrics.counter("dkriuk_http_requests_total", "Requests per route and status", ("method", "route", "status"))
+span_latency = metrics.histogram("dkriuk_span_duration_seconds", "Time spent in named hot-path helpers", ("span",))
+transactions_counter = metrics.counter("dkriuk_transactions_total", "Committed POS transactions")
+items_counter = metrics.counter("dkriuk_items_sold_total", "Units sold through the POS")
+distributions_counter = metrics.counter("dkriuk_distributions_total", "Hub to outlet distributions", ("source",))
+stock_requests_counter = metrics.counter("dkriuk_stock_requests_total", "Stock requests sent by outlets")
 
-# Transactions Log
-transactions = []
+# DKRIUK_PROFILING=1 lets a request ask for a sampling profile (?profile=1 or X-Profile: 1)
+PROFILING_ENABLED = os.environ.get("DKRIUK_PROFILING") == "1"
+profiles = deque(maxlen=20)
+profile_ids = IdSequence()
 
-# Distribution Log
-distributions = []
 
-# Requests Log
-requests_log = []
+# --- Storage Bootstrap ---
+
+def save_last_updates():
+    storage.set_meta("last_updates", {oid: dt.isoformat() for oid, dt in last_updates.items()})
+
+
+def save_report_snapshots(rows, frozen_until):
+    for row in rows:
+        storage.save_report_snapshot(row)
+    storage.set_meta("report_frozen_until", frozen_until.isoformat())
+
+
+def save_stock_change(location, changes):
+    # Runs under the location lock, so the increment is not racy.
+    stock_versions[location] = stock_versions.get(location, 0) + 1
+    storage.save_stock(location, changes)
+    if location != HUB_ID:
+        analytics.set_stock(location, changes)
+
+
+@span_latency.time("hub_refill_settle")
+def save_refill(entries, anchor):
+    if entries:
+        storage.save_stock(HUB_ID, {entry['product_id']: entry['stock_after'] for entry in entries})
+        storage.add_refills(entries)
+    storage.set_meta("last_hub_refill", anchor.isoformat())
+    if entries:
+        state_changed()
+
+
+def save_refill_config():
+    storage.set_meta("hub_refill", refill_scheduler.config())
+
+
+def load_refill_config(config):
+    refill_scheduler.rules = {
+        int(pid): RefillRule(rule['rate'], rule.get('cap')) for pid, rule in config.get('rules', {}).items()
+    }
+    refill_scheduler.interval_seconds = config.get('interval_seconds', HUB_REFILL_INTERVAL_SECONDS)
+    refill_scheduler.default_rate = config.get('default_rate', HUB_REFILL_RATE)
+
+
+def bootstrap_state():
+    """Seed an empty store with the initial data, otherwise load the saved state."""
+    # One transaction, so worker processes starting together seed the database only once.
+    with storage.atomic():
+        if storage.is_empty():
+            storage.save_stock(HUB_ID, hub_inventory)
+            for oid, stock in inventory.items():
+                storage.save_stock(oid, stock)
+            save_last_updates()
+            storage.set_meta("last_hub_refill", refill_scheduler.anchor.isoformat())
+            for row in REPORT_HISTORY:
+                storage.save_report_snapshot(row)
+                report_rollup.load_final(row)
+            return
+
+    saved_catalog = storage.get_meta("catalog")
+    if saved_catalog:
+        catalog.load(saved_catalog.get("outlets"), saved_catalog.get("products"))
+
+    saved_stock = storage.load_stock()
+    hub_inventory.clear()
+    hub_inventory.update(saved_stock.pop(HUB_ID, {}))
+    inventory.clear()
+    inventory.update(saved_stock)
+    for oid, value in storage.get_meta("last_updates", {}).items():
+        last_updates[oid] = datetime.fromisoformat(value)
+    refill_scheduler.anchor = datetime.fromisoformat(
+        storage.get_meta("last_hub_refill", refill_scheduler.anchor.isoformat())
+    )
+    saved_refill = storage.get_meta("hub_refill")
+    if saved_refill:
+        load_refill_config(saved_refill)
+    transaction_ids.reset(storage.max_transaction_id())
+    request_ids.reset(storage.max_request_id())
+    shared_sync["transaction_id"] = storage.max_transaction_id()
+    revenue_total["rupiah"] = round(storage.total_revenue())
+
+    now = datetime.now()
+    retention_start = now - timedelta(hours=24 * 8)
+    for t in storage.query_transactions(start=retention_start):
+        sales_stats.record(t['timestamp'], sum(item['qty'] for item in t['items']), t['total'])
+    hourly_start = datetime.combine(now.date() - timedelta(days=FORECAST_HISTORY_DAYS), datetime.min.time())
+    hourly_sales = storage.product_sales(start=hourly_start, resolution="hour")
+    forecaster.load_sales(hourly_sales, now)
+
+    frozen_until = date.fromisoformat(storage.get_meta("report_frozen_until", date.min.isoformat()))
+    report_rollup.frozen_until = frozen_until
+    for row in storage.load_report_snapshots():
+        report_rollup.load_final(row)
+    open_start = datetime.combine(frozen_until, datetime.min.time()) if frozen_until > date.min else None
+    for row in storage.report_rows(start=open_start):
+        report_rollup.load_open(row)
+
+
+report_rollup.on_freeze = save_report_snapshots
+bootstrap_state()
+stock_ledger.on_change = save_stock_change
+for _oid, _stock in inventory.items():
+    analytics.set_stock(_oid, _stock)
+refill_scheduler.on_settle = save_refill
+
+
+def sync_shared_state():
+    """Pull in what other worker processes committed since the last call (DKRIUK_WORKERS > 1).
+
+    Stock, refill state, catalog, last updates and id counters are reloaded
+    from SQLite and new sales are fed to the in-memory aggregates. Runs at
+    the start of every request; ``PRAGMA data_version`` makes it a single
+    cheap query when nothing changed.
+    """
+    with storage.locked():
+        version = storage.data_version()
+        if version == shared_sync["data_version"]:
+            return
+        shared_sync["data_version"] = version
+
+        saved_catalog = storage.get_meta("catalog")
+        if saved_catalog and saved_catalog != catalog.to_dict():
+            catalog.load(saved_catalog.get("outlets"), saved_catalog.get("products"))
+        saved_refill = storage.get_meta("hub_refill")
+        if saved_refill:
+            load_refill_config(saved_refill)
+        saved_stock = storage.load_stock()
+        refill_scheduler.reload(saved_stock.pop(HUB_ID, {}), datetime.fromisoformat(
+            storage.get_meta("last_hub_refill", refill_scheduler.anchor.isoformat())
+        ))
+        for oid, stock in saved_stock.items():
+            current = inventory.setdefault(oid, {})
+            if current != stock:
+                current.update(stock)
+                stock_versions[oid] = stock_versions.get(oid, 0) + 1
+                analytics.set_stock(oid, stock)
+        for oid, value in storage.get_meta("last_updates", {}).items():
+            last_updates[oid] = datetime.fromisoformat(value)
+
+        feed_sales(list(storage.query_transactions(cursor=shared_sync["transaction_id"])))
+        transaction_ids.reset(storage.max_transaction_id())
+        request_ids.reset(storage.max_request_id())
+    state_changed()
+
+
+shared_sync_stop = threading.Event()
+
+
+def start_shared_sync(interval_seconds):
+    """Poll the shared database in the background, for live streams on workers that get no requests."""
+    def run():
+        while not shared_sync_stop.wait(interval_seconds):
+            sync_shared_state()
+
+    threading.Thread(target=run, name="shared-sync", daemon=True).start()
+
+
+def shutdown():
+    """Stop background work and flush pending writes; safe to call more than once."""
+    live_dashboard.close()
+    shared_sync_stop.set()
+    refill_scheduler.stop_ticker()
+    forecaster.stop_ticker()
+    storage.close()
+
+
+atexit.register(shutdown)
 
 
 # --- Helper Functions ---
 
 def get_outlet(outlet_id):
-    for outlet in OUTLETS:
-        if outlet["id"] == outlet_id:
-            return outlet
-    return None
+    return catalog.outlet(outlet_id)
 
 
 def get_outlet_name(outlet_id):
-    outlet = get_outlet(outlet_id)
-    return outlet["name"] if outlet else "Unknown Outlet"
+    outlet = catalog.outlet(outlet_id)
+    return outlet.name if outlet else "Unknown Outlet"
 
 
 def get_product(prod_id):
-    for product in PRODUCTS:
-        if product["id"] == prod_id:
-            return product
-    return None
+    return catalog.product(prod_id)
+
+
+def get_product_name(prod_id):
+    product = catalog.product(prod_id)
+    return product.name if product else f"produk {prod_id}"
 
 
 def parse_positive_int(value, default=0):
@@ -92,21 +381,76 @@ def parse_positive_int(value, default=0):
         return default
 
 
-def apply_hub_refill():
-    """Auto-refill hub stock: +50 pcs per product every full minute."""
-    global last_hub_refill
-    now = datetime.now()
-    minutes = int((now - last_hub_refill).total_seconds() // 60)
-    if minutes <= 0:
-        return
-    increment = 50 * minutes
-    for pid in hub_inventory:
-        hub_inventory[pid] = hub_inventory.get(pid, 0) + increment
-    last_hub_refill = last_hub_refill + timedelta(minutes=minutes)
+def parse_iso_datetime(value):
+    """Parse an ISO date string into a naive datetime (falls back to now)."""
+    try:
+        dt = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except (TypeError, ValueError):
+        return datetime.now()
+    # Normalize tz-aware to naive for safe comparison
+    if dt.tzinfo is not None:
+        dt = dt.replace(tzinfo=None)
+    return dt
+
+
+def is_iso_datetime(value):
+    """True for strings ``parse_iso_datetime`` reads without falling back to now."""
+    if not isinstance(value, str):
+        return False
+    try:
+        datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return False
+    return True
 
 
+LISTING_LIMIT = 100
+LISTING_MAX_LIMIT = 1000
+LISTING_FORMATS = ("json", "ndjson", "csv")
+
+
+def parse_listing_args(args):
+    """Filters and paging shared by the history listings; returns ``(options, error)``.
+
+    ``start``/``end`` are inclusive dates. JSON pages hold ``limit`` rows
+    (default 100, max 1000); the ndjson/csv exports are unlimited unless
+    ``limit`` is given.
+    """
+    try:
+        start = date.fromisoformat(args['start']) if args.get('start') else None
+        end = date.fromisoformat(args['end']) if args.get('end') else None
+    except ValueError:
+        return None, "Format tanggal harus YYYY-MM-DD"
+    cursor = args.get('cursor')
+    if cursor:
+        try:
+            cursor = int(cursor)
+        except ValueError:
+            return None, "cursor harus berupa angka"
+    order = args.get('order', 'asc')
+    if order not in ('asc', 'desc'):
+        return None, "order harus asc atau desc"
+    fmt = args.get('format', 'json')
+    if fmt not in LISTING_FORMATS:
+        return None, f"format harus salah satu dari {', '.join(LISTING_FORMATS)}"
+    if fmt == 'json':
+        limit = min(parse_positive_int(args.get('limit'), LISTING_LIMIT), LISTING_MAX_LIMIT)
+    else:
+        limit = parse_positive_int(args.get('limit'), default=None)
+    return {
+        "outlet_id": args.get('outlet_id') or None,
+        "start": datetime.combine(start, datetime.min.time()) if start else None,
+        "end": datetime.combine(end + timedelta(days=1), datetime.min.time()) if end else None,
+        "cursor": cursor or None,
+        "descending": order == 'desc',
+        "limit": limit,
+        "format": fmt
+    }, None
+
+
+@span_latency.time("hub_refill_current")
 def hub_total_stock():
-    return sum(hub_inventory.values())
+    return refill_scheduler.total()
 
 
 def outlets_total_stock():
@@ -116,72 +460,42 @@ def outlets_total_stock():
     return total
 
 
-def calculate_overstock_pcs():
-    """Estimate overstock that is likely to become waste soon."""
-    overstock = 0
-    # Outlet threshold: >180 pcs total (roughly 45/part) is considered berlebih
-    for stock in inventory.values():
-        outlet_total = sum(stock.values())
-        if outlet_total > 180:
-            overstock += outlet_total - 180
+@span_latency.time("stock_analysis")
+def run_stock_analysis():
+    outlet_ids = [o.id for o in catalog.outlets]
+    product_ids = [p.id for p in catalog.products]
+    result = analytics.analyze(
+        outlet_ids,
+        product_ids,
+        hub_total=hub_total_stock(),
+        outlet_capacity=OUTLET_CAPACITY,
+        hub_buffer=HUB_BUFFER,
+        velocity_floor=VELOCITY_FLOOR,
+        velocity=forecaster.demand(outlet_ids, product_ids, hours=24)
+    )
+    result["stockout_hours"] = forecaster.stockout_hours(outlet_ids, product_ids, result["cells"]["stock"])
+    result["computed_at"] = datetime.now()
+    return result
 
-    # Hub buffer: everything above 2000 pcs counts as potential waste (discounted 50%)
-    hub_buffer = max(0, hub_total_stock() - 2000)
-    overstock += int(hub_buffer * 0.5)
 
-    return max(0, overstock)
+analysis_memo = Memo(run_stock_analysis)
 
 
-def recent_sales_qty(hours=24):
-    if not transactions:
-        return 0
-    cutoff = datetime.now() - timedelta(hours=hours)
-    total_qty = 0
-    for t in transactions:
-        try:
-            dt = datetime.fromisoformat(str(t.get('date', '')).replace('Z', '+00:00'))
-        except (TypeError, ValueError):
-            dt = datetime.now()
-        # Normalize tz-aware to naive for safe comparison
-        if dt.tzinfo is not None:
-            dt = dt.replace(tzinfo=None)
-        if dt >= cutoff:
-            for item in t.get('items', []):
-                total_qty += parse_positive_int(item.get('qty'))
-    return total_qty
+def stock_analysis():
+    """Per-outlet/per-product coverage and waste arrays, recomputed on change or each new hour."""
+    return analysis_memo.get((cache_tag(), int(datetime.now().timestamp() // 3600)))
 
 
-def calculate_waste_percentage():
-    """Estimate waste risk based on overstock and recent sales velocity."""
-    outlet_stock = outlets_total_stock()
-    total_stock_all = hub_total_stock() + outlet_stock
-
-    # If we have no stock at all, there is no waste risk
-    if total_stock_all <= 0:
-        return {"percent": 0.0, "pcs": 0}
-
-    overstock_pcs = calculate_overstock_pcs()
-
-    qty_24h = recent_sales_qty(hours=24)
-    qty_7d = recent_sales_qty(hours=24 * 7)
-    # Use the strongest signal available, but keep a sensible floor so we don't max out risk when there's no history
-    velocity_daily = max(qty_24h, qty_7d / 7 if qty_7d > 0 else 0, 80)
-
-    coverage_days = outlet_stock / max(velocity_daily, 1)
-    if coverage_days <= 1.5:
-        baseline_risk = 5.0
-    elif coverage_days <= 3:
-        baseline_risk = 5.0 + (coverage_days - 1.5) * 12.0  # up to ~23%
-    elif coverage_days <= 7:
-        baseline_risk = 23.0 + (coverage_days - 3) * 7.0    # up to ~51%
-    else:
-        baseline_risk = 51.0 + min(25.0, (coverage_days - 7) * 4.0)  # cap ~76%
+def stockout_time(analysis, hours):
+    """Absolute ISO time (minutes) for ``hours`` after the analysis ran, None beyond the forecast horizon."""
+    if not np.isfinite(hours):
+        return None
+    return (analysis["computed_at"] + timedelta(hours=float(hours))).isoformat(timespec="minutes")
 
-    overstock_pct = (overstock_pcs / total_stock_all) * 100.0 if total_stock_all else 0.0
 
-    waste_pct = round(min(100.0, max(baseline_risk, overstock_pct, 5.0)), 1)
-
-    return {"percent": waste_pct, "pcs": int(overstock_pcs)}
+def calculate_waste_percentage():
+    """Estimate waste risk based on overstock and recent sales velocity."""
+    return dict(stock_analysis()["waste"])
 
 
 def get_time_ago(dt):
@@ -198,16 +512,18 @@ def get_time_ago(dt):
     return f"{hours} hours ago"
 
 
-def calculate_dashboard_stats():
-    apply_hub_refill()
-    total_pendapatan = sum(t['total'] for t in transactions)
+@span_latency.time("dashboard_base")
+def dashboard_base():
+    """Dashboard figures that only change with state (and the sliding sales window)."""
+    total_pendapatan = revenue_total["rupiah"]
     hub_stock = hub_total_stock()
     total_stock = 0
     outlet_status_counts = {"CRITICAL": 0, "AMAN": 0, "BERLEBIH": 0}
     inventory_list = []
+    analysis = stock_analysis()
 
-    for outlet in OUTLETS:
-        oid = outlet['id']
+    for i, outlet in enumerate(catalog.outlets):
+        oid = outlet.id
         stock_data = inventory.get(oid, {})
 
         outlet_total_stock = sum(stock_data.values())
@@ -225,20 +541,20 @@ def calculate_dashboard_stats():
 
         inventory_list.append({
             "id": oid,
-            "outlet": outlet['name'],
+            "outlet": outlet.name,
             "paha_atas": stock_data.get(2, 0),
             "paha_bawah": stock_data.get(4, 0),
             "dada": stock_data.get(1, 0),
             "sayap": stock_data.get(3, 0),
             "status": status,
-            "last_update": get_time_ago(last_updates.get(oid, datetime.now()))
+            "perkiraan_habis": stockout_time(analysis, analysis["stockout_hours"][i].min(initial=np.inf))
         })
 
     waste_metrics = calculate_waste_percentage()
 
     return {
         "stats": {
-            "total_outlet": len(OUTLETS),
+            "total_outlet": len(catalog.outlets),
             "total_pendapatan": total_pendapatan + 15700000,
             "stok_gudang": hub_stock,
             "outlet_kritis": outlet_status_counts["CRITICAL"],
@@ -246,12 +562,210 @@ def calculate_dashboard_stats():
             "potensi_waste_pcs": waste_metrics.get("pcs", 0)
         },
         "inventory": inventory_list,
-        "requests_count": len(requests_log)
+        "requests_count": storage.count_requests()
+    }
+
+
+dashboard_memo = Memo(dashboard_base)
+
+
+def cache_tag():
+    """Changes whenever stock-related payloads may change: on writes and on every hub refill interval."""
+    return f"{state_version.tag}.{refill_scheduler.elapsed_intervals()}"
+
+
+@span_latency.time("dashboard_stats")
+def calculate_dashboard_stats():
+    now = datetime.now()
+    # The sales window slides with time, so the memo also expires every minute.
+    base = dashboard_memo.get((cache_tag(), int(now.timestamp() // 60)))
+    return {
+        "stats": base["stats"],
+        "inventory": [
+            dict(row, last_update=get_time_ago(last_updates.get(row["id"], now)))
+            for row in base["inventory"]
+        ],
+        "requests_count": base["requests_count"]
     }
 
 
+def state_changed():
+    """Call after every mutation: invalidates cached payloads and wakes the live stream."""
+    state_version.bump()
+    live_dashboard.notify()
+
+
+def payload_response(payload):
+    """Send a pre-encoded JSON payload, gzipped when the client accepts it."""
+    body, encoding = payload_body(payload, request)
+    response = app.response_class(body, mimetype='application/json')
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def conditional_response(etag, build):
+    """Answer 304 when the client already has ``etag``, otherwise ``build()`` the response."""
+    if request.if_none_match.contains_weak(etag):
+        response = app.response_class(status=304)
+    else:
+        response = build()
+    response.set_etag(etag, weak=True)
+    return response
+
+
+def _csv_value(value):
+    return json.dumps(value) if isinstance(value, (list, dict)) else value
+
+
+def listing_response(fetch, options, columns, name, row=None):
+    """One page of ``fetch(limit=...)`` as JSON, or the whole selection streamed as ndjson/csv.
+
+    JSON pages carry ``X-Next-Cursor`` when more rows follow. Exports are
+    generated lazily from the storage iterator, so memory stays flat however
+    long the history is.
+    """
+    row = row or (lambda r: r)
+    if options['format'] == 'json':
+        page = [row(r) for r in fetch(limit=options['limit'] + 1)]
+        response = jsonify(page[:options['limit']])
+        if len(page) > options['limit']:
+            response.headers['X-Next-Cursor'] = str(page[options['limit'] - 1]['id'])
+        return response
+
+    rows = fetch(limit=options['limit'])
+    if options['format'] == 'ndjson':
+        def generate():
+            lines = []
+            for r in rows:
+                lines.append(json.dumps(row(r), separators=(',', ':')))
+                if len(lines) == 500:
+                    yield "\n".join(lines) + "\n"
+                    lines = []
+            if lines:
+                yield "\n".join(lines) + "\n"
+        return Response(generate(), mimetype='application/x-ndjson')
+
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        for n, r in enumerate(rows, 1):
+            r = row(r)
+            writer.writerow([_csv_value(r.get(c)) for c in columns])
+            if n % 500 == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+    return Response(generate(), mimetype='text/csv', headers={
+        "Content-Disposition": f"attachment; filename={name}-{date.today().isoformat()}.csv"
+    })
+
+
+# Server-Sent Events fan-out of dashboard changes
+live_dashboard = DashboardBroadcaster(calculate_dashboard_stats)
+
+
+# --- Instrumentation ---
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """Flask's provider timed per call; responses use orjson when it is installed (see ``responses``)."""
+
+    def dumps(self, obj, **kwargs):
+        with span_latency.time("json_dumps"):
+            return super().dumps(obj, **kwargs)
+
+    def response(self, *args, **kwargs):
+        if self.compact is False or (self.compact is None and self._app.debug):
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        with span_latency.time("json_dumps"):
+            body = encode_json(obj, self.default)
+        return self._app.response_class(body + b"\n", mimetype=self.mimetype)
+
+
+app.json = TimedJSONProvider(app)
+
+
+@app.before_request
+def start_request_timer():
+    g.started = time.perf_counter()
+    if PROFILING_ENABLED and (request.args.get('profile') == '1' or request.headers.get('X-Profile') == '1'):
+        g.profiler = SamplingProfiler(threading.get_ident()).start()
+
+
+@app.after_request
+def record_request_metrics(response):
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    started = g.pop('started', None)
+    if started is not None:
+        http_latency.observe(time.perf_counter() - started, request.method, route)
+    http_requests.inc(request.method, route, str(response.status_code))
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profile = dict(profiler.stop(), id=profile_ids.next(), method=request.method, path=request.full_path)
+        profiles.append(profile)
+        response.headers['X-Profile-Id'] = str(profile['id'])
+    return response
+
+
+@app.before_request
+def join_shared_state():
+    """With several worker processes, catch up with the others first.
+
+    Mutating requests run inside one ``BEGIN IMMEDIATE`` transaction, so
+    writes are serialized across processes and always check stock that
+    includes every other worker's changes.
+    """
+    if not SHARED_STATE:
+        return
+    if request.method not in ('GET', 'HEAD', 'OPTIONS'):
+        g.write_transaction = storage.atomic()
+        g.write_transaction.__enter__()
+    sync_shared_state()
+
+
+@app.teardown_request
+def end_write_transaction(exc):
+    transaction = g.pop('write_transaction', None)
+    if transaction is not None:
+        # A request that failed rolls its writes back.
+        transaction.__exit__(type(exc) if exc else None, exc, exc.__traceback__ if exc else None)
+
+
+# Registered after the metrics hook so it runs first and its cost shows up in the latency histogram.
+@app.after_request
+def gzip_response(response):
+    """Gzip larger JSON/CSV/text bodies for clients that accept it; cached payloads arrive pre-compressed."""
+    if should_compress(response, request):
+        with span_latency.time("gzip"):
+            compress(response)
+    return response
+
+
+metrics.gauge("dkriuk_hub_stock_units", "Units in the hub, refill included", lambda: hub_total_stock())
+metrics.gauge("dkriuk_outlet_stock_units", "Units across all outlets", lambda: outlets_total_stock())
+metrics.gauge("dkriuk_state_version", "Mutations applied since start", lambda: state_version.value)
+metrics.gauge("dkriuk_sse_subscribers", "Open dashboard streams", lambda: live_dashboard.subscriber_count)
+
+
 # --- Routes ---
 
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus text exposition of the counters, histograms and gauges above."""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/api/metrics/profiles', methods=['GET'])
+def get_profiles():
+    """Latest sampled request profiles, newest first (needs DKRIUK_PROFILING=1)."""
+    if not PROFILING_ENABLED:
+        return jsonify({"error": "Profiling tidak aktif, set DKRIUK_PROFILING=1"}), 404
+    return jsonify(list(reversed(profiles)))
+
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
@@ -260,71 +774,282 @@ def health_check():
 
 @app.route('/api/products', methods=['GET'])
 def get_products():
-    apply_hub_refill()
     outlet_id = request.args.get('outlet_id')
-    if outlet_id:
-        if outlet_id == HUB_ID:
-            products_with_stock = []
-            for p in PRODUCTS:
-                p_copy = p.copy()
-                p_copy['stock'] = hub_inventory.get(p['id'], 0)
-                products_with_stock.append(p_copy)
-            return jsonify(products_with_stock)
-        if not get_outlet(outlet_id):
-            return jsonify({"error": "Outlet tidak ditemukan"}), 404
-        products_with_stock = []
-        for p in PRODUCTS:
-            p_copy = p.copy()
-            p_copy['stock'] = inventory.get(outlet_id, {}).get(p['id'], 0)
-            products_with_stock.append(p_copy)
-        return jsonify(products_with_stock)
-    return jsonify(PRODUCTS)
+    if outlet_id and outlet_id != HUB_ID and not get_outlet(outlet_id):
+        return jsonify({"error": "Outlet tidak ditemukan"}), 404
 
+    # The hub refills over time, so its list follows cache_tag(); an outlet's only changes with its own stock.
+    if outlet_id == HUB_ID:
+        version = f"{catalog.version}.{cache_tag()}"
+    else:
+        version = f"{catalog.version}.{stock_versions.get(outlet_id, 0)}" if outlet_id else str(catalog.version)
 
-@app.route('/api/dashboard', methods=['GET'])
-def get_dashboard():
-    data = calculate_dashboard_stats()
-    return jsonify(data)
+    def encode():
+        if outlet_id:
+            stock = refill_scheduler.current() if outlet_id == HUB_ID else inventory.get(outlet_id, {})
+            products = [dict(p.to_dict(), stock=stock.get(p.id, 0)) for p in catalog.products]
+        else:
+            products = [p.to_dict() for p in catalog.products]
+        return Payload(encode_json(products, app.json.default))
 
+    payload = payload_cache.get(f"products:{outlet_id or ''}", version, encode)
+    return conditional_response(f"prod-{payload.etag}", lambda: payload_response(payload))
 
-@app.route('/api/laporan', methods=['GET'])
-def get_laporan():
-    report_map = {}
 
-    mock_history = [
-        {"id": "hist_1", "tanggal": "02 Des 2023", "outlet": "Cabang UNNES Sekaran", "transaksi": 150, "item_terjual": 340, "omzet": 3450000, "status": "Final"},
-        {"id": "hist_2", "tanggal": "02 Des 2023", "outlet": "Cabang Banaran", "transaksi": 98, "item_terjual": 210, "omzet": 2150000, "status": "Final"}
-    ]
+@app.route('/api/catalog', methods=['GET'])
+def get_catalog():
+    payload = payload_cache.get(
+        "catalog", catalog.version, lambda: Payload(encode_json(catalog.to_dict(), app.json.default))
+    )
+    return conditional_response(f"cat-{payload.etag}", lambda: payload_response(payload))
 
-    current_reports = []
 
-    for t in transactions:
+@app.route('/api/catalog/reload', methods=['POST'])
+def reload_catalog():
+    """Swap in new outlets/products without a restart.
+
+    Takes ``{"outlets": [...], "products": [...]}`` (either key optional) or,
+    with an empty body, re-reads the JSON file named by DKRIUK_CATALOG.
+    """
+    data = request.get_json(silent=True) or {}
+    if not data:
+        path = os.environ.get("DKRIUK_CATALOG")
+        if not path:
+            return jsonify({"error": "Body kosong dan DKRIUK_CATALOG tidak diatur"}), 400
         try:
-            parsed_date = datetime.fromisoformat(str(t['date']).replace('Z', '+00:00'))
-        except (TypeError, ValueError):
-            parsed_date = datetime.now()
-        date_str = parsed_date.strftime("%d Des %Y")
-        key = (date_str, t['outlet_id'])
-
-        if key not in report_map:
-            report_map[key] = {"transaksi": 0, "item_terjual": 0, "omzet": 0}
-
-        report_map[key]["transaksi"] += 1
-        report_map[key]["omzet"] += t['total']
-        report_map[key]["item_terjual"] += sum(item['qty'] for item in t['items'])
-
-    for (date, outlet_id), data in report_map.items():
-        current_reports.append({
-            "id": f"rep_{date}_{outlet_id}",
-            "tanggal": date,
-            "outlet": get_outlet_name(outlet_id),
-            "transaksi": data['transaksi'],
-            "item_terjual": data['item_terjual'],
-            "omzet": data['omzet'],
-            "status": "Open"
-        })
+            with open(path) as fh:
+                data = json.load(fh)
+        except (OSError, ValueError) as exc:
+            return jsonify({"error": f"Gagal membaca katalog: {exc}"}), 400
+    if not isinstance(data, dict) or ("outlets" not in data and "products" not in data):
+        return jsonify({"error": "Katalog harus berisi outlets dan/atau products"}), 400
+
+    try:
+        catalog.load(data.get("outlets"), data.get("products"))
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    storage.set_meta("catalog", catalog.to_dict())
+    storage.flush()
+    state_changed()
+    return jsonify({
+        "message": "Katalog diperbarui",
+        "outlets": len(catalog.outlets),
+        "products": len(catalog.products)
+    }), 200
+
+
+@app.route('/api/hub/refill', methods=['GET', 'POST'])
+def handle_hub_refill():
+    """Read or change hub refill settings; GET also returns the latest refill log entries."""
+    if request.method == 'POST':
+        data = request.json or {}
+        rules_data = data.get('rules') or []
+        if not isinstance(rules_data, list) or not all(isinstance(rule, dict) for rule in rules_data):
+            return jsonify({"error": "rules harus berupa list berisi id, rate dan cap"}), 400
+        default_rate = data.get('default_rate')
+        if default_rate is not None:
+            try:
+                default_rate = int(default_rate)
+            except (TypeError, ValueError):
+                default_rate = -1
+            if default_rate < 0:
+                return jsonify({"error": "default_rate harus berupa angka >= 0"}), 400
+        rules = {}
+        for rule in rules_data:
+            prod_id = parse_positive_int(rule.get('id'))
+            if not get_product(prod_id):
+                return jsonify({"error": f"Produk dengan id {rule.get('id')} tidak ditemukan"}), 404
+            try:
+                rate = int(rule.get('rate', HUB_REFILL_RATE))
+                cap = int(rule['cap']) if rule.get('cap') is not None else None
+            except (TypeError, ValueError):
+                return jsonify({"error": "rate dan cap harus berupa angka"}), 400
+            if rate < 0 or (cap is not None and cap < 0):
+                return jsonify({"error": "rate dan cap tidak boleh negatif"}), 400
+            rules[prod_id] = RefillRule(rate, cap)
+        refill_scheduler.configure(
+            rules=rules,
+            interval_seconds=parse_positive_int(data.get('interval_seconds'), default=None),
+            # 0 turns the default refill off.
+            default_rate=default_rate
+        )
+        save_refill_config()
+        state_changed()
+        return jsonify({"message": "Pengaturan refill diperbarui", **refill_scheduler.config()}), 200
+
+    limit = parse_positive_int(request.args.get('limit'), default=50)
+    return jsonify({
+        **refill_scheduler.config(),
+        "last_refill": refill_scheduler.anchor.isoformat(),
+        "stock": refill_scheduler.current(),
+        "log": storage.list_refills(limit)
+    })
+
+
+@app.route('/api/analytics/stock', methods=['GET'])
+def get_stock_analytics():
+    """Coverage days, overstock and waste risk per outlet and per product (``detail=1`` adds the matrix)."""
+    detail = request.args.get('detail') == '1'
+
+    def build():
+        result = stock_analysis()
+        outlets = catalog.outlets
+        products = catalog.products
+        o, p = result["outlets"], result["products"]
+        payload = {
+            "waste": result["waste"],
+            "outlets": [
+                {
+                    "id": outlet.id,
+                    "outlet": outlet.name,
+                    "stock": int(o["stock"][i]),
+                    "velocity_daily": round(float(o["velocity_daily"][i]), 2),
+                    "coverage_days": round(float(o["coverage_days"][i]), 2),
+                    "overstock": int(o["overstock"][i]),
+                    "waste_risk": round(float(o["waste_risk"][i]), 1)
+                }
+                for i, outlet in enumerate(outlets)
+            ],
+            "products": [
+                {
+                    "id": product.id,
+                    "name": product.name,
+                    "stock": int(p["stock"][i]),
+                    "velocity_daily": round(float(p["velocity_daily"][i]), 2),
+                    "coverage_days": round(float(p["coverage_days"][i]), 2),
+                    "waste_risk": round(float(p["waste_risk"][i]), 1)
+                }
+                for i, product in enumerate(products)
+            ]
+        }
+        if detail:
+            payload["matrix"] = {
+                "outlet_ids": [outlet.id for outlet in outlets],
+                "product_ids": [product.id for product in products],
+                "stock": result["cells"]["stock"].astype(int).tolist(),
+                "velocity_daily": result["cells"]["velocity_daily"].round(2).tolist()
+            }
+        return jsonify(payload)
+
+    etag = f"ana-{cache_tag()}-{int(datetime.now().timestamp() // 3600)}-{int(detail)}"
+    return conditional_response(etag, build)
+
+
+@app.route('/api/forecast', methods=['GET'])
+def get_forecast():
+    """Forecast demand for the next ``hours`` (default 24) and predicted stock-out time per outlet and product."""
+    hours = min(parse_positive_int(request.args.get('hours'), 24), forecaster.horizon_hours - 1)
+    outlet_id = request.args.get('outlet_id')
+    if outlet_id and not get_outlet(outlet_id):
+        return jsonify({"error": "Outlet tidak ditemukan"}), 404
+
+    def build():
+        analysis = stock_analysis()
+        products = catalog.products
+        selected = [(i, o) for i, o in enumerate(catalog.outlets) if not outlet_id or o.id == outlet_id]
+        demand = forecaster.demand([o.id for _, o in selected], [p.id for p in products], hours=hours)
+        stock = analysis["cells"]["stock"]
+        stockout = analysis["stockout_hours"]
+        outlets = []
+        for row, (i, outlet) in enumerate(selected):
+            outlets.append({
+                "id": outlet.id,
+                "outlet": outlet.name,
+                "perkiraan_habis": stockout_time(analysis, stockout[i].min(initial=np.inf)),
+                "products": [
+                    {
+                        "id": product.id,
+                        "name": product.name,
+                        "stock": int(stock[i, j]),
+                        "demand": round(float(demand[row, j]), 1),
+                        "perkiraan_habis": stockout_time(analysis, stockout[i, j])
+                    }
+                    for j, product in enumerate(products)
+                ]
+            })
+        return jsonify({"hours": hours, "computed_at": analysis["computed_at"].isoformat(), "outlets": outlets})
+
+    etag = f"fc-{cache_tag()}-{int(datetime.now().timestamp() // 3600)}-{zlib.crc32(request.query_string):x}"
+    return conditional_response(etag, build)
+
+
+@app.route('/api/sales/recent', methods=['GET'])
+def get_recent_sales():
+    """Qty and revenue sold in the last ``hours`` (default 24, up to the 8 days kept by the rolling totals)."""
+    hours = min(parse_positive_int(request.args.get('hours'), 24), 24 * 8)
+    with span_latency.time("recent_sales"):
+        qty, revenue = sales_stats.window(hours=hours)
+    return jsonify({"hours": hours, "qty": qty, "revenue": revenue})
 
-    return jsonify(current_reports + mock_history)
+
+@app.route('/api/dashboard', methods=['GET'])
+def get_dashboard():
+    data = calculate_dashboard_stats()
+    labels = "|".join(row["last_update"] for row in data["inventory"])
+    etag = f"dash-{cache_tag()}-{zlib.crc32(labels.encode()):x}-{int(datetime.now().timestamp() // 60)}"
+    return conditional_response(etag, lambda: jsonify(data))
+
+
+@app.route('/api/dashboard/stream', methods=['GET'])
+def stream_dashboard():
+    """SSE stream: one ``snapshot`` event, then ``delta`` events as state changes."""
+    q = live_dashboard.subscribe()
+    if q is None:
+        response = jsonify({"error": "Terlalu banyak koneksi live, muat ulang dashboard secara berkala"})
+        response.headers['Retry-After'] = '60'
+        return response, 503
+    response = Response(
+        live_dashboard.stream(q),
+        mimetype='text/event-stream',
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+    # Frees the slot even if the client leaves before the stream starts.
+    response.call_on_close(lambda: live_dashboard.unsubscribe(q))
+    return response
+
+
+@app.route('/api/laporan', methods=['GET'])
+def get_laporan():
+    try:
+        start = date.fromisoformat(request.args['start']) if request.args.get('start') else None
+        end = date.fromisoformat(request.args['end']) if request.args.get('end') else None
+    except ValueError:
+        return jsonify({"error": "Format tanggal harus YYYY-MM-DD"}), 400
+    outlet_id = request.args.get('outlet_id')
+    limit = parse_positive_int(request.args.get('limit'), default=None)
+    offset = parse_positive_int(request.args.get('offset'))
+
+    def build():
+        rows, total = report_rollup.query(start=start, end=end, outlet_id=outlet_id, offset=offset, limit=limit)
+        reports = []
+        for row in rows:
+            tanggal = row['day'].strftime("%d Des %Y")
+            reports.append({
+                "id": f"rep_{tanggal}_{row['outlet_id']}",
+                "tanggal": tanggal,
+                "outlet": get_outlet_name(row['outlet_id']),
+                "transaksi": row['transaksi'],
+                "item_terjual": row['item_terjual'],
+                "omzet": row['omzet'],
+                "status": "Final" if row['final'] else "Open"
+            })
+        response = jsonify(reports)
+        response.headers['X-Total-Count'] = str(total)
+        return response
+
+    # Days close at midnight, so the date is part of the tag as well as the query.
+    etag = f"lap-{state_version.tag}-{date.today().isoformat()}-{zlib.crc32(request.query_string):x}"
+    return conditional_response(etag, build)
+
+
+@app.route('/api/audit/stock', methods=['GET'])
+def get_stock_audit():
+    """Stock movements recorded by the event log backend, newest first."""
+    if not hasattr(storage, 'stock_movements'):
+        return jsonify({"error": "Audit stok hanya tersedia dengan DKRIUK_STORAGE=log"}), 404
+    limit = min(parse_positive_int(request.args.get('limit'), 100), 1000)
+    return jsonify(storage.stock_movements(request.args.get('location'), limit))
 
 
 @app.route('/api/distribusi', methods=['GET', 'POST'])
@@ -334,8 +1059,6 @@ def handle_distribusi():
         outlet_id = data.get('outlet_id')
         items_to_add = data.get('items', [])
 
-        apply_hub_refill()
-
         if not outlet_id:
             return jsonify({"error": "outlet_id wajib diisi"}), 400
         if not get_outlet(outlet_id):
@@ -344,7 +1067,7 @@ def handle_distribusi():
             return jsonify({"error": "items harus berupa list dan tidak boleh kosong"}), 400
 
         total_qty = 0
-        # Validate hub stock availability first
+        moves = []
         for item in items_to_add:
             prod_id = parse_positive_int(item.get('id'))
             qty = parse_positive_int(item.get('qty'))
@@ -354,95 +1077,493 @@ def handle_distribusi():
             if not product:
                 return jsonify({"error": f"Produk dengan id {prod_id} tidak ditemukan"}), 404
 
-            if hub_inventory.get(prod_id, 0) < qty:
-                return jsonify({"error": f"Stok hub tidak cukup untuk {product['name']}"}), 400
-
-        # Deduct from hub, add to outlet
-        for item in items_to_add:
-            prod_id = parse_positive_int(item.get('id'))
-            qty = parse_positive_int(item.get('qty'))
-            hub_inventory[prod_id] = hub_inventory.get(prod_id, 0) - qty
-            current_stock = inventory.setdefault(outlet_id, {})
-            current_stock[prod_id] = current_stock.get(prod_id, 0) + qty
+            moves.append((prod_id, qty))
             total_qty += qty
 
-        distributions.append({
-            "date": datetime.now().isoformat(),
-            "outlet": get_outlet_name(outlet_id),
-            "items_count": len(items_to_add),
-            "total_qty": total_qty
-        })
+        # Deduct from hub, add to outlet (checked and applied under the hub/outlet locks);
+        # the stock changes and the distribution record are persisted together.
+        try:
+            with refill_scheduler.settled(), stock_ledger.lock(outlet_id), stock_ledger.undo_on_error(), \
+                    storage.atomic():
+                hub_stock, _ = stock_ledger.transfer(HUB_ID, outlet_id, moves)
+                storage.add_distribution({
+                    "date": datetime.now().isoformat(),
+                    "outlet_id": outlet_id,
+                    "outlet": get_outlet_name(outlet_id),
+                    "items_count": len(items_to_add),
+                    "total_qty": total_qty
+                })
+        except InsufficientStock as exc:
+            return jsonify({"error": f"Stok hub tidak cukup untuk {get_product_name(exc.product_id)}"}), 400
 
         last_updates[outlet_id] = datetime.now()
+        save_last_updates()
+        distributions_counter.inc("manual")
+        state_changed()
 
         return jsonify({
             "message": "Stok berhasil ditambahkan",
             "total_qty": total_qty,
-            "hub_remaining": hub_inventory
+            "hub_remaining": {prod_id: hub_stock[prod_id] for prod_id, _ in moves}
         }), 201
 
-    return jsonify(distributions)
+    options, error = parse_listing_args(request.args)
+    if error:
+        return jsonify({"error": error}), 400
 
+    def fetch(limit):
+        return storage.list_distributions(
+            options['outlet_id'], options['start'], options['end'], options['cursor'], options['descending'], limit
+        )
+    return listing_response(
+        fetch, options, ("id", "date", "outlet_id", "outlet", "items_count", "total_qty"), "distribusi"
+    )
 
-@app.route('/api/pos/transaksi', methods=['POST'])
-def pos_transaksi():
+
+def replenishment_options(data):
+    """Planner settings from query args or a JSON body; returns ``(options, error)``."""
+    try:
+        target_days = float(data.get('target_days', TARGET_COVERAGE_DAYS))
+    except (TypeError, ValueError):
+        target_days = 0
+    if not 0 < target_days <= 60:
+        return None, "target_days harus berupa angka antara 0 dan 60"
+    try:
+        min_drop = int(data.get('min_drop', MIN_DROP_QTY))
+    except (TypeError, ValueError):
+        min_drop = -1
+    if min_drop < 0:
+        return None, "min_drop harus berupa angka >= 0"
+
+    outlet_ids = data.get('outlet_ids')
+    if outlet_ids is None:
+        outlet_ids = [o.id for o in catalog.outlets]
+    elif isinstance(outlet_ids, str):
+        outlet_ids = [oid for oid in outlet_ids.split(',') if oid]
+    if not isinstance(outlet_ids, list) or not outlet_ids:
+        return None, "outlet_ids harus berisi minimal 1 outlet"
+    if not all(isinstance(oid, str) for oid in outlet_ids):
+        return None, "outlet_ids harus berupa list id outlet"
+    unknown = [oid for oid in outlet_ids if not get_outlet(oid)]
+    if unknown:
+        return None, f"Outlet tidak ditemukan: {', '.join(map(str, unknown))}"
+    return {"target_days": target_days, "min_drop": min_drop, "outlet_ids": list(dict.fromkeys(outlet_ids))}, None
+
+
+def request_product_id(item, products_by_name):
+    """Requests from the POS name the product (``item``); API clients may send ``id``."""
+    prod_id = parse_positive_int(item.get('id'))
+    if prod_id and get_product(prod_id):
+        return prod_id
+    return products_by_name.get(str(item.get('item', '')).strip().lower())
+
+
+@span_latency.time("replenishment_plan")
+def build_replenishment_plan(hub_stock, target_days, min_drop, outlet_ids):
+    """One pass over every selected outlet: what the hub should send and which pending requests that covers."""
+    products = catalog.products
+    product_ids = [p.id for p in products]
+    o_pos = {oid: i for i, oid in enumerate(outlet_ids)}
+    p_pos = {pid: j for j, pid in enumerate(product_ids)}
+
+    # Daily rate of the demand forecast over the coverage target itself (capped at the forecast horizon).
+    hours = min(target_days * 24, forecaster.horizon_hours - 1)
+    velocity = forecaster.demand(outlet_ids, product_ids, hours=hours) * (24 / hours)
+    stock = analytics.analyze(outlet_ids, product_ids, velocity=velocity)["cells"]["stock"]
+
+    products_by_name = {p.name.lower(): p.id for p in products}
+    pending = []
+    requested = np.zeros(stock.shape)
+    for req in storage.pending_requests():
+        i = o_pos.get(req['outlet_id'])
+        if i is None:
+            continue
+        wanted = {}
+        for item in req.get('items') or []:
+            prod_id = request_product_id(item, products_by_name)
+            qty = parse_positive_int(item.get('qty'))
+            if prod_id is None or qty == 0:
+                continue
+            wanted[prod_id] = wanted.get(prod_id, 0) + qty
+            requested[i, p_pos[prod_id]] += qty
+        pending.append((req['id'], i, wanted))
+
+    hub = np.array([hub_stock.get(pid, 0) for pid in product_ids])
+    floor = VELOCITY_FLOOR / max(len(catalog.outlets) * len(product_ids), 1)
+    alloc = plan_replenishment(stock, velocity, requested, hub, target_days, min_drop, velocity_floor=floor)
+
+    # A request counts as fulfilled when the drop covers it on top of the older requests of the same outlet.
+    remaining = alloc.copy()
+    fulfilled = {}
+    for req_id, i, wanted in pending:
+        if wanted and all(remaining[i, p_pos[pid]] >= qty for pid, qty in wanted.items()):
+            for pid, qty in wanted.items():
+                remaining[i, p_pos[pid]] -= qty
+            fulfilled.setdefault(outlet_ids[i], []).append(req_id)
+
+    distributions = []
+    for i in np.flatnonzero(alloc.sum(axis=1)):
+        oid = outlet_ids[i]
+        row = alloc[i]
+        distributions.append({
+            "outlet_id": oid,
+            "outlet": get_outlet_name(oid),
+            "items": [
+                {"id": product_ids[j], "name": products[j].name, "qty": int(row[j])}
+                for j in np.flatnonzero(row)
+            ],
+            "total_qty": int(row.sum()),
+            "request_ids": fulfilled.get(oid, [])
+        })
+
+    sent = alloc.sum(axis=0)
+    moves = [[d["outlet_id"], [[item["id"], item["qty"]] for item in d["items"]]] for d in distributions]
+    return {
+        "plan_id": f"{zlib.crc32(json.dumps(moves).encode()):08x}",
+        "target_days": target_days,
+        "min_drop": min_drop,
+        "distributions": distributions,
+        "total_qty": int(sent.sum()),
+        "hub_after": {str(pid): int(hub[j] - sent[j]) for j, pid in enumerate(product_ids)}
+    }
+
+
+@app.route('/api/replenishment/plan', methods=['GET'])
+def preview_replenishment():
+    """Suggested hub -> outlet drops for the current stock, sales velocity and pending requests."""
+    options, error = replenishment_options(request.args)
+    if error:
+        return jsonify({"error": error}), 400
+    return jsonify(build_replenishment_plan(refill_scheduler.current(), **options))
+
+
+@app.route('/api/replenishment/apply', methods=['POST'])
+def apply_replenishment():
+    """Recompute the plan and apply every drop at once; ``plan_id`` guards against a stale preview."""
     data = request.json or {}
+    options, error = replenishment_options(data)
+    if error:
+        return jsonify({"error": error}), 400
+
+    now = datetime.now()
+    with refill_scheduler.settled():
+        plan = build_replenishment_plan(hub_inventory, **options)
+        if data.get('plan_id') and data['plan_id'] != plan['plan_id']:
+            return jsonify({"error": "Stok berubah sejak preview, periksa rencana terbaru", "plan": plan}), 409
+        if not plan['distributions']:
+            return jsonify({"message": "Tidak ada distribusi yang diperlukan", "plan": plan}), 200
+        # The stock moves, the distribution records and the fulfilled requests are persisted together.
+        try:
+            with stock_ledger.undo_on_error(), storage.atomic():
+                hub_remaining = stock_ledger.distribute(HUB_ID, {
+                    d['outlet_id']: [(item['id'], item['qty']) for item in d['items']] for d in plan['distributions']
+                })
+                fulfilled = []
+                for d in plan['distributions']:
+                    storage.add_distribution({
+                        "date": now.isoformat(),
+                        "outlet_id": d['outlet_id'],
+                        "outlet": d['outlet'],
+                        "items_count": len(d['items']),
+                        "total_qty": d['total_qty']
+                    })
+                    fulfilled.extend(d['request_ids'])
+                if fulfilled:
+                    storage.set_request_status(fulfilled, "Dikirim")
+        except InsufficientStock as exc:
+            return jsonify({"error": f"Stok hub tidak cukup untuk {get_product_name(exc.product_id)}"}), 409
+
+    for d in plan['distributions']:
+        last_updates[d['outlet_id']] = now
+    save_last_updates()
+    distributions_counter.inc("planner", amount=len(plan['distributions']))
+    state_changed()
+
+    return jsonify({
+        "message": f"{len(plan['distributions'])} distribusi diterapkan",
+        "plan": plan,
+        "hub_remaining": hub_remaining
+    }), 201
+
+
+def validate_transaction(data):
+    """Validate a POS payload; returns ``(outlet_id, items, error)`` with error as ``(message, status)``."""
     outlet_id = data.get('outlet_id', 'outlet_1')
     items = data.get('items', [])
 
     if not get_outlet(outlet_id):
-        return jsonify({"error": "Outlet invalid"}), 400
+        return None, None, ("Outlet invalid", 400)
     if not isinstance(items, list) or len(items) == 0:
-        return jsonify({"error": "items tidak boleh kosong"}), 400
+        return None, None, ("items tidak boleh kosong", 400)
+    if data.get('date') and not is_iso_datetime(data['date']):
+        return None, None, ("date harus berupa tanggal ISO 8601", 400)
 
     validated_items = []
     for item in items:
+        if not isinstance(item, dict):
+            return None, None, ("Setiap item harus memiliki id dan qty > 0", 400)
         prod_id = parse_positive_int(item.get('id'))
         qty = parse_positive_int(item.get('qty'))
         if prod_id == 0 or qty == 0:
-            return jsonify({"error": "Setiap item harus memiliki id dan qty > 0"}), 400
+            return None, None, ("Setiap item harus memiliki id dan qty > 0", 400)
 
         product = get_product(prod_id)
         if not product:
-            return jsonify({"error": f"Produk dengan id {prod_id} tidak ditemukan"}), 404
+            return None, None, (f"Produk dengan id {prod_id} tidak ditemukan", 404)
 
         try:
-            price = float(item.get('price', product['price']))
+            price = float(item.get('price', product.price))
         except (TypeError, ValueError):
-            price = float(product['price'])
-
-        current_stock = inventory[outlet_id].get(prod_id, 0)
-        if current_stock < qty:
-            return jsonify({"error": f"Stok tidak cukup untuk {product['name']}"}), 400
+            price = float(product.price)
+        if not math.isfinite(price) or price < 0:
+            return None, None, (f"Harga tidak valid untuk produk {prod_id}", 400)
 
         validated_items.append({
             "id": prod_id,
-            "name": product['name'],
+            "name": product.name,
             "qty": qty,
-            "price": price,
-            "image": item.get('image', product.get('image', ''))
+            # Whole rupiah, as the columnar sales store keeps it, so every backend stores the same total.
+            "price": float(round(price)),
+            "image": item.get('image', product.image)
         })
 
-    for item in validated_items:
-        inventory[outlet_id][item['id']] -= item['qty']
+    return outlet_id, validated_items, None
 
-    total_calculated = sum(i['price'] * i['qty'] for i in validated_items)
 
-    transaction_record = {
-        "id": len(transactions) + 1,
+def build_transaction(outlet_id, items, date_value=None, idempotency_key=None):
+    date_value = date_value or datetime.now().isoformat()
+    return {
+        "id": transaction_ids.next(),
         "outlet_id": outlet_id,
-        "items": validated_items,
-        "total": total_calculated,
-        "date": data.get('date', datetime.now().isoformat())
+        "items": items,
+        "total": sum(i['price'] * i['qty'] for i in items),
+        "date": date_value,
+        "timestamp": parse_iso_datetime(date_value),
+        "idempotency_key": idempotency_key
     }
-    transactions.append(transaction_record)
 
-    last_updates[outlet_id] = datetime.now()
+
+def feed_sales(records):
+    """Add stored sales to the revenue total and the rolling sales, report and forecast aggregates."""
+    revenue = 0
+    for record in records:
+        revenue += round(record['total'])
+        sold_qty = sum(i['qty'] for i in record['items'])
+        sales_stats.record(record['timestamp'], sold_qty, record['total'])
+        report_rollup.record(record['timestamp'].date(), record['outlet_id'], sold_qty, record['total'])
+        sold_items = [(i['id'], i['qty']) for i in record['items']]
+        forecaster.record_sale(record['timestamp'], record['outlet_id'], sold_items)
+        shared_sync["transaction_id"] = max(shared_sync["transaction_id"], record['id'])
+    with revenue_lock:
+        revenue_total["rupiah"] += revenue
+
+
+@span_latency.time("record_transactions")
+def record_transactions(records):
+    """Account for sales committed by this process: aggregates, counters and last updates.
+
+    The sales themselves are stored by the caller, in the same storage
+    transaction as the stock they took.
+    """
+    if not records:
+        return
+    feed_sales(records)
+    now = datetime.now()
+    transactions_counter.inc(amount=len(records))
+    for record in records:
+        items_counter.inc(amount=sum(i['qty'] for i in record['items']))
+        last_updates[record['outlet_id']] = now
+    save_last_updates()
+    state_changed()
+
+
+def claim_idempotency_keys(keys):
+    """Reserve unseen keys for this request.
+
+    Returns ``{key: transaction_id}`` for keys that were already used; the id
+    is None when another request is still applying that key.
+    """
+    with idempotency_lock:
+        seen = storage.find_transaction_ids(keys)
+        for key in keys:
+            if key in inflight_keys:
+                seen.setdefault(key, None)
+            elif key not in seen:
+                inflight_keys.add(key)
+        return seen
+
+
+def release_idempotency_keys(keys):
+    with idempotency_lock:
+        inflight_keys.difference_update(keys)
+
+
+@app.route('/api/pos/transaksi', methods=['POST'])
+def pos_transaksi():
+    data = request.json or {}
+    outlet_id, validated_items, error = validate_transaction(data)
+    if error:
+        return jsonify({"error": error[0]}), error[1]
+
+    key = request.headers.get('Idempotency-Key') or data.get('idempotency_key')
+    key = str(key) if key else None
+    if key:
+        seen = claim_idempotency_keys([key])
+        if key in seen:
+            return jsonify({"message": "Transaksi sudah tercatat", "id": seen[key], "duplicate": True}), 200
+
+    try:
+        # The outlet lock keeps stock and sale writes in order; atomic() commits them together,
+        # and if storing the sale fails the stock taken for it is put back.
+        with stock_ledger.lock(outlet_id), stock_ledger.undo_on_error(), storage.atomic():
+            try:
+                outlet_stock = stock_ledger.take(outlet_id, [(i['id'], i['qty']) for i in validated_items])
+            except InsufficientStock as exc:
+                return jsonify({"error": f"Stok tidak cukup untuk {get_product_name(exc.product_id)}"}), 400
+            transaction_record = build_transaction(outlet_id, validated_items, data.get('date'), key)
+            storage.add_transactions([transaction_record])
+        record_transactions([transaction_record])
+    finally:
+        if key:
+            release_idempotency_keys([key])
 
     return jsonify({
         "message": "Transaksi berhasil",
-        "total": total_calculated,
-        "new_stock": inventory[outlet_id]
+        "total": transaction_record['total'],
+        # Only the products sold; the full list is served (cached) by /api/products.
+        "new_stock": {i['id']: outlet_stock[i['id']] for i in validated_items}
+    }), 200
+
+
+@app.route('/api/pos/transaksi', methods=['GET'])
+def list_transaksi():
+    """Transaction history with the same filters, cursor and export formats as ``/api/distribusi``."""
+    options, error = parse_listing_args(request.args)
+    if error:
+        return jsonify({"error": error}), 400
+
+    def fetch(limit):
+        return storage.query_transactions(
+            options['outlet_id'], options['start'], options['end'], options['cursor'], options['descending'], limit
+        )
+
+    def row(t):
+        return {
+            "id": t['id'],
+            "date": t['date'],
+            "outlet_id": t['outlet_id'],
+            "outlet": get_outlet_name(t['outlet_id']),
+            "items": t['items'],
+            "total": t['total']
+        }
+    return listing_response(fetch, options, ("id", "date", "outlet_id", "outlet", "total", "items"), "transaksi", row)
+
+
+def parse_batch_payload():
+    """Read a batch body: JSON array, ``{"transactions": [...]}`` or NDJSON (one transaction per line)."""
+    if request.mimetype in ('application/x-ndjson', 'application/jsonl'):
+        records = []
+        for line in request.get_data(as_text=True).splitlines():
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                records.append(None)
+        return records
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('transactions')
+    return data if isinstance(data, list) else None
+
+
+@app.route('/api/pos/transaksi/batch', methods=['POST'])
+def pos_transaksi_batch():
+    """Ingest a backlog of offline sales in one pass.
+
+    Records are validated, grouped per outlet and applied under a single lock
+    acquisition per outlet, in the order they were sent. Records carrying an
+    ``idempotency_key`` that was already applied are reported as duplicates,
+    so a till can safely retry a whole batch.
+    """
+    records = parse_batch_payload()
+    if records is None:
+        return jsonify({"error": "Body harus berupa list transaksi (JSON array atau NDJSON)"}), 400
+    if len(records) > MAX_BATCH_SIZE:
+        return jsonify({"error": f"Maksimal {MAX_BATCH_SIZE} transaksi per batch"}), 413
+
+    results = [None] * len(records)
+    first_by_key = {}
+    repeats = []
+    by_outlet = {}
+
+    for index, data in enumerate(records):
+        if not isinstance(data, dict):
+            results[index] = {"index": index, "status": "error", "error": "Format transaksi tidak valid"}
+            continue
+        outlet_id, items, error = validate_transaction(data)
+        if error:
+            results[index] = {"index": index, "status": "error", "error": error[0]}
+            continue
+        key = data.get('idempotency_key')
+        key = str(key) if key else None
+        if key:
+            if key in first_by_key:
+                repeats.append((index, first_by_key[key]))
+                continue
+            first_by_key[key] = index
+        by_outlet.setdefault(outlet_id, []).append((index, items, data.get('date'), key))
+
+    seen = claim_idempotency_keys(list(first_by_key)) if first_by_key else {}
+    claimed = [key for key in first_by_key if key not in seen]
+    committed = []
+    try:
+        for outlet_id, pending in by_outlet.items():
+            fresh = []
+            for entry in pending:
+                key = entry[3]
+                if key in seen:
+                    results[entry[0]] = {"index": entry[0], "status": "duplicate", "id": seen[key]}
+                else:
+                    fresh.append(entry)
+            outlet_records = []
+            with stock_ledger.lock(outlet_id), stock_ledger.undo_on_error(), storage.atomic():
+                outcomes = stock_ledger.take_each(outlet_id, [[(i['id'], i['qty']) for i in e[1]] for e in fresh])
+                for (index, items, date_value, key), exc in zip(fresh, outcomes):
+                    if exc is not None:
+                        results[index] = {
+                            "index": index, "status": "error",
+                            "error": f"Stok tidak cukup untuk {get_product_name(exc.product_id)}"
+                        }
+                        continue
+                    record = build_transaction(outlet_id, items, date_value, key)
+                    outlet_records.append(record)
+                    results[index] = {"index": index, "status": "ok", "id": record['id'], "total": record['total']}
+                if outlet_records:
+                    storage.add_transactions(outlet_records)
+            committed.extend(outlet_records)
+    finally:
+        # Outlets stored before a failure still count.
+        record_transactions(committed)
+        release_idempotency_keys(claimed)
+
+    for index, first in repeats:
+        original = results[first]
+        if original['status'] == "error":
+            results[index] = dict(original, index=index)
+        else:
+            results[index] = {"index": index, "status": "duplicate", "id": original.get('id')}
+
+    counts = {"ok": 0, "duplicate": 0, "error": 0}
+    for result in results:
+        counts[result['status']] += 1
+
+    return jsonify({
+        "message": "Batch diproses",
+        "accepted": counts["ok"],
+        "duplicates": counts["duplicate"],
+        "failed": counts["error"],
+        "results": results
     }), 200
 
 
@@ -460,17 +1581,55 @@ def handle_requests():
         if not isinstance(items_requested, list) or len(items_requested) == 0:
             return jsonify({"error": "requests harus berisi minimal 1 item"}), 400
 
-        requests_log.append({
-            "id": len(requests_log) + 1,
+        storage.add_request({
+            "id": request_ids.next(),
             "date": datetime.now().isoformat(),
             "outlet_id": outlet_id,
             "items": items_requested,
             "note": data.get('note'),
             "status": "Pending"
         })
+        stock_requests_counter.inc()
+        state_changed()
         return jsonify({"message": "Request received"}), 201
-    return jsonify(requests_log)
+    options, error = parse_listing_args(request.args)
+    if error:
+        return jsonify({"error": error}), 400
+    status = request.args.get('status') or None
+
+    def fetch(limit):
+        return storage.list_requests(
+            options['outlet_id'], options['start'], options['end'], status, options['cursor'],
+            options['descending'], limit
+        )
+    return listing_response(fetch, options, ("id", "date", "outlet_id", "status", "note", "items"), "requests")
+
+
+def create_app(max_streams=None):
+    """Application factory for WSGI servers (``serve.py``, ``waitress-serve --call app:create_app``).
+
+    State is loaded once when the module is imported; this only starts the
+    optional background work. One process scales with threads; for more
+    than one process (``serve.py --workers``) set ``DKRIUK_WORKERS`` so
+    every process syncs its state through the shared SQLite database.
+
+    Every ``/api/dashboard/stream`` subscriber holds a worker thread, so
+    servers with a fixed pool pass ``max_streams`` (or set
+    ``DKRIUK_MAX_STREAMS``) below their thread count.
+    """
+    if max_streams is None and os.environ.get("DKRIUK_MAX_STREAMS"):
+        max_streams = int(os.environ["DKRIUK_MAX_STREAMS"])
+    live_dashboard.max_subscribers = max_streams
+    if SHARED_STATE:
+        # Requests sync on their own; this keeps live streams of idle workers current.
+        start_shared_sync(float(os.environ.get("DKRIUK_SYNC_INTERVAL", 0.5)))
+    elif os.environ.get("DKRIUK_REFILL_TICK") == "1":
+        # The ticker settles outside any request, so it is not used with several workers.
+        refill_scheduler.start_ticker()
+    if os.environ.get("DKRIUK_FORECAST_TICK") == "1":
+        forecaster.start_ticker()
+    return app
 
 
 if __name__ == '__main__':
-    app.run(debug=True, port=5000, host='0.0.0.0')
+    create_app().run(debug=True, port=5000, host='0.0.0.0')
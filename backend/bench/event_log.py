@@ -0,0 +1,85 @@
+"""Event log throughput and restart time.
+
+Appends sale + stock events from several threads (group-committed fsync),
+then measures how long a restart takes from the full log and from the
+latest snapshot, and checks that both rebuild the same state.
+
+Run from the backend directory:  python -m bench.event_log [--events 1000000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from storage import EventLogStorage
+
+OUTLETS = [f"outlet_{n}" for n in range(1, 51)]
+
+
+def fill(store, events, threads):
+    per_thread = events // (2 * threads)
+
+    def worker(n):
+        outlet_id = OUTLETS[n % len(OUTLETS)]
+        qty = 10 ** 6
+        for i in range(per_thread):
+            qty -= 1
+            store.save_stock(outlet_id, {1 + i % 6: qty})
+            store.add_transactions([{
+                "id": n * per_thread + i + 1, "outlet_id": outlet_id,
+                "items": [{"id": 1 + i % 6, "name": "Ayam Dada", "price": 10000, "qty": 1}],
+                "total": 10000, "date": None, "timestamp": datetime.now(), "idempotency_key": None
+            }])
+
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return per_thread * 2 * threads
+
+
+def fingerprint(store):
+    return len(store.transactions), sorted(store.stock.items())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=200000)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--no-fsync", action="store_true", help="skip fsync (measures encoding and replay only)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.log")
+        store = EventLogStorage(path, snapshot_every=10 ** 9, fsync=not args.no_fsync)
+        start = time.perf_counter()
+        written = fill(store, args.events, args.threads)
+        elapsed = time.perf_counter() - start
+        store.flush()
+        expected = fingerprint(store)
+        store.log.close()
+        size_mb = os.path.getsize(path) / 2 ** 20
+        print(f"append   {written} events in {elapsed:.2f}s ({written / elapsed:,.0f}/s), log {size_mb:.1f} MB")
+
+        start = time.perf_counter()
+        store = EventLogStorage(path, snapshot_every=10 ** 9)
+        print(f"replay   full log in {time.perf_counter() - start:.2f}s")
+        ok = fingerprint(store) == expected
+
+        store.close()  # writes a snapshot
+        start = time.perf_counter()
+        store = EventLogStorage(path, snapshot_every=10 ** 9)
+        print(f"restart  from snapshot in {time.perf_counter() - start:.2f}s")
+        ok = ok and fingerprint(store) == expected
+        store.close()
+
+    print("OK" if ok else "FAIL state differs after replay")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
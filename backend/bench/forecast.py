@@ -0,0 +1,113 @@
+"""Accuracy and cost of the demand forecast against the old velocity rule.
+
+Generates hourly sales for synthetic outlets with an opening-hours profile,
+a weekly pattern and Poisson noise, warms the model up on ``--days`` of
+history, then walks forward hour by hour for ``--test-days``. Each hour it
+compares the predicted next-24h demand of every outlet/product with what
+was actually sold, for the model and for max(24h sales, 7-day average).
+Also reports the cost of recording sales, stepping the model and serving
+demand / stock-out queries.
+
+Run from the backend directory:  python -m bench.forecast [--outlets 300]
+"""
+import argparse
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from forecast import DemandForecast
+
+
+def synthetic_sales(outlets, products, hours, start, seed=1):
+    """hours x outlets x products Poisson sales with per-outlet opening hours and weekend uplift."""
+    rng = np.random.default_rng(seed)
+    opening = rng.integers(6, 11, outlets)
+    closing = rng.integers(18, 23, outlets)
+    weekend = rng.uniform(0.8, 2.0, outlets)
+    rate = rng.gamma(2.0, 1.0, (outlets, products))
+    stamps = [start + timedelta(hours=h) for h in range(hours)]
+    hour_of_day = np.array([s.hour for s in stamps])
+    is_weekend = np.array([s.weekday() >= 5 for s in stamps])
+    open_now = (hour_of_day[:, None] >= opening) & (hour_of_day[:, None] < closing)
+    season = open_now * np.where(is_weekend[:, None], weekend, 1.0)
+    return stamps, rng.poisson(season[:, :, None] * rate[None])
+
+
+def wape(predicted, actual):
+    return float(np.abs(predicted - actual).sum() / max(actual.sum(), 1))
+
+
+def backtest(outlets=300, products=6, days=28, test_days=7, seed=1):
+    """Warm up on ``days`` of synthetic history, then walk forward hour by hour; returns errors and timings."""
+    outlet_ids = [f"outlet_{n}" for n in range(outlets)]
+    product_ids = list(range(1, products + 1))
+    warmup = days * 24
+    total = warmup + (test_days + 1) * 24
+    start = datetime(2026, 1, 5)
+    stamps, sales = synthetic_sales(outlets, products, total, start, seed)
+
+    model = DemandForecast()
+    rows = [
+        (stamps[h], outlet_ids[o], product_ids[p], int(sales[h, o, p]))
+        for h, o, p in zip(*np.nonzero(sales[:warmup]))
+    ]
+    t = time.perf_counter()
+    model.load_sales(rows, stamps[warmup])
+    warmup_s = time.perf_counter() - t
+
+    model_err, rule_err = [], []
+    record_s = refresh_s = query_s = 0.0
+    records = queries = 0
+    for h in range(warmup, warmup + test_days * 24):
+        now = stamps[h]
+        actual = sales[h:h + 24].sum(axis=0)
+        t = time.perf_counter()
+        model.refresh(now)
+        refresh_s += time.perf_counter() - t
+        t = time.perf_counter()
+        predicted = model.demand(outlet_ids, product_ids, hours=24, now=now)
+        model.stockout_hours(outlet_ids, product_ids, np.full(predicted.shape, 20), now=now)
+        query_s += time.perf_counter() - t
+        queries += 1
+        rule = np.maximum(sales[h - 24:h].sum(axis=0), sales[h - 168:h].sum(axis=0) / 7.0)
+        model_err.append(wape(predicted, actual))
+        rule_err.append(wape(rule, actual))
+
+        t = time.perf_counter()
+        for o, p in zip(*np.nonzero(sales[h])):
+            model.record_sale(now, outlet_ids[o], [(product_ids[p], int(sales[h, o, p]))], now=now)
+            records += 1
+        record_s += time.perf_counter() - t
+
+    return {
+        "forecast_wape": float(np.mean(model_err)),
+        "rule_wape": float(np.mean(rule_err)),
+        "warmup_s": warmup_s,
+        "record_us": record_s / max(records, 1) * 1e6,
+        "step_ms": refresh_s / max(queries, 1) * 1000,
+        "query_ms": query_s / max(queries, 1) * 1000
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--outlets", type=int, default=300)
+    parser.add_argument("--products", type=int, default=6)
+    parser.add_argument("--days", type=int, default=28, help="days of warm-up history")
+    parser.add_argument("--test-days", type=int, default=7)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    r = backtest(args.outlets, args.products, args.days, args.test_days, args.seed)
+    print(f"{args.outlets} outlets x {args.products} products, {args.days} days warm-up, "
+          f"{args.test_days} days walk-forward")
+    print(f"next-24h demand WAPE: forecast {r['forecast_wape']:.1%}, max(24h, 7d avg) {r['rule_wape']:.1%}")
+    print(f"warm-up {r['warmup_s'] * 1000:.0f} ms, record_sale {r['record_us']:.1f} us, "
+          f"hourly step {r['step_ms']:.2f} ms, demand+stock-out query {r['query_ms']:.2f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+"""Closed-loop HTTP load generator and server helpers used by the benchmarks.
+
+Each client thread keeps one keep-alive connection and sends the next
+request as soon as the previous answer arrived.
+"""
+import http.client
+import json
+import os
+import random
+import signal
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, int(round(pct / 100.0 * (len(sorted_values) - 1)))))
+    return sorted_values[k]
+
+
+def summarize(latencies, errors, elapsed):
+    """Throughput and latency percentiles (milliseconds) for one run."""
+    latencies = sorted(latencies)
+    count = len(latencies)
+    return {
+        "requests": count,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "rps": round(count / elapsed, 1) if elapsed > 0 else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3)
+    }
+
+
+def run_load(base_url, make_request, concurrency=8, duration=5.0, seed=1, headers=None):
+    """Drive ``make_request(rng) -> (method, path, json_body_or_None)`` against ``base_url``.
+
+    Responses with status >= 400 count as errors, except 409 (conflicts
+    are an expected answer under contention). ``headers`` are sent with
+    every request.
+    """
+    parts = urlsplit(base_url)
+    deadline = time.perf_counter() + duration
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def client(n):
+        rng = random.Random(seed + n)
+        conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+        own, failed = [], 0
+        while time.perf_counter() < deadline:
+            method, path, body = make_request(rng)
+            payload = json.dumps(body).encode() if body is not None else None
+            sent = dict(headers or {})
+            if payload is not None:
+                sent["Content-Type"] = "application/json"
+            start = time.perf_counter()
+            try:
+                conn.request(method, path, body=payload, headers=sent)
+                res = conn.getresponse()
+                res.read()
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                conn.close()
+                conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+                continue
+            own.append(time.perf_counter() - start)
+            if res.status >= 400 and res.status != 409:
+                failed += 1
+        conn.close()
+        with lock:
+            latencies.extend(own)
+            errors[0] += failed
+
+    start = time.perf_counter()
+    pool = [threading.Thread(target=client, args=(n,)) for n in range(concurrency)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return summarize(latencies, errors[0], time.perf_counter() - start)
+
+
+def wait_until_up(base_url, timeout=30.0):
+    parts = urlsplit(base_url)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=2)
+            conn.request("GET", "/api/health")
+            if conn.getresponse().status == 200:
+                return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+
+def rss_mb(pid="self"):
+    """Resident memory of a process in MB (Linux /proc), or None when unavailable."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def cpu_seconds(pid="self"):
+    """User + system CPU time of a process in seconds (Linux /proc), or None when unavailable."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+@contextmanager
+def running_server(db_path, port, threads=8, log_path=None, workers=1):
+    """Run ``serve.py`` on a SQLite database in a subprocess; stops it with SIGTERM on exit.
+
+    Yields the ``Popen`` object; raises if the server does not come up or
+    does not shut down cleanly.
+    """
+    env = dict(os.environ, DKRIUK_STORAGE="sqlite", DKRIUK_DB=db_path)
+    log_path = log_path or db_path + ".server.log"
+    with open(log_path, "wb") as log:
+        server = subprocess.Popen(
+            [sys.executable, "serve.py", "--host", "127.0.0.1", "--port", str(port), "--threads", str(threads),
+             "--workers", str(workers)],
+            cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT
+        )
+        try:
+            if not wait_until_up(f"http://127.0.0.1:{port}"):
+                raise RuntimeError("server did not start")
+            yield server
+        finally:
+            server.send_signal(signal.SIGTERM)
+            code = server.wait(timeout=30)
+    if code != 0:
+        with open(log_path) as log:
+            raise RuntimeError(f"server exited with {code}:\n{log.read()}")
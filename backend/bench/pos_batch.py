@@ -0,0 +1,98 @@
+"""Throughput of replaying offline sales one by one versus through the batch endpoint.
+
+The same synthetic backlog (dated, with idempotency keys) is sent once as
+single POSTs to /api/pos/transaksi and once in chunks to
+/api/pos/transaksi/batch, in process against the app's configured storage
+(memory unless DKRIUK_STORAGE says otherwise). Exits non-zero when the batch
+route is less than ``--min-speedup`` times faster per transaction.
+
+Run from the backend directory:  python -m bench.pos_batch [--transactions 5000] [--batch-size 1000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DKRIUK_STORAGE", "memory")
+
+import app as dkriuk  # noqa: E402
+
+
+def backlog(n, seed, prefix):
+    rng = random.Random(seed)
+    outlets = [o.id for o in dkriuk.catalog.outlets]
+    product_ids = [p.id for p in dkriuk.catalog.products]
+    start = datetime.now() - timedelta(days=1)
+    return [
+        {
+            "outlet_id": rng.choice(outlets),
+            "items": [{"id": rng.choice(product_ids), "qty": rng.randint(1, 3)} for _ in range(rng.randint(1, 3))],
+            "date": (start + timedelta(seconds=i)).isoformat(),
+            "idempotency_key": f"{prefix}-{i}"
+        }
+        for i in range(n)
+    ]
+
+
+def top_up(records):
+    wanted = {}
+    for record in records:
+        for item in record["items"]:
+            key = (record["outlet_id"], item["id"])
+            wanted[key] = wanted.get(key, 0) + item["qty"]
+    for (oid, pid), qty in wanted.items():
+        dkriuk.stock_ledger.add(oid, [(pid, qty)])
+
+
+def replay_single(client, records):
+    started = time.perf_counter()
+    for record in records:
+        res = client.post("/api/pos/transaksi", json=record)
+        assert res.status_code == 200, res.get_json()
+    return time.perf_counter() - started
+
+
+def replay_batch(client, records, batch_size):
+    started = time.perf_counter()
+    for i in range(0, len(records), batch_size):
+        res = client.post("/api/pos/transaksi/batch", json=records[i:i + batch_size])
+        body = res.get_json()
+        assert res.status_code == 200 and body["accepted"] == len(records[i:i + batch_size]), body
+    return time.perf_counter() - started
+
+
+def run(transactions=5000, batch_size=1000, seed=11):
+    client = dkriuk.app.test_client()
+    run_id = f"{os.getpid()}-{time.time_ns()}"
+    single = backlog(transactions, seed, f"single-{run_id}")
+    batched = backlog(transactions, seed, f"batch-{run_id}")
+    top_up(single + batched)
+    single_s = replay_single(client, single)
+    batch_s = replay_batch(client, batched, batch_size)
+    return {
+        "single_tps": transactions / single_s,
+        "batch_tps": transactions / batch_s,
+        "speedup": single_s / batch_s
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--transactions", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--min-speedup", type=float, default=10.0)
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args(argv)
+
+    result = run(args.transactions, args.batch_size, args.seed)
+    print(f"storage={os.environ['DKRIUK_STORAGE']} transactions={args.transactions} batch_size={args.batch_size}")
+    print(f"single route: {result['single_tps']:>10.0f} tx/s")
+    print(f"batch route:  {result['batch_tps']:>10.0f} tx/s")
+    print(f"speedup:      {result['speedup']:>10.1f}x (required {args.min_speedup:g}x)")
+    return 0 if result["speedup"] >= args.min_speedup else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
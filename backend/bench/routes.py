@@ -0,0 +1,290 @@
+"""Latency, throughput and memory benchmark for the main API routes.
+
+Seeds a temporary SQLite database with synthetic outlets, products and
+sales history, then drives /api/pos/transaksi, /api/distribusi,
+/api/dashboard, /api/laporan, /api/products and a read-heavy mix, either
+in-process through the Flask test client (--client test) or over HTTP
+against serve.py (--client http). Prints p50/p95/p99 latency, req/s,
+server CPU time per request and resident memory per route. --gzip sends
+``Accept-Encoding: gzip`` with every request.
+
+--save FILE stores the results as a baseline; --compare FILE prints the
+change against a baseline and exits with 1 when a route regressed by more
+than --tolerance (p95 latency up or throughput down).
+bench/baselines/reference.json is the committed reference, recorded with
+the command below (in-process client, one CPU core). Timings only compare
+on similar hardware, so record a local baseline before comparing elsewhere.
+
+Run from the backend directory:
+    python -m bench.routes --outlets 200 --products 30 --days 30 --compare bench/baselines/reference.json
+    python -m bench.routes --outlets 200 --products 30 --days 30 --save bench/baselines/local.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from bench.loadgen import cpu_seconds, rss_mb, run_load, running_server, summarize
+from storage import SQLiteStorage
+
+HUB_ID = "hub_pusat"
+STOCK_QTY = 10 ** 8
+
+
+# --- Synthetic data ---
+
+def seed_database(path, outlets=50, products=12, days=30, tx_per_day=200, seed=1):
+    """Write catalog, stock and ``days`` of sales history; returns ``(outlet_ids, product_ids)``."""
+    rng = random.Random(seed)
+    outlet_ids = [f"outlet_{n}" for n in range(1, outlets + 1)]
+    catalog = {
+        "outlets": [{"id": oid, "name": f"Cabang {n}"} for n, oid in enumerate(outlet_ids, 1)],
+        "products": [
+            {"id": pid, "name": f"Produk {pid}", "price": rng.choice([3000, 4000, 8000, 10000])}
+            for pid in range(1, products + 1)
+        ]
+    }
+    prices = {p["id"]: p["price"] for p in catalog["products"]}
+    product_ids = list(prices)
+
+    store = SQLiteStorage(path, batch_size=1000)
+    store.set_meta("catalog", catalog)
+    store.save_stock(HUB_ID, {pid: STOCK_QTY for pid in product_ids})
+    for oid in outlet_ids:
+        store.save_stock(oid, {pid: STOCK_QTY for pid in product_ids})
+
+    now = datetime.now()
+    start = now - timedelta(days=days)
+    total = days * tx_per_day
+    batch = []
+    for tx_id in range(1, total + 1):
+        ts = start + timedelta(seconds=(now - start).total_seconds() * tx_id / (total + 1))
+        items = [
+            {"id": pid, "name": f"Produk {pid}", "qty": rng.randint(1, 3), "price": prices[pid], "image": ""}
+            for pid in rng.sample(product_ids, rng.randint(1, min(3, len(product_ids))))
+        ]
+        batch.append({
+            "id": tx_id, "outlet_id": rng.choice(outlet_ids), "items": items,
+            "total": sum(i["qty"] * i["price"] for i in items),
+            "date": ts.isoformat(), "timestamp": ts, "idempotency_key": None
+        })
+        if len(batch) == 5000:
+            store.add_transactions(batch)
+            batch = []
+    if batch:
+        store.add_transactions(batch)
+    store.set_meta("last_updates", {oid: now.isoformat() for oid in outlet_ids})
+    store.close()
+    return outlet_ids, product_ids
+
+
+# --- Request mixes ---
+
+def route_requests(outlet_ids, product_ids):
+    """``{route: make_request(rng) -> (method, path, body)}``"""
+
+    def pos(rng):
+        items = [{"id": rng.choice(product_ids), "qty": rng.randint(1, 3)} for _ in range(rng.randint(1, 3))]
+        return "POST", "/api/pos/transaksi", {"outlet_id": rng.choice(outlet_ids), "items": items}
+
+    def distribusi(rng):
+        items = [{"id": rng.choice(product_ids), "qty": rng.randint(1, 5)} for _ in range(rng.randint(1, 2))]
+        return "POST", "/api/distribusi", {"outlet_id": rng.choice(outlet_ids), "items": items}
+
+    def dashboard(rng):
+        return "GET", "/api/dashboard", None
+
+    def laporan(rng):
+        return "GET", f"/api/laporan?limit=50&offset={rng.randrange(0, 200, 50)}", None
+
+    def products(rng):
+        return "GET", f"/api/products?outlet_id={rng.choice(outlet_ids)}", None
+
+    def mixed(rng):
+        roll = rng.random()
+        if roll < 0.2:
+            return pos(rng)
+        if roll < 0.6:
+            return products(rng)
+        if roll < 0.9:
+            return dashboard(rng)
+        return laporan(rng)
+
+    return {
+        "pos": pos, "distribusi": distribusi, "dashboard": dashboard,
+        "laporan": laporan, "products": products, "mixed": mixed
+    }
+
+
+# --- Drivers ---
+
+def run_inprocess(flask_app, make_request, concurrency=1, duration=3.0, seed=1, headers=None):
+    """Same contract as ``loadgen.run_load`` but through the Flask test client."""
+    deadline = time.perf_counter() + duration
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def client(n):
+        rng = random.Random(seed + n)
+        test_client = flask_app.test_client()
+        own, failed = [], 0
+        while time.perf_counter() < deadline:
+            method, path, body = make_request(rng)
+            start = time.perf_counter()
+            res = test_client.open(path, method=method, json=body, headers=headers)
+            own.append(time.perf_counter() - start)
+            if res.status_code >= 400 and res.status_code != 409:
+                failed += 1
+        with lock:
+            latencies.extend(own)
+            errors[0] += failed
+
+    start = time.perf_counter()
+    pool = [threading.Thread(target=client, args=(n,)) for n in range(concurrency)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return summarize(latencies, errors[0], time.perf_counter() - start)
+
+
+def cpu_per_request(result, cpu_before, cpu_after):
+    """Milliseconds of CPU per request (includes the client side when run in-process)."""
+    if cpu_before is None or cpu_after is None or not result["requests"]:
+        return None
+    return round((cpu_after - cpu_before) / result["requests"] * 1000, 4)
+
+
+def bench_test_client(db_path, requests, routes, concurrency, duration, headers=None):
+    os.environ["DKRIUK_STORAGE"] = "sqlite"
+    os.environ["DKRIUK_DB"] = db_path
+    import app as dkriuk
+
+    results = {}
+    for name in routes:
+        cpu_before = cpu_seconds()
+        result = run_inprocess(dkriuk.app, requests[name], concurrency, duration, headers=headers)
+        result["cpu_ms"] = cpu_per_request(result, cpu_before, cpu_seconds())
+        result["rss_mb"] = rss_mb()
+        results[name] = result
+    dkriuk.shutdown()
+    return results
+
+
+def bench_http(db_path, requests, routes, concurrency, duration, port, threads, headers=None):
+    results = {}
+    with running_server(db_path, port, threads) as server:
+        base_url = f"http://127.0.0.1:{port}"
+        for name in routes:
+            cpu_before = cpu_seconds(server.pid)
+            result = run_load(base_url, requests[name], concurrency, duration, headers=headers)
+            result["cpu_ms"] = cpu_per_request(result, cpu_before, cpu_seconds(server.pid))
+            result["rss_mb"] = rss_mb(server.pid)
+            results[name] = result
+    return results
+
+
+# --- Baselines ---
+
+def compare(results, baseline, tolerance):
+    """Print the change per route; returns the routes that regressed."""
+    regressions = []
+    print(f"\n{'route':>10} {'rps':>9} {'base':>9} {'change':>8} {'p95 ms':>8} {'base':>8} {'change':>8}")
+    for name, r in results.items():
+        base = baseline["results"].get(name)
+        if base is None:
+            print(f"{name:>10} (not in baseline)")
+            continue
+        rps_change = (r["rps"] - base["rps"]) / base["rps"] if base["rps"] else 0.0
+        p95_change = (r["p95_ms"] - base["p95_ms"]) / base["p95_ms"] if base["p95_ms"] else 0.0
+        flag = ""
+        if rps_change < -tolerance or p95_change > tolerance:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:>10} {r['rps']:>9.1f} {base['rps']:>9.1f} {rps_change:>+8.1%} "
+              f"{r['p95_ms']:>8.2f} {base['p95_ms']:>8.2f} {p95_change:>+8.1%}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--client", choices=["test", "http"], default="test")
+    parser.add_argument("--routes", default="pos,distribusi,dashboard,laporan,products,mixed")
+    parser.add_argument("--outlets", type=int, default=50)
+    parser.add_argument("--products", type=int, default=12)
+    parser.add_argument("--days", type=int, default=30, help="days of seeded sales history")
+    parser.add_argument("--tx-per-day", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=1, help="client threads/connections")
+    parser.add_argument("--duration", type=float, default=3.0, help="seconds per route")
+    parser.add_argument("--threads", type=int, default=8, help="server threads (--client http)")
+    parser.add_argument("--port", type=int, default=5098)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--gzip", action="store_true", help="send Accept-Encoding: gzip")
+    parser.add_argument("--save", help="write results to this baseline file")
+    parser.add_argument("--compare", help="compare against this baseline file")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed relative regression")
+    args = parser.parse_args(argv)
+
+    routes = [r for r in args.routes.split(",") if r]
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        start = time.perf_counter()
+        outlet_ids, product_ids = seed_database(
+            db_path, args.outlets, args.products, args.days, args.tx_per_day, args.seed
+        )
+        print(f"seeded {args.outlets} outlets, {args.products} products, "
+              f"{args.days * args.tx_per_day} transactions in {time.perf_counter() - start:.1f}s")
+        requests = route_requests(outlet_ids, product_ids)
+        unknown = [r for r in routes if r not in requests]
+        if unknown:
+            parser.error(f"unknown routes: {', '.join(unknown)}")
+
+        headers = {"Accept-Encoding": "gzip"} if args.gzip else None
+        if args.client == "test":
+            results = bench_test_client(db_path, requests, routes, args.concurrency, args.duration, headers)
+        else:
+            results = bench_http(
+                db_path, requests, routes, args.concurrency, args.duration, args.port, args.threads, headers
+            )
+
+    print(f"{'route':>10} {'requests':>9} {'rps':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'cpu ms':>7} {'errors':>6} {'rss MB':>7}")
+    for name, r in results.items():
+        print(f"{name:>10} {r['requests']:>9} {r['rps']:>9.1f} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} "
+              f"{r['p99_ms']:>8.2f} {r['cpu_ms'] or 0:>7.3f} {r['errors']:>6} {r['rss_mb'] or 0:>7.1f}")
+
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("save", "compare")},
+        "results": results
+    }
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"baseline saved to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get("config") != report["config"]:
+            print("warning: baseline was recorded with a different configuration")
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} route(s) regressed beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+            return 1
+        print("no regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
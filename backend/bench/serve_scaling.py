@@ -0,0 +1,74 @@
+"""Requests/sec of ``serve.py`` by worker processes and thread count on the POS and dashboard routes.
+
+For every (workers, threads) pair a fresh SQLite database is seeded with plenty of
+stock, the server is started in a subprocess and loaded over HTTP by
+bench.loadgen, then stopped with SIGTERM (which also checks the graceful
+shutdown path).
+
+Run from the backend directory:  python -m bench.serve_scaling [--threads 1,2,4,8] [--workers 1,2,4]
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+from bench.loadgen import run_load, running_server
+from storage import SQLiteStorage
+
+OUTLET_IDS = ["outlet_1", "outlet_2", "outlet_3", "outlet_4"]
+PRODUCT_IDS = [1, 2, 3, 4, 5, 6]
+
+
+def seed(path, qty=10 ** 7):
+    store = SQLiteStorage(path)
+    store.save_stock("hub_pusat", {pid: qty for pid in PRODUCT_IDS})
+    for oid in OUTLET_IDS:
+        store.save_stock(oid, {pid: qty for pid in PRODUCT_IDS})
+    store.close()
+
+
+def pos_request(rng):
+    items = [{"id": rng.choice(PRODUCT_IDS), "qty": rng.randint(1, 3)} for _ in range(rng.randint(1, 3))]
+    return "POST", "/api/pos/transaksi", {"outlet_id": rng.choice(OUTLET_IDS), "items": items}
+
+
+def dashboard_request(rng):
+    return "GET", "/api/dashboard", None
+
+
+ROUTES = {"pos": pos_request, "dashboard": dashboard_request}
+
+
+def measure(threads, port, routes, concurrency, duration, workers=1):
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "bench.db")
+        seed(db)
+        with running_server(db, port, threads, workers=workers):
+            base_url = f"http://127.0.0.1:{port}"
+            return {name: run_load(base_url, ROUTES[name], concurrency, duration) for name in routes}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", default="1,2,4,8", help="comma separated server thread counts")
+    parser.add_argument("--workers", default="1", help="comma separated server process counts")
+    parser.add_argument("--routes", default="pos,dashboard")
+    parser.add_argument("--concurrency", type=int, default=16, help="client connections")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per route")
+    parser.add_argument("--port", type=int, default=5099)
+    args = parser.parse_args(argv)
+    routes = [r for r in args.routes.split(",") if r]
+
+    print(f"cpu_count={os.cpu_count()} concurrency={args.concurrency} duration={args.duration}s")
+    print(f"{'workers':>7} {'threads':>7} {'route':>10} {'rps':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'errors':>6}")
+    for workers in (int(w) for w in args.workers.split(",")):
+        for threads in (int(t) for t in args.threads.split(",")):
+            for name, r in measure(threads, args.port, routes, args.concurrency, args.duration, workers).items():
+                print(f"{workers:>7} {threads:>7} {name:>10} {r['rps']:>9.1f} {r['p50_ms']:>8.2f} "
+                      f"{r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f} {r['errors']:>6}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
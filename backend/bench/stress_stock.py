@@ -0,0 +1,91 @@
+"""Concurrency stress check for stock mutations.
+
+Hammers /api/pos/transaksi and /api/distribusi from many threads against an
+in-memory app and verifies that no outlet or the hub ever oversells, that
+stock is conserved and that transaction ids are unique.
+
+Run from the backend directory:  python -m bench.stress_stock [--threads 16]
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+from collections import Counter
+
+os.environ.setdefault("DKRIUK_STORAGE", "memory")
+
+import app as dkriuk  # noqa: E402
+
+
+def run(threads=16, ops=300, seed=7):
+    outlets = list(dkriuk.inventory)
+    product_ids = [p.id for p in dkriuk.catalog.products]
+    start_stock = {oid: dict(stock) for oid, stock in dkriuk.inventory.items()}
+    sold = Counter()
+    received = Counter()
+    tally_lock = threading.Lock()
+
+    def worker(n):
+        rng = random.Random(seed + n)
+        client = dkriuk.app.test_client()
+        for _ in range(ops):
+            oid = rng.choice(outlets)
+            items = [{"id": rng.choice(product_ids), "qty": rng.randint(1, 4)} for _ in range(rng.randint(1, 3))]
+            if rng.random() < 0.1:
+                res = client.post("/api/distribusi", json={"outlet_id": oid, "items": items})
+                if res.status_code == 201:
+                    with tally_lock:
+                        for item in items:
+                            received[(oid, item["id"])] += item["qty"]
+            else:
+                res = client.post("/api/pos/transaksi", json={"outlet_id": oid, "items": items})
+                if res.status_code == 200:
+                    with tally_lock:
+                        for item in items:
+                            sold[(oid, item["id"])] += item["qty"]
+
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+
+    errors = []
+    for oid in outlets:
+        for pid in product_ids:
+            final = dkriuk.inventory[oid].get(pid, 0)
+            expected = start_stock[oid].get(pid, 0) + received[(oid, pid)] - sold[(oid, pid)]
+            if final < 0:
+                errors.append(f"{oid}/{pid} oversold: stock {final}")
+            if final != expected:
+                errors.append(f"{oid}/{pid} stock {final} != expected {expected}")
+    for pid, qty in dkriuk.hub_inventory.items():
+        if qty < 0:
+            errors.append(f"hub/{pid} oversold: stock {qty}")
+
+    ids = [t["id"] for t in dkriuk.storage.query_transactions()]
+    if len(ids) != len(set(ids)):
+        errors.append("duplicate transaction ids")
+
+    print(f"threads={threads} transactions={len(ids)} units_sold={sum(sold.values())} "
+          f"units_distributed={sum(received.values())}")
+    return errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--ops", type=int, default=300, help="requests per thread")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    errors = run(args.threads, args.ops, args.seed)
+    for error in errors:
+        print("FAIL", error)
+    print("OK" if not errors else f"{len(errors)} problem(s)")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
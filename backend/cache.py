@@ -0,0 +1,71 @@
+import secrets
+import threading
+
+
+class StateVersion:
+    """Counter bumped by every state mutation; cache keys are derived from it.
+
+    The counter starts at 0 in every process while the data it versions
+    survives restarts, so ``tag`` (used in ETags) adds a random per-process
+    nonce: a tag handed out before a restart never matches after it.
+    """
+
+    def __init__(self):
+        self.value = 0
+        self.nonce = secrets.token_hex(4)
+        self._lock = threading.Lock()
+
+    @property
+    def tag(self):
+        return f"{self.nonce}.{self.value}"
+
+    def bump(self):
+        with self._lock:
+            self.value += 1
+            return self.value
+
+
+class Memo:
+    """Single-entry memo: recompute only when the key changes."""
+
+    def __init__(self, compute):
+        self.compute = compute
+        self._key = None
+        self._value = None
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        if self._key == key and self._value is not None:
+            return self._value
+        with self._lock:
+            if self._key != key or self._value is None:
+                self._value = self.compute()
+                self._key = key
+            return self._value
+
+    def clear(self):
+        with self._lock:
+            self._key = None
+            self._value = None
+
+
+class VersionedCache:
+    """Latest value per name, rebuilt when the version passed with it changes.
+
+    Unlike ``Memo`` every name (e.g. one per outlet) has its own entry, so a
+    change to one outlet's stock leaves the others cached.
+    """
+
+    def __init__(self):
+        self._entries = {}
+
+    def get(self, name, version, compute):
+        entry = self._entries.get(name)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+        value = compute()
+        self._entries[name] = (version, value)
+        return value
+
+    def clear(self):
+        self._entries = {}
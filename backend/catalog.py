@@ -0,0 +1,125 @@
+import math
+import threading
+
+
+class Outlet:
+    __slots__ = ("id", "name", "extra")
+
+    def __init__(self, id, name, extra=None):
+        self.id = id
+        self.name = name
+        self.extra = extra or {}
+
+    def to_dict(self):
+        return {"id": self.id, "name": self.name, **self.extra}
+
+
+class Product:
+    __slots__ = ("id", "name", "price", "image", "extra")
+
+    def __init__(self, id, name, price, image="", extra=None):
+        self.id = id
+        self.name = name
+        self.price = price
+        self.image = image
+        self.extra = extra or {}
+
+    def to_dict(self):
+        return {"id": self.id, "name": self.name, "price": self.price, "image": self.image, **self.extra}
+
+
+def _outlet_from_dict(data):
+    if not isinstance(data, dict) or not data.get("id") or not data.get("name"):
+        raise ValueError("Setiap outlet harus memiliki id dan name")
+    extra = {k: v for k, v in data.items() if k not in ("id", "name")}
+    return Outlet(str(data["id"]), str(data["name"]), extra)
+
+
+def _product_from_dict(data):
+    if not isinstance(data, dict) or not data.get("name"):
+        raise ValueError("Setiap produk harus memiliki id, name dan price")
+    try:
+        prod_id = int(data["id"])
+        price = float(data["price"])
+    except (KeyError, TypeError, ValueError):
+        raise ValueError("Setiap produk harus memiliki id, name dan price")
+    if prod_id <= 0 or not math.isfinite(price) or price < 0:
+        raise ValueError("id produk harus > 0 dan price tidak boleh negatif")
+    if price.is_integer():
+        price = int(price)
+    extra = {k: v for k, v in data.items() if k not in ("id", "name", "price", "image")}
+    return Product(prod_id, str(data["name"]), price, data.get("image", ""), extra)
+
+
+class _Snapshot:
+    __slots__ = ("outlets", "products", "outlets_by_id", "products_by_id")
+
+    def __init__(self, outlets, products):
+        self.outlets = tuple(outlets)
+        self.products = tuple(products)
+        self.outlets_by_id = {o.id: o for o in self.outlets}
+        self.products_by_id = {p.id: p for p in self.products}
+
+
+class Catalog:
+    """Outlet and product registry with O(1) id lookups.
+
+    ``load`` swaps in a whole new snapshot at once; readers never see a
+    half-updated catalog. Array-backed models index outlets and products
+    with ``cells.IdIndex`` instead of catalog positions, which shift on
+    every reload.
+    """
+
+    def __init__(self, outlets=(), products=()):
+        self._lock = threading.Lock()
+        self._snapshot = _Snapshot((), ())
+        self.version = 0
+        self.load(outlets, products)
+
+    def load(self, outlets=None, products=None):
+        """Replace outlets and/or products from plain dicts; raises ValueError on bad input."""
+        with self._lock:
+            current = self._snapshot
+            new_outlets = current.outlets
+            new_products = current.products
+            if outlets is not None and not isinstance(outlets, list) or products is not None and not isinstance(products, list):
+                raise ValueError("outlets dan products harus berupa list")
+            if outlets is not None:
+                new_outlets = [_outlet_from_dict(o) for o in outlets]
+            if products is not None:
+                new_products = [_product_from_dict(p) for p in products]
+            snapshot = _Snapshot(new_outlets, new_products)
+            if len(snapshot.outlets_by_id) != len(snapshot.outlets):
+                raise ValueError("id outlet harus unik")
+            if len(snapshot.products_by_id) != len(snapshot.products):
+                raise ValueError("id produk harus unik")
+            self._snapshot = snapshot
+            self.version += 1
+
+    @property
+    def outlets(self):
+        return self._snapshot.outlets
+
+    @property
+    def products(self):
+        return self._snapshot.products
+
+    def outlet(self, outlet_id):
+        try:
+            return self._snapshot.outlets_by_id.get(outlet_id)
+        except TypeError:
+            # Unhashable ids from a request body (lists, objects) are simply unknown.
+            return None
+
+    def product(self, prod_id):
+        try:
+            return self._snapshot.products_by_id.get(prod_id)
+        except TypeError:
+            return None
+
+    def to_dict(self):
+        snapshot = self._snapshot
+        return {
+            "outlets": [o.to_dict() for o in snapshot.outlets],
+            "products": [p.to_dict() for p in snapshot.products]
+        }
@@ -0,0 +1,73 @@
+import numpy as np
+
+
+class IdIndex:
+    """Append-only map from ids to dense array positions.
+
+    A position never changes once handed out, so arrays indexed by it keep
+    their history across catalog reloads (a position in the catalog would
+    shift whenever outlets or products are reordered or removed).
+    """
+
+    __slots__ = ("ids", "positions")
+
+    def __init__(self, ids=()):
+        self.ids = []
+        self.positions = {}
+        for key in ids:
+            self.add(key)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def get(self, key):
+        return self.positions.get(key)
+
+    def add(self, key):
+        pos = self.positions.get(key)
+        if pos is None:
+            pos = self.positions[key] = len(self.ids)
+            self.ids.append(key)
+        return pos
+
+
+class CellGrid:
+    """Base for models kept as outlets x products arrays.
+
+    Outlets and products get an ``IdIndex`` position the first time they are
+    seen; subclasses implement ``_grow(rows, cols)`` to pad their arrays to
+    a new shape, which only ever grows (geometrically, so adding outlets one
+    by one stays amortized O(1)).
+    """
+
+    def __init__(self):
+        self.outlets = IdIndex()
+        self.products = IdIndex()
+        self.shape = (0, 0)
+
+    def _grow(self, rows, cols):
+        raise NotImplementedError
+
+    def _reserve(self, rows, cols):
+        old_rows, old_cols = self.shape
+        if rows <= old_rows and cols <= old_cols:
+            return
+        rows = max(rows, old_rows * 2 if rows > old_rows else old_rows)
+        cols = max(cols, old_cols * 2 if cols > old_cols else old_cols)
+        self._grow(rows, cols)
+        self.shape = (rows, cols)
+
+    def _outlet(self, outlet_id):
+        o = self.outlets.add(outlet_id)
+        self._reserve(o + 1, self.shape[1])
+        return o
+
+    def _product(self, prod_id):
+        p = self.products.add(prod_id)
+        self._reserve(self.shape[0], p + 1)
+        return p
+
+    def _select(self, outlet_ids, product_ids):
+        o_idx = np.fromiter((self._outlet(oid) for oid in outlet_ids), dtype=np.int64, count=len(outlet_ids))
+        p_idx = np.fromiter((self._product(pid) for pid in product_ids), dtype=np.int64, count=len(product_ids))
+        return o_idx, p_idx
@@ -0,0 +1,270 @@
+import threading
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from cells import IdIndex
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def _micros(dt):
+    return (dt - EPOCH) // MICROSECOND
+
+
+def _datetime(micros):
+    return EPOCH + timedelta(microseconds=int(micros))
+
+
+class _Column:
+    """Growable 1-D numpy array (capacity doubles, so appends are amortized O(1))."""
+
+    __slots__ = ("data", "size")
+
+    def __init__(self, dtype, capacity=1024):
+        self.data = np.zeros(capacity, dtype=dtype)
+        self.size = 0
+
+    def extend(self, values):
+        end = self.size + len(values)
+        if end > len(self.data):
+            grown = np.zeros(max(end, len(self.data) * 2), dtype=self.data.dtype)
+            grown[:self.size] = self.data[:self.size]
+            self.data = grown
+        if len(values) < 8:
+            # Item assignment beats building a temporary array for the usual one-sale append.
+            for i, value in enumerate(values, self.size):
+                self.data[i] = value
+        else:
+            self.data[self.size:end] = values
+        self.size = end
+
+    def view(self, size=None):
+        return self.data[:self.size if size is None else size]
+
+
+class TransactionColumns:
+    """Sales kept as parallel arrays instead of one dict per transaction.
+
+    Per transaction: id, timestamp (microseconds), outlet index, total and
+    the offset of its first line. Per line item: product index, label index,
+    qty and unit price, all in integer rupiah. Outlet and product ids, and
+    the distinct (name, image) labels lines were sold under, are stored once
+    in ``IdIndex`` registries, so a line keeps the name and image it was sold with
+    even after the catalog renames the product. ``record()`` rebuilds the
+    usual transaction dict on demand; sums and filters work on whole arrays.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.ids = _Column(np.int64)
+        self.ts = _Column(np.int64)
+        self.outlet = _Column(np.int32)
+        self.total = _Column(np.int64)
+        self.line_start = _Column(np.int64)
+        self.line_product = _Column(np.int32)
+        self.line_label = _Column(np.int32)
+        self.line_qty = _Column(np.int32)
+        self.line_price = _Column(np.int64)
+        self.idempotency_keys = {}
+        self.outlets = IdIndex()
+        self.products = IdIndex()
+        self.labels = IdIndex()
+
+    def __len__(self):
+        return self.ids.size
+
+    def append(self, records):
+        with self._lock:
+            n = len(self)
+            lines = self.line_product.size
+            starts, products, labels, qtys, prices = [], [], [], [], []
+            for record in records:
+                starts.append(lines)
+                for item in record["items"]:
+                    products.append(self.products.add(item["id"]))
+                    labels.append(self.labels.add((item.get("name"), item.get("image"))))
+                    qtys.append(item["qty"])
+                    prices.append(round(item["price"]))
+                    lines += 1
+            self.line_start.extend(starts)
+            self.line_product.extend(products)
+            self.line_label.extend(labels)
+            self.line_qty.extend(qtys)
+            self.line_price.extend(prices)
+            self.outlet.extend([self.outlets.add(r["outlet_id"]) for r in records])
+            self.total.extend([round(r["total"]) for r in records])
+            self.ts.extend([_micros(r["timestamp"]) for r in records])
+            # ids last: readers use len(self), so a batch only shows up once complete
+            self.ids.extend([r["id"] for r in records])
+            for i, record in enumerate(records, n):
+                if record.get("idempotency_key"):
+                    self.idempotency_keys[i] = record["idempotency_key"]
+
+    def max_id(self):
+        n = len(self)
+        return int(self.ids.data[:n].max()) if n else 0
+
+    # --- Vectorized queries ---
+
+    def select(self, outlet_id=None, start=None, end=None, cursor=None, descending=False):
+        """Row numbers of the transactions matching the filters, in id order.
+
+        ``cursor`` keeps only ids after it in the chosen direction.
+        """
+        n = len(self)
+        mask = np.ones(n, dtype=bool)
+        if outlet_id is not None:
+            idx = self.outlets.get(outlet_id)
+            if idx is None:
+                return np.zeros(0, dtype=np.int64)
+            mask &= self.outlet.view(n) == idx
+        ts = self.ts.view(n)
+        if start is not None:
+            mask &= ts >= _micros(start)
+        if end is not None:
+            mask &= ts < _micros(end)
+        ids = self.ids.view(n)
+        if cursor is not None:
+            mask &= ids < cursor if descending else ids > cursor
+        rows = np.flatnonzero(mask)
+        # Concurrent POS writes to different outlets can land slightly out of id order.
+        if len(rows) > 1 and not (np.diff(ids[rows]) > 0).all():
+            rows = rows[np.argsort(ids[rows], kind="stable")]
+        return rows[::-1] if descending else rows
+
+    def _lines_before(self, row):
+        """Number of line items that belong to the transactions before ``row``."""
+        return int(self.line_start.data[row]) if row < self.line_start.size else self.line_product.size
+
+    def _line_rows(self, n):
+        """Transaction row of every line item of the first ``n`` transactions."""
+        lines = self._lines_before(n)
+        counts = np.diff(np.append(self.line_start.view(n), lines))
+        return np.repeat(np.arange(n), counts), lines
+
+    def total_revenue(self):
+        return int(self.total.view(len(self)).sum())
+
+    def product_sales(self, start=None, resolution="hour", end=None):
+        """Sold qty per (hour or day, outlet, product) as ``(bucket_start, outlet_id, product_id, qty)``."""
+        n = len(self)
+        line_rows, lines = self._line_rows(n)
+        width = 3600 * 10 ** 6 if resolution == "hour" else 86400 * 10 ** 6
+        ts = self.ts.view(n)[line_rows]
+        keep = np.ones(len(ts), dtype=bool)
+        if start is not None:
+            keep &= ts >= _micros(start)
+        if end is not None:
+            keep &= ts < _micros(end)
+        bucket = ts[keep] // width
+        outlet = self.outlet.view(n)[line_rows][keep].astype(np.int64)
+        product = self.line_product.view(lines)[keep].astype(np.int64)
+        qty = self.line_qty.view(lines)[keep]
+        keys = np.stack([bucket, outlet, product], axis=1)
+        if not len(keys):
+            return []
+        unique, inverse = np.unique(keys, axis=0, return_inverse=True)
+        sums = np.bincount(inverse.ravel(), weights=qty, minlength=len(unique)).astype(np.int64)
+        return [
+            (_datetime(b * width), self.outlets.ids[o], self.products.ids[p], int(q))
+            for (b, o, p), q in zip(unique.tolist(), sums.tolist())
+        ]
+
+    def report_rows(self, outlet_id=None, start=None, end=None):
+        """Group transactions per (day, outlet) in first-seen order."""
+        rows = self.select(outlet_id, start, end)
+        if not len(rows):
+            return []
+        n = len(self)
+        day_width = 86400 * 10 ** 6
+        day = self.ts.view(n)[rows] // day_width
+        outlet = self.outlet.view(n)[rows].astype(np.int64)
+        keys = day * (len(self.outlets) + 1) + outlet
+        unique, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        transaksi = np.bincount(inverse, minlength=len(unique))
+        omzet = np.bincount(inverse, weights=self.total.view(n)[rows], minlength=len(unique))
+        line_rows, lines = self._line_rows(n)
+        qty_per_tx = np.bincount(line_rows, weights=self.line_qty.view(lines), minlength=n)
+        item_terjual = np.bincount(inverse, weights=qty_per_tx[rows], minlength=len(unique))
+        result = []
+        for k in np.argsort(first, kind="stable"):
+            d, o = divmod(int(unique[k]), len(self.outlets) + 1)
+            result.append({
+                "day": _datetime(d * day_width).date(), "outlet_id": self.outlets.ids[o],
+                "transaksi": int(transaksi[k]), "item_terjual": int(item_terjual[k]), "omzet": float(omzet[k])
+            })
+        return result
+
+    # --- Row views ---
+
+    def record(self, row):
+        """The transaction at ``row`` in the usual dict shape."""
+        items = []
+        for line in range(self._lines_before(row), self._lines_before(row + 1)):
+            name, image = self.labels.ids[self.line_label.data[line]]
+            items.append({
+                "id": self.products.ids[self.line_product.data[line]], "name": name,
+                "qty": int(self.line_qty.data[line]), "price": float(self.line_price.data[line]), "image": image
+            })
+        timestamp = _datetime(self.ts.data[row])
+        return {
+            "id": int(self.ids.data[row]),
+            "outlet_id": self.outlets.ids[self.outlet.data[row]],
+            "items": items,
+            "total": float(self.total.data[row]),
+            "date": timestamp.isoformat(),
+            "timestamp": timestamp,
+            "idempotency_key": self.idempotency_keys.get(row)
+        }
+
+    def records(self, rows=None):
+        for row in (range(len(self)) if rows is None else rows):
+            yield self.record(int(row))
+
+    def __iter__(self):
+        return self.records()
+
+    # --- Snapshots ---
+
+    def to_dict(self, size=None):
+        """JSON-friendly dump of the first ``size`` transactions, default all (used by event log snapshots).
+
+        Rows never change once appended, so only taking the views needs the
+        lock; the (slow) conversion to lists runs while appends continue.
+        """
+        with self._lock:
+            n = len(self) if size is None else size
+            lines = self._lines_before(n)
+            columns = {name: getattr(self, name).view(n) for name in ("ids", "ts", "outlet", "total", "line_start")}
+            for name in ("line_product", "line_label", "line_qty", "line_price"):
+                columns[name] = getattr(self, name).view(lines)
+            keys = [[row, key] for row, key in self.idempotency_keys.items() if row < n]
+            registries = {
+                "outlet_ids": list(self.outlets.ids),
+                "product_ids": list(self.products.ids),
+                "labels": [list(label) for label in self.labels.ids]
+            }
+        data = {name: column.tolist() for name, column in columns.items()}
+        data["idempotency_keys"] = keys
+        data.update(registries)
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        columns = cls()
+        for name in ("total", "line_start", "line_product", "line_qty", "line_price", "outlet", "ts", "ids"):
+            getattr(columns, name).extend(data[name])
+        columns.idempotency_keys = {row: key for row, key in data["idempotency_keys"]}
+        columns.outlets = IdIndex(data["outlet_ids"])
+        if "labels" in data:
+            columns.products = IdIndex(data["product_ids"])
+            columns.labels = IdIndex(tuple(label) for label in data["labels"])
+            columns.line_label.extend(data["line_label"])
+        else:
+            # Older snapshots kept one name and image per product.
+            columns.products = IdIndex(p["id"] for p in data["products"])
+            label_of = [columns.labels.add((p["name"], p["image"])) for p in data["products"]]
+            columns.line_label.extend([label_of[p] for p in data["line_product"]])
+        return columns
@@ -0,0 +1,136 @@
+import json
+import mmap
+import os
+import threading
+
+
+def encode_event(event):
+    return (json.dumps(event, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def _parse_lines(chunk):
+    """Decode a block of complete NDJSON lines; stops at the first corrupt one."""
+    try:
+        return json.loads(b"[" + chunk[:-1].replace(b"\n", b",") + b"]"), True
+    except ValueError:
+        events = []
+        for line in chunk[:-1].split(b"\n"):
+            try:
+                events.append(json.loads(line))
+            except ValueError:
+                return events, False
+        return events, True
+
+
+def replay(path, offset=0, chunk_size=8 << 20):
+    """Yield ``(end_offset, event)`` for every complete line after ``offset``.
+
+    The file is memory-mapped and parsed in blocks of whole lines (one
+    ``json.loads`` per block), with ``end_offset`` the end of the block.
+    A torn or corrupt line (crash in the middle of a write) ends the
+    replay; callers use the last ``end_offset`` to cut it off before
+    appending again.
+    """
+    if not os.path.exists(path) or os.path.getsize(path) <= offset:
+        return
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        pos = offset
+        size = len(mm)
+        while pos < size:
+            end = mm.rfind(b"\n", pos, min(pos + chunk_size, size))
+            if end < 0:
+                end = mm.find(b"\n", pos)
+                if end < 0:
+                    return
+            events, clean = _parse_lines(mm[pos:end + 1])
+            if not clean:
+                # Only the events before the bad line count; report where they end.
+                good = pos + sum(len(line) + 1 for line in mm[pos:end + 1].split(b"\n")[:len(events)])
+                for event in events:
+                    yield good, event
+                return
+            pos = end + 1
+            for event in events:
+                yield pos, event
+
+
+class EventLog:
+    """Append-only NDJSON log with group commit.
+
+    ``append`` only queues the encoded line and returns its sequence
+    number. A single writer thread drains everything queued so far with
+    one ``write`` and one ``fsync``, then wakes the callers blocked in
+    ``wait``; under load many appends share the same fsync.
+    """
+
+    def __init__(self, path, fsync=True):
+        self.path = path
+        self.fsync = fsync
+        self._file = open(path, "ab")
+        self.size = self._file.tell()
+        self._queue = []
+        self._seq = 0
+        self._durable = 0
+        self._error = None
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="event-log", daemon=True)
+        self._thread.start()
+
+    def append(self, event):
+        line = encode_event(event)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Event log is closed")
+            self._queue.append(line)
+            self._seq += 1
+            self.size += len(line)
+            self._cond.notify_all()
+            return self._seq
+
+    def wait(self, seq):
+        """Block until event ``seq`` is on disk."""
+        with self._cond:
+            while self._durable < seq and self._error is None:
+                self._cond.wait()
+            if self._error is not None:
+                raise self._error
+
+    def flush(self):
+        with self._cond:
+            seq = self._seq
+        self.wait(seq)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                batch, self._queue = self._queue, []
+                seq = self._seq
+            try:
+                self._file.write(b"".join(batch))
+                self._file.flush()
+                if self.fsync:
+                    os.fsync(self._file.fileno())
+            except OSError as exc:
+                with self._cond:
+                    self._error = exc
+                    self._cond.notify_all()
+                return
+            with self._cond:
+                self._durable = seq
+                self._cond.notify_all()
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        self._file.close()
@@ -0,0 +1,242 @@
+import threading
+from datetime import datetime
+
+import numpy as np
+
+from cells import CellGrid
+
+HOUR = 3600
+# Hours with no sales at all are still observations; after this long idle the level has decayed to nothing.
+MAX_CATCH_UP_HOURS = 24 * 28
+
+
+def _hour(dt):
+    return int(dt.timestamp() // HOUR)
+
+
+def _factors(totals, seen):
+    """Seasonal multipliers (mean 1 over the seen slots) from smoothed totals; unseen slots get 1."""
+    count = seen.sum(axis=1, keepdims=True)
+    mean = np.divide((totals * seen).sum(axis=1, keepdims=True), count, out=np.zeros(count.shape), where=count > 0)
+    factors = np.divide(totals, mean, out=np.ones(totals.shape), where=mean > 0)
+    return np.where(seen, factors, 1.0)
+
+
+class DemandForecast(CellGrid):
+    """Hourly demand per outlet and product from exponential smoothing.
+
+    Each (outlet, product) cell keeps a deseasonalized level in units per
+    hour; each outlet keeps smoothed sales totals per hour of day and per
+    day of week, which give multiplicative seasonal factors shared by its
+    products (single products sell too sparsely to estimate 168 slots on
+    their own). The model steps once per closed hour, so sales only add to
+    the open hour and the cost of a step is a few whole-array operations.
+    Level updates are weighted by the seasonal factor, so hours an outlet
+    is normally closed barely move it, and the level is bias-corrected
+    until enough hours have been seen.
+
+    The seasonal curve for the next ``horizon_hours`` is cached per hour;
+    ``demand()`` and ``stockout_hours()`` only scale it by the levels.
+    """
+
+    def __init__(self, alpha=0.01, gamma_hour=0.1, gamma_day=0.15, horizon_hours=24 * 7):
+        self.alpha = alpha
+        self.gamma_hour = gamma_hour
+        self.gamma_day = gamma_day
+        self.horizon_hours = horizon_hours
+        super().__init__()
+        self.level = np.zeros((0, 0))
+        self.weight = np.zeros(0)
+        self.hour_totals = np.zeros((0, 24))
+        self.hour_seen = np.zeros((0, 24), dtype=bool)
+        self.day_totals = np.zeros((0, 7))
+        self.day_seen = np.zeros((0, 7), dtype=bool)
+        self.open_qty = np.zeros((0, 0))
+        self.open_day = np.zeros(0)
+        self.open_day_hours = np.zeros(0, dtype=np.int64)
+        self.open_hour = None
+        self._curve = None
+        self._ticker = None
+        self._lock = threading.Lock()
+
+    # --- Index ---
+
+    def _grow(self, rows, cols):
+        old_rows, old_cols = self.level.shape
+        extra_rows, extra_cols = rows - old_rows, cols - old_cols
+        self.level = np.pad(self.level, ((0, extra_rows), (0, extra_cols)))
+        self.open_qty = np.pad(self.open_qty, ((0, extra_rows), (0, extra_cols)))
+        self.weight = np.pad(self.weight, (0, extra_rows))
+        self.open_day = np.pad(self.open_day, (0, extra_rows))
+        self.open_day_hours = np.pad(self.open_day_hours, (0, extra_rows))
+        self.hour_totals = np.pad(self.hour_totals, ((0, extra_rows), (0, 0)))
+        self.hour_seen = np.pad(self.hour_seen, ((0, extra_rows), (0, 0)))
+        self.day_totals = np.pad(self.day_totals, ((0, extra_rows), (0, 0)))
+        self.day_seen = np.pad(self.day_seen, ((0, extra_rows), (0, 0)))
+        self._curve = None
+
+    # --- Fitting ---
+
+    def _seasonal(self, hour_of_day, weekday):
+        """Seasonal factor per outlet for one hour."""
+        hod = _factors(self.hour_totals, self.hour_seen)[:, hour_of_day]
+        dow = _factors(self.day_totals, self.day_seen)[:, weekday]
+        return hod * dow
+
+    def _step(self):
+        """Fold the open hour into the model and open the next one."""
+        start = datetime.fromtimestamp(self.open_hour * HOUR)
+        x = self.open_qty
+        season = self._seasonal(start.hour, start.weekday())
+        gain = np.minimum(self.alpha * season * season, 0.5)
+        rate = np.divide(x, season[:, None], out=np.zeros(x.shape), where=season[:, None] > 0)
+        self.level += gain[:, None] * (rate - self.level)
+        self.weight += gain * (1 - self.weight)
+
+        # Seasonal totals start at their first observation instead of ramping up from zero.
+        sold = x.sum(axis=1)
+        h = start.hour
+        smoothed = self.hour_totals[:, h] + self.gamma_hour * (sold - self.hour_totals[:, h])
+        self.hour_totals[:, h] = np.where(self.hour_seen[:, h], smoothed, sold)
+        self.hour_seen[:, h] = True
+        self.open_day += sold
+        self.open_day_hours += 1
+        if h == 23:
+            # Only whole days count; an outlet first seen mid-day would look like a slow day.
+            d = start.weekday()
+            full = self.open_day_hours >= 24
+            smoothed = self.day_totals[:, d] + self.gamma_day * (self.open_day - self.day_totals[:, d])
+            self.day_totals[:, d] = np.where(full, np.where(self.day_seen[:, d], smoothed, self.open_day),
+                                             self.day_totals[:, d])
+            self.day_seen[:, d] |= full
+            self.open_day[:] = 0
+            self.open_day_hours[:] = 0
+
+        self.open_qty = np.zeros(self.open_qty.shape)
+        self.open_hour += 1
+        self._curve = None
+
+    def _advance(self, hour):
+        """Close every hour before ``hour``."""
+        if self.open_hour is None:
+            self.open_hour = hour
+            return
+        if hour - self.open_hour > MAX_CATCH_UP_HOURS:
+            self._step()
+            self.open_hour = hour - MAX_CATCH_UP_HOURS
+        while self.open_hour < hour:
+            self._step()
+
+    def record_sale(self, dt, outlet_id, items, now=None):
+        """Add ``(product_id, qty)`` pairs sold at ``dt``; late sales count towards the open hour."""
+        hour = min(_hour(dt), _hour(now or datetime.now()))
+        with self._lock:
+            if self.open_hour is None or hour > self.open_hour:
+                self._advance(hour)
+            for prod_id, qty in items:
+                o, p = self._outlet(outlet_id), self._product(prod_id)
+                self.open_qty[o, p] += qty
+
+    def load_sales(self, rows, now=None):
+        """Warm up from ``(hour_start, outlet_id, product_id, qty)`` rows (any order)."""
+        by_hour = {}
+        for bucket_start, outlet_id, prod_id, qty in rows:
+            by_hour.setdefault(_hour(bucket_start), []).append((outlet_id, prod_id, qty))
+        if not by_hour:
+            return
+        now_hour = _hour(now or datetime.now())
+        with self._lock:
+            for hour in sorted(by_hour):
+                hour = min(hour, now_hour)
+                if self.open_hour is None or hour > self.open_hour:
+                    self._advance(hour)
+                for outlet_id, prod_id, qty in by_hour[hour]:
+                    o, p = self._outlet(outlet_id), self._product(prod_id)
+                    self.open_qty[o, p] += qty
+            self._advance(now_hour)
+
+    def refresh(self, now=None):
+        """Close finished hours and rebuild the cached curve (called lazily, or by the ticker)."""
+        now_hour = _hour(now or datetime.now())
+        with self._lock:
+            self._advance(now_hour)
+            if self._curve is None or self._curve[0] != now_hour:
+                self._curve = (now_hour, self._build_curve(now_hour))
+            return self._curve[1]
+
+    def _build_curve(self, now_hour):
+        """Seasonal factor per outlet for each of the next ``horizon_hours`` hours."""
+        hod = _factors(self.hour_totals, self.hour_seen)
+        dow = _factors(self.day_totals, self.day_seen)
+        starts = [datetime.fromtimestamp((now_hour + k) * HOUR) for k in range(self.horizon_hours)]
+        hours = np.array([s.hour for s in starts])
+        days = np.array([s.weekday() for s in starts])
+        return hod[:, hours] * dow[:, days]
+
+    # --- Forecasts ---
+
+    def _cumulative(self, o_idx, now):
+        """Boundaries (hours from ``now``) and cumulative seasonal factors at each boundary, per outlet."""
+        curve = self.refresh(now)[o_idx]
+        remaining = 1 - (now.timestamp() % HOUR) / HOUR
+        bounds = np.concatenate(([0.0], remaining + np.arange(self.horizon_hours)))
+        widths = np.diff(bounds)
+        cumulative = np.zeros((len(o_idx), self.horizon_hours + 1))
+        np.cumsum(curve * widths, axis=1, out=cumulative[:, 1:])
+        return bounds, curve, cumulative
+
+    def _levels(self, o_idx, p_idx):
+        weight = np.maximum(self.weight[o_idx], 1e-9)
+        return self.level[np.ix_(o_idx, p_idx)] / weight[:, None]
+
+    def demand(self, outlet_ids, product_ids, hours=24, now=None):
+        """Expected units sold in the next ``hours`` hours as an outlets x products array."""
+        now = now or datetime.now()
+        hours = min(hours, self.horizon_hours - 1)
+        with self._lock:
+            o_idx, p_idx = self._select(outlet_ids, product_ids)
+        bounds, curve, cumulative = self._cumulative(o_idx, now)
+        with self._lock:
+            levels = self._levels(o_idx, p_idx)
+        k = int(np.searchsorted(bounds, hours, side="right")) - 1
+        season = cumulative[:, k] + (hours - bounds[k]) * curve[:, k]
+        return levels * season[:, None]
+
+    def stockout_hours(self, outlet_ids, product_ids, stock, now=None):
+        """Hours until the forecast demand uses up ``stock`` (outlets x products); inf beyond the horizon."""
+        now = now or datetime.now()
+        with self._lock:
+            o_idx, p_idx = self._select(outlet_ids, product_ids)
+        bounds, curve, cumulative = self._cumulative(o_idx, now)
+        with self._lock:
+            levels = self._levels(o_idx, p_idx)
+        stock = np.maximum(np.asarray(stock, dtype=np.float64), 0)
+        # Stock expressed in seasonal-factor hours: the cell runs out where the cumulative curve reaches it.
+        need = np.divide(stock, levels, out=np.full(stock.shape, np.inf), where=levels > 0)
+        k = (cumulative[:, None, 1:] < need[:, :, None]).sum(axis=2)
+        inside = k < self.horizon_hours
+        kk = np.minimum(k, self.horizon_hours - 1)
+        rows = np.arange(len(o_idx))[:, None]
+        rate = curve[rows, kk]
+        into = np.divide(need - cumulative[rows, kk], rate, out=np.zeros(stock.shape), where=rate > 0)
+        return np.where(inside, bounds[kk] + np.minimum(into, np.diff(bounds)[kk]), np.inf)
+
+    # --- Scheduling ---
+
+    def start_ticker(self, interval_seconds=300):
+        """Optionally refresh in the background so no request pays for closing hours."""
+        if self._ticker is not None:
+            return
+        stop = threading.Event()
+
+        def run():
+            while not stop.wait(interval_seconds):
+                self.refresh()
+
+        self._ticker = (threading.Thread(target=run, name="forecast", daemon=True), stop)
+        self._ticker[0].start()
+
+    def stop_ticker(self):
+        if self._ticker is not None:
+            self._ticker[1].set()
+            self._ticker = None
@@ -0,0 +1,159 @@
+import json
+import queue
+import threading
+import time
+
+
+def diff_dashboard(old, new):
+    """Return the parts of ``new`` that differ from ``old`` (None if nothing changed)."""
+    delta = {}
+    stats = {k: v for k, v in new["stats"].items() if old["stats"].get(k) != v}
+    if stats:
+        delta["stats"] = stats
+
+    old_rows = {row["id"]: row for row in old["inventory"]}
+    new_ids = set()
+    changed_rows = []
+    for row in new["inventory"]:
+        new_ids.add(row["id"])
+        if old_rows.get(row["id"]) != row:
+            changed_rows.append(row)
+    if changed_rows:
+        delta["inventory"] = changed_rows
+    removed = [oid for oid in old_rows if oid not in new_ids]
+    if removed:
+        delta["removed"] = removed
+
+    if old["requests_count"] != new["requests_count"]:
+        delta["requests_count"] = new["requests_count"]
+    return delta or None
+
+
+def format_sse(event, data, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+
+class DashboardBroadcaster:
+    """Push dashboard deltas to Server-Sent Events subscribers.
+
+    Mutating routes call ``notify()``, which only sets a flag. A single
+    publisher thread waits ``coalesce_seconds`` after the first notification
+    so a burst of writes becomes one recomputation, diffs the new dashboard
+    against the cached one and fans the delta out to every subscriber queue.
+    It also wakes every ``tick_seconds`` so time-based fields ("x min ago",
+    hub refill) stay fresh. Nothing is computed while nobody is subscribed.
+
+    Each subscriber holds a server worker thread for as long as it is
+    connected, so ``max_subscribers`` (None for no limit) should stay below
+    the size of the worker pool.
+    """
+
+    def __init__(self, compute, coalesce_seconds=0.25, tick_seconds=60, queue_size=64, max_subscribers=None):
+        self.compute = compute
+        self.coalesce_seconds = coalesce_seconds
+        self.tick_seconds = tick_seconds
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self.seq = 0
+        self.snapshot = None
+        self._dirty = threading.Event()
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._thread = None
+        self._closed = False
+
+    def notify(self):
+        self._dirty.set()
+
+    def subscribe(self):
+        """Register a subscriber; its queue starts with the cached snapshot. None when the limit is reached."""
+        q = queue.Queue(maxsize=self.queue_size)
+        with self._lock:
+            if self._closed or (self.max_subscribers is not None and len(self._subscribers) >= self.max_subscribers):
+                return None
+            if self.snapshot is None or self._thread is None:
+                self._dirty.clear()
+                self.snapshot = self.compute()
+                self.seq += 1
+            q.put(("snapshot", self.seq, self.snapshot))
+            self._subscribers.add(q)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="dashboard-publisher", daemon=True)
+                self._thread.start()
+        return q
+
+    def unsubscribe(self, q):
+        with self._lock:
+            self._subscribers.discard(q)
+
+    @staticmethod
+    def _replace_backlog(q, item):
+        while True:
+            try:
+                q.get_nowait()
+            except queue.Empty:
+                break
+        q.put_nowait(item)
+
+    def close(self):
+        """End every open stream (on shutdown, so the server does not wait on them) and refuse new ones."""
+        with self._lock:
+            self._closed = True
+            for q in self._subscribers:
+                self._replace_backlog(q, None)
+            self._subscribers.clear()
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def _run(self):
+        while True:
+            if self._dirty.wait(self.tick_seconds):
+                # Let the rest of the burst land before recomputing; the flag stays set until then.
+                time.sleep(self.coalesce_seconds)
+            self._dirty.clear()
+            with self._lock:
+                if not self._subscribers:
+                    # Idle: drop the cache so the next subscriber gets a fresh snapshot.
+                    self.snapshot = None
+                    self._thread = None
+                    return
+                self.publish()
+
+    def publish(self):
+        """Recompute once and send the delta to everyone (call with the lock held)."""
+        new = self.compute()
+        delta = diff_dashboard(self.snapshot, new)
+        self.snapshot = new
+        if delta is None:
+            return
+        self.seq += 1
+        delta["seq"] = self.seq
+        for q in list(self._subscribers):
+            try:
+                q.put_nowait(("delta", self.seq, delta))
+            except queue.Full:
+                # Slow client: replace its backlog with one full snapshot.
+                self._replace_backlog(q, ("snapshot", self.seq, new))
+
+    def stream(self, q, heartbeat_seconds=15):
+        """Generator of SSE text for a queue returned by ``subscribe()``."""
+        try:
+            while True:
+                try:
+                    item = q.get(timeout=heartbeat_seconds)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                if item is None:
+                    return
+                event, seq, data = item
+                yield format_sse(event, data, seq)
+        finally:
+            self.unsubscribe(q)
@@ -0,0 +1,138 @@
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+
+class RefillRule:
+    __slots__ = ("rate", "cap")
+
+    def __init__(self, rate, cap=None):
+        self.rate = rate
+        self.cap = cap
+
+    def to_dict(self):
+        return {"rate": self.rate, "cap": self.cap}
+
+
+class RefillScheduler:
+    """Hub auto-refill computed as a closed-form function of elapsed time.
+
+    ``stock`` holds the hub quantities as of ``anchor``. Reading the current
+    stock adds ``rate`` per full interval since the anchor (clipped at
+    ``cap``, never lowering stock that is already above it) without writing
+    anything. ``settle()`` folds the elapsed refill into ``stock``, moves
+    the anchor forward by whole intervals and reports what was added through
+    ``on_settle(entries, anchor)``; it must run before any hub mutation,
+    which ``settled()`` takes care of under the hub lock.
+    """
+
+    def __init__(self, stock, lock, anchor, interval_seconds=60, default_rate=50, rules=None, on_settle=None):
+        self.stock = stock
+        self.lock = lock
+        self.anchor = anchor
+        self.interval_seconds = interval_seconds
+        self.default_rate = default_rate
+        self.rules = dict(rules or {})
+        self.on_settle = on_settle
+        self._state_lock = threading.Lock()
+        self._ticker = None
+
+    def rule(self, prod_id):
+        return self.rules.get(prod_id) or RefillRule(self.default_rate)
+
+    def elapsed_intervals(self, now=None):
+        now = now or datetime.now()
+        return max(0, int((now - self.anchor).total_seconds() // self.interval_seconds))
+
+    @staticmethod
+    def _refilled(qty, rule, intervals):
+        if intervals <= 0 or rule.rate <= 0:
+            return qty
+        target = qty + rule.rate * intervals
+        if rule.cap is not None:
+            target = min(target, max(qty, rule.cap))
+        return target
+
+    def current(self, now=None):
+        """Hub stock as of ``now``; read-only."""
+        with self._state_lock:
+            intervals = self.elapsed_intervals(now)
+            return {pid: self._refilled(qty, self.rule(pid), intervals) for pid, qty in self.stock.items()}
+
+    def total(self, now=None):
+        return sum(self.current(now).values())
+
+    def settle(self, now=None):
+        """Materialize the refill accrued so far into ``stock``."""
+        with self.lock:
+            with self._state_lock:
+                intervals = self.elapsed_intervals(now)
+                if intervals <= 0:
+                    return []
+                entries = []
+                refill_time = self.anchor + timedelta(seconds=intervals * self.interval_seconds)
+                for pid, qty in self.stock.items():
+                    new_qty = self._refilled(qty, self.rule(pid), intervals)
+                    if new_qty != qty:
+                        self.stock[pid] = new_qty
+                        entries.append({
+                            "date": refill_time.isoformat(),
+                            "product_id": pid,
+                            "qty": new_qty - qty,
+                            "stock_after": new_qty
+                        })
+                self.anchor = refill_time
+            if self.on_settle:
+                self.on_settle(entries, self.anchor)
+            return entries
+
+    @contextmanager
+    def settled(self):
+        """Hold the hub lock with the refill settled, for mutations of hub stock."""
+        with self.lock:
+            self.settle()
+            yield
+
+    def reload(self, stock, anchor):
+        """Replace the settled stock and anchor with state another process wrote."""
+        with self.lock:
+            with self._state_lock:
+                self.stock.update(stock)
+                self.anchor = anchor
+
+    def configure(self, rules=None, interval_seconds=None, default_rate=None):
+        """Change refill settings; accrued refill is settled first so changes are not retroactive."""
+        with self.lock:
+            self.settle()
+            with self._state_lock:
+                if rules:
+                    self.rules.update(rules)
+                if interval_seconds:
+                    self.interval_seconds = interval_seconds
+                if default_rate is not None:
+                    self.default_rate = default_rate
+
+    def config(self):
+        return {
+            "interval_seconds": self.interval_seconds,
+            "default_rate": self.default_rate,
+            "rules": {str(pid): rule.to_dict() for pid, rule in self.rules.items()}
+        }
+
+    def start_ticker(self):
+        """Optionally settle in the background once per interval."""
+        if self._ticker is not None:
+            return
+        stop = threading.Event()
+
+        def run():
+            while not stop.wait(self.interval_seconds):
+                self.settle()
+
+        self._ticker = (threading.Thread(target=run, name="hub-refill", daemon=True), stop)
+        self._ticker[0].start()
+
+    def stop_ticker(self):
+        if self._ticker is not None:
+            self._ticker[1].set()
+            self._ticker = None
@@ -0,0 +1,47 @@
+import numpy as np
+
+
+def _fill_level(need, weight, stock, hub, iterations=48):
+    """Per-product coverage level L so that ``sum(clip(L * weight - stock, 0, need)) <= hub``.
+
+    Arrays are outlets x products; ``hub`` is per product. Bisection runs on
+    all products at once, so the cost is a fixed number of whole-array passes.
+    """
+    low = np.zeros(need.shape[1])
+    high = ((need + stock) / weight).max(axis=0, initial=0.0)
+    for _ in range(iterations):
+        mid = (low + high) / 2
+        filled = np.clip(mid * weight - stock, 0, need).sum(axis=0)
+        fits = filled <= hub
+        low = np.where(fits, mid, low)
+        high = np.where(fits, high, mid)
+    return low
+
+
+def plan_replenishment(stock, velocity, requested, hub, target_days=2.0, min_drop=5, velocity_floor=0.0):
+    """Quantities to send from the hub, as an outlets x products int array.
+
+    Each cell wants enough to cover ``target_days`` of its daily velocity
+    (never below ``velocity_floor``) and at least what pending requests ask
+    for. When the hub cannot cover every outlet for a product, the product
+    is shared so that outlets end up with equal days of coverage, lowest
+    coverage first. Drops smaller than ``min_drop`` are skipped.
+    """
+    stock = np.maximum(np.asarray(stock, dtype=np.float64), 0)
+    weight = np.maximum(np.asarray(velocity, dtype=np.float64), max(velocity_floor, 1e-9))
+    hub = np.maximum(np.asarray(hub, dtype=np.float64), 0)
+    if stock.size == 0:
+        return np.zeros(stock.shape, dtype=np.int64)
+
+    need = np.maximum(np.ceil(target_days * weight - stock), np.asarray(requested, dtype=np.float64))
+    need = np.maximum(need, 0)
+    need[need < min_drop] = 0
+
+    short = need.sum(axis=0) > hub
+    alloc = need.copy()
+    if short.any():
+        level = _fill_level(need[:, short], weight[:, short], stock[:, short], hub[short])
+        alloc[:, short] = np.floor(np.clip(level * weight[:, short] - stock[:, short], 0, need[:, short]))
+    alloc = alloc.astype(np.int64)
+    alloc[alloc < min_drop] = 0
+    return alloc
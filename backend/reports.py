@@ -0,0 +1,106 @@
+import bisect
+import threading
+from datetime import date
+
+
+class ReportRollup:
+    """Per-(day, outlet) sales rollups maintained as transactions commit.
+
+    Rows for days before ``frozen_until`` are closed: once a day is over its
+    rows are marked Final and handed to ``on_freeze(rows, frozen_until)`` to
+    be snapshotted, and they are never updated in place again. A late sale
+    for a closed day (e.g. an offline till syncing after midnight) publishes
+    a new Final version of that row instead.
+
+    Rows are kept in a list sorted newest day first so date-range filters
+    and pagination only touch the rows they return.
+
+    ``on_freeze`` runs under ``lock``; pass the storage lock when writers
+    hold it while recording, so the two are always taken in the same order.
+    """
+
+    def __init__(self, on_freeze=None, lock=None):
+        self.on_freeze = on_freeze
+        self.frozen_until = date.min
+        self._rows = {}
+        self._order = []
+        self._open = set()
+        self._lock = lock or threading.Lock()
+
+    @staticmethod
+    def _sort_key(day, outlet_id):
+        return (-day.toordinal(), outlet_id)
+
+    def _row(self, day, outlet_id):
+        key = (day, outlet_id)
+        row = self._rows.get(key)
+        if row is None:
+            row = self._rows[key] = {
+                "day": day, "outlet_id": outlet_id,
+                "transaksi": 0, "item_terjual": 0, "omzet": 0, "final": False
+            }
+            bisect.insort(self._order, self._sort_key(day, outlet_id))
+        return row
+
+    def load_final(self, row):
+        """Restore a saved Final snapshot (used on startup)."""
+        with self._lock:
+            target = self._row(row["day"], row["outlet_id"])
+            target.update(transaksi=row["transaksi"], item_terjual=row["item_terjual"], omzet=row["omzet"], final=True)
+
+    def load_open(self, row):
+        """Restore an open row aggregated from stored transactions (used on startup)."""
+        with self._lock:
+            self._add(row["day"], row["outlet_id"], row["transaksi"], row["item_terjual"], row["omzet"])
+
+    def _publish(self, rows):
+        if self.on_freeze:
+            self.on_freeze(rows, self.frozen_until)
+
+    def _add(self, day, outlet_id, count, qty, total):
+        row = self._row(day, outlet_id)
+        if day < self.frozen_until:
+            # Closed days are immutable: publish a new Final version instead.
+            row = dict(row, transaksi=row["transaksi"] + count, item_terjual=row["item_terjual"] + qty,
+                       omzet=row["omzet"] + total, final=True)
+            self._rows[(day, outlet_id)] = row
+            self._publish([row])
+            return
+        row["transaksi"] += count
+        row["item_terjual"] += qty
+        row["omzet"] += total
+        self._open.add((day, outlet_id))
+
+    def record(self, day, outlet_id, qty, total, today=None):
+        with self._lock:
+            self._close_days(today or date.today())
+            self._add(day, outlet_id, 1, qty, total)
+
+    def close_days(self, today=None):
+        with self._lock:
+            self._close_days(today or date.today())
+
+    def _close_days(self, today):
+        if today <= self.frozen_until:
+            return
+        self.frozen_until = today
+        closed = []
+        for key in [k for k in self._open if k[0] < today]:
+            self._open.discard(key)
+            row = self._rows[key] = dict(self._rows[key], final=True)
+            closed.append(row)
+        self._publish(closed)
+
+    def query(self, start=None, end=None, outlet_id=None, offset=0, limit=None, today=None):
+        """Return ``(rows, total_matching)`` newest day first; ``start``/``end`` are inclusive dates."""
+        with self._lock:
+            self._close_days(today or date.today())
+            lo = bisect.bisect_left(self._order, (-end.toordinal(), "")) if end else 0
+            hi = bisect.bisect_left(self._order, (-start.toordinal() + 1, "")) if start else len(self._order)
+            keys = self._order[lo:hi]
+            if outlet_id:
+                keys = [k for k in keys if k[1] == outlet_id]
+            total = len(keys)
+            stop = offset + limit if limit is not None else None
+            rows = [dict(self._rows[(date.fromordinal(-k[0]), k[1])]) for k in keys[offset:stop]]
+            return rows, total
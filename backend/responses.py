@@ -0,0 +1,75 @@
+import gzip
+import json
+import zlib
+
+try:
+    import orjson
+except ImportError:  # optional speed-up; the stdlib encoder is used without it
+    orjson = None
+
+# Bodies smaller than this are sent as they are; gzip would barely shrink them.
+GZIP_MIN_BYTES = 1024
+GZIP_LEVEL = 6
+COMPRESSIBLE = ("application/json", "application/x-ndjson", "text/csv", "text/plain")
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SORT_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+
+def encode_json(obj, default):
+    """Compact JSON as UTF-8 bytes, sorted keys like Flask's provider, non-ASCII text unescaped.
+
+    Uses orjson when it is installed. Dates, datetimes and anything else
+    the encoder does not know go through ``default``, so both paths format
+    them the same way.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=default, option=_ORJSON_OPTIONS)
+    return json.dumps(obj, default=default, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+class Payload:
+    """An encoded JSON body with a content checksum for ETags; the gzip variant is made on first use."""
+
+    __slots__ = ("body", "etag", "_gzipped")
+
+    def __init__(self, body):
+        self.body = body
+        self.etag = f"{zlib.crc32(body):08x}"
+        self._gzipped = None
+
+    def gzipped(self):
+        if self._gzipped is None:
+            self._gzipped = gzip.compress(self.body, GZIP_LEVEL, mtime=0)
+        return self._gzipped
+
+
+def accepts_gzip(request):
+    return "gzip" in request.accept_encodings
+
+
+def payload_body(payload, request):
+    """``(body, content_encoding)`` for a cached payload, gzipped when the client accepts it."""
+    if len(payload.body) >= GZIP_MIN_BYTES and accepts_gzip(request):
+        return payload.gzipped(), "gzip"
+    return payload.body, None
+
+
+def compress(response):
+    """Gzip a complete response body in place."""
+    response.set_data(gzip.compress(response.get_data(), GZIP_LEVEL))
+    response.headers["Content-Encoding"] = "gzip"
+    response.vary.add("Accept-Encoding")
+
+
+def should_compress(response, request):
+    """True for complete, not yet encoded, compressible bodies the client accepts gzip for."""
+    return (
+        response.status_code == 200
+        and not response.direct_passthrough
+        and not response.is_streamed
+        and "Content-Encoding" not in response.headers
+        and response.mimetype in COMPRESSIBLE
+        and (response.content_length or 0) >= GZIP_MIN_BYTES
+        and accepts_gzip(request)
+    )
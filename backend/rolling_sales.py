@@ -0,0 +1,61 @@
+import threading
+from datetime import datetime, timedelta
+
+
+class RollingSales:
+    """Time-bucketed sales totals kept in a fixed-size ring buffer.
+
+    Each slot holds the qty and revenue sold during one bucket (default one
+    minute). Writes are O(1) and window queries are O(buckets in window), so
+    the cost does not depend on how many transactions have been recorded.
+    """
+
+    def __init__(self, bucket_seconds=60, retention_hours=24 * 8):
+        self.bucket_seconds = bucket_seconds
+        self.size = int(retention_hours * 3600 // bucket_seconds) + 1
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _bucket(self, dt):
+        return int(dt.timestamp() // self.bucket_seconds)
+
+    def record(self, dt, qty, revenue, now=None):
+        """Add a sale that happened at ``dt`` (naive local datetime)."""
+        now_bucket = self._bucket(now or datetime.now())
+        bucket = min(self._bucket(dt), now_bucket)
+        if bucket <= now_bucket - self.size:
+            # Older than the retention window, can never be queried.
+            return
+        slot = bucket % self.size
+        with self._lock:
+            if self._stamps[slot] != bucket:
+                self._stamps[slot] = bucket
+                self._qty[slot] = 0
+                self._revenue[slot] = 0.0
+            self._qty[slot] += qty
+            self._revenue[slot] += revenue
+
+    def window(self, hours=24, now=None):
+        """Return ``(qty, revenue)`` sold during the last ``hours`` hours."""
+        now = now or datetime.now()
+        now_bucket = self._bucket(now)
+        start = max(self._bucket(now - timedelta(hours=hours)), now_bucket - self.size + 1)
+        total_qty = 0
+        total_revenue = 0.0
+        with self._lock:
+            stamps = self._stamps
+            for bucket in range(start, now_bucket + 1):
+                slot = bucket % self.size
+                if stamps[slot] == bucket:
+                    total_qty += self._qty[slot]
+                    total_revenue += self._revenue[slot]
+        return total_qty, total_revenue
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+
+    def _reset(self):
+        self._stamps = [-1] * self.size
+        self._qty = [0] * self.size
+        self._revenue = [0.0] * self.size
@@ -0,0 +1,143 @@
+"""Production server for the DKriuk backend.
+
+Runs the app on waitress with a pool of worker threads instead of the Flask
+debug server. SIGINT/SIGTERM stop accepting connections, let in-flight
+requests finish and flush pending writes before exiting.
+
+With ``--workers N`` (N > 1, SQLite only) the listening socket is bound once
+and N forked processes serve it, each with its own thread pool; they share
+state through the database (see ``app.sync_shared_state``). A worker that
+dies is replaced.
+
+Run from the backend directory:  python serve.py [--port 5000] [--threads 8] [--workers 1]
+"""
+import argparse
+import os
+import signal
+import socket
+import sys
+import time
+
+from waitress import create_server
+
+
+def serve(args, sockets=None):
+    """Run one server process until SIGINT/SIGTERM; returns the exit code."""
+    import app as dkriuk
+
+    if dkriuk.STORAGE_KIND == "memory":
+        print("warning: DKRIUK_STORAGE=memory, nothing survives a restart", file=sys.stderr)
+
+    listen = {"sockets": sockets} if sockets else {"host": args.host, "port": args.port}
+    server = create_server(
+        dkriuk.create_app(max_streams=args.max_streams), threads=args.threads,
+        connection_limit=args.connection_limit, **listen
+    )
+
+    def stop(signum, frame):
+        # Only the first signal interrupts; a second one must not break the shutdown below.
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    print(f"Serving on http://{args.host}:{args.port} with {args.threads} threads "
+          f"(storage: {dkriuk.STORAGE_KIND}, pid {os.getpid()})", flush=True)
+    try:
+        server.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        # Live streams never finish on their own; end them, then wait for running requests before flushing.
+        dkriuk.live_dashboard.close()
+        server.task_dispatcher.shutdown()
+        dkriuk.shutdown()
+        print(f"Stopped (pid {os.getpid()})", flush=True)
+    return 0
+
+
+def supervise(args):
+    """Fork ``args.workers`` servers on one listening socket and keep them running until a signal."""
+    sock = socket.create_server((args.host, args.port), backlog=args.connection_limit)
+    os.environ["DKRIUK_WORKERS"] = str(args.workers)
+    children = {}
+    stopping = []
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            code = 1
+            try:
+                code = serve(args, [sock])
+            finally:
+                os._exit(code)
+        children[pid] = time.monotonic()
+
+    def stop(signum, frame):
+        stopping.append(signum)
+        for pid in children:
+            os.kill(pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    for _ in range(args.workers):
+        spawn()
+    print(f"Supervising {args.workers} workers on http://{args.host}:{args.port}", flush=True)
+
+    status = 0
+    while children:
+        pid, code = os.wait()
+        started = children.pop(pid, None)
+        if started is None:
+            continue
+        code = os.waitstatus_to_exitcode(code)
+        if stopping:
+            status = status or code
+        elif time.monotonic() - started < 5:
+            # Dying right after start (bad configuration, broken database) would only loop.
+            print(f"worker {pid} exited with {code} during startup, stopping", file=sys.stderr, flush=True)
+            status = 1
+            stop(signal.SIGTERM, None)
+        else:
+            print(f"worker {pid} exited with {code}, starting a new one", file=sys.stderr, flush=True)
+            spawn()
+    sock.close()
+    return status
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default=os.environ.get("DKRIUK_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("DKRIUK_PORT", 5000)))
+    parser.add_argument("--threads", type=int, default=int(os.environ.get("DKRIUK_THREADS", 8)),
+                        help="worker threads handling requests (per process)")
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("DKRIUK_WORKERS", 1)),
+                        help="server processes sharing the SQLite database")
+    parser.add_argument("--connection-limit", type=int, default=1000)
+    parser.add_argument("--max-streams", type=int, default=None,
+                        help="live dashboard streams; each holds a thread (default: half the threads)")
+    args = parser.parse_args(argv)
+    if args.threads < 1:
+        parser.error("--threads must be at least 1")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.max_streams is None:
+        args.max_streams = int(os.environ.get("DKRIUK_MAX_STREAMS", args.threads // 2))
+    if args.max_streams >= args.threads:
+        parser.error("--max-streams must be below --threads, or streams can take every worker")
+
+    if args.workers == 1:
+        return serve(args)
+    if os.environ.get("DKRIUK_STORAGE", "sqlite") != "sqlite":
+        parser.error("--workers above 1 needs DKRIUK_STORAGE=sqlite, the state is shared through the database")
+    if not hasattr(os, "fork"):
+        parser.error("--workers above 1 needs a platform with fork()")
+    return supervise(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
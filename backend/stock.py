@@ -0,0 +1,196 @@
+import itertools
+import threading
+from contextlib import ExitStack, contextmanager
+
+
+class InsufficientStock(Exception):
+    def __init__(self, location, product_id, available, requested):
+        super().__init__(f"Insufficient stock for product {product_id} at {location}")
+        self.location = location
+        self.product_id = product_id
+        self.available = available
+        self.requested = requested
+
+
+class IdSequence:
+    """Thread-safe monotonic id generator."""
+
+    def __init__(self, last=0):
+        self._counter = itertools.count(last + 1)
+        self._lock = threading.Lock()
+
+    def next(self):
+        with self._lock:
+            return next(self._counter)
+
+    def reset(self, last=0):
+        with self._lock:
+            self._counter = itertools.count(last + 1)
+
+
+def _merge_qty(items):
+    """Sum ``(product_id, qty)`` pairs so repeated lines are checked together."""
+    merged = {}
+    for prod_id, qty in items:
+        merged[prod_id] = merged.get(prod_id, 0) + qty
+    return merged
+
+
+class StockLedger:
+    """All-or-nothing stock mutations with one lock per location.
+
+    Works directly on the ``inventory`` / ``hub_inventory`` dicts owned by
+    the app, so readers keep seeing plain dicts. Each outlet (and the hub)
+    has its own lock: sales at different outlets never wait on each other,
+    and transfers take both locks in a fixed order to avoid deadlocks.
+    ``on_change(location, {product_id: qty})`` is called under the lock
+    with the new quantities, so persisted values follow the same order.
+    Changes made inside ``undo_on_error()`` are put back if the block raises.
+    """
+
+    def __init__(self, inventory, hub_inventory, hub_id, on_change=None):
+        self.inventory = inventory
+        self.hub_inventory = hub_inventory
+        self.hub_id = hub_id
+        self.on_change = on_change
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        self._local = threading.local()
+
+    def lock(self, location):
+        lock = self._locks.get(location)
+        if lock is None:
+            with self._locks_guard:
+                lock = self._locks.setdefault(location, threading.RLock())
+        return lock
+
+    def stock(self, location):
+        if location == self.hub_id:
+            return self.hub_inventory
+        return self.inventory.setdefault(location, {})
+
+    @contextmanager
+    def undo_on_error(self):
+        """Restore the quantities this thread changes inside the block if it raises."""
+        journal = getattr(self._local, "journal", None)
+        outermost = journal is None
+        if outermost:
+            journal = self._local.journal = []
+        mark = len(journal)
+        try:
+            yield
+        except BaseException:
+            for location, before in reversed(journal[mark:]):
+                with self.lock(location):
+                    stock = self.stock(location)
+                    stock.update(before)
+                    self._notify(location, stock, before)
+            del journal[mark:]
+            raise
+        finally:
+            if outermost:
+                self._local.journal = None
+
+    def _remember(self, location, stock, product_ids):
+        journal = getattr(self._local, "journal", None)
+        if journal is not None:
+            journal.append((location, {pid: stock.get(pid, 0) for pid in product_ids}))
+
+    def _notify(self, location, stock, product_ids):
+        if self.on_change:
+            self.on_change(location, {pid: stock[pid] for pid in product_ids})
+
+    @staticmethod
+    def _check(location, stock, wanted):
+        for prod_id, qty in wanted.items():
+            available = stock.get(prod_id, 0)
+            if available < qty:
+                raise InsufficientStock(location, prod_id, available, qty)
+
+    def take(self, location, items):
+        """Remove ``(product_id, qty)`` pairs from a location or raise InsufficientStock."""
+        wanted = _merge_qty(items)
+        with self.lock(location):
+            stock = self.stock(location)
+            self._check(location, stock, wanted)
+            self._remember(location, stock, wanted)
+            for prod_id, qty in wanted.items():
+                stock[prod_id] = stock.get(prod_id, 0) - qty
+            self._notify(location, stock, wanted)
+            return dict(stock)
+
+    def take_each(self, location, orders):
+        """Apply independent orders in sequence under a single lock acquisition.
+
+        Each order is all-or-nothing on its own; returns ``None`` for applied
+        orders and the ``InsufficientStock`` error for rejected ones.
+        """
+        outcomes = []
+        touched = set()
+        with self.lock(location):
+            stock = self.stock(location)
+            for items in orders:
+                wanted = _merge_qty(items)
+                try:
+                    self._check(location, stock, wanted)
+                except InsufficientStock as exc:
+                    outcomes.append(exc)
+                    continue
+                self._remember(location, stock, wanted)
+                for prod_id, qty in wanted.items():
+                    stock[prod_id] = stock.get(prod_id, 0) - qty
+                touched.update(wanted)
+                outcomes.append(None)
+            if touched:
+                self._notify(location, stock, touched)
+        return outcomes
+
+    def add(self, location, items):
+        wanted = _merge_qty(items)
+        with self.lock(location):
+            stock = self.stock(location)
+            self._remember(location, stock, wanted)
+            for prod_id, qty in wanted.items():
+                stock[prod_id] = stock.get(prod_id, 0) + qty
+            self._notify(location, stock, wanted)
+            return dict(stock)
+
+    def transfer(self, source, target, items):
+        """Move stock between locations atomically; returns ``(source, target)`` snapshots."""
+        wanted = _merge_qty(items)
+        first, second = sorted((source, target))
+        with self.lock(first), self.lock(second):
+            src = self.stock(source)
+            dst = self.stock(target)
+            self._check(source, src, wanted)
+            self._remember(source, src, wanted)
+            self._remember(target, dst, wanted)
+            for prod_id, qty in wanted.items():
+                src[prod_id] = src.get(prod_id, 0) - qty
+                dst[prod_id] = dst.get(prod_id, 0) + qty
+            self._notify(source, src, wanted)
+            self._notify(target, dst, wanted)
+            return dict(src), dict(dst)
+
+    def distribute(self, source, moves):
+        """Move stock from one location to many at once; ``moves`` maps target -> ``(product_id, qty)`` pairs.
+
+        Either every move is applied or none is; returns the source snapshot.
+        """
+        wanted = {target: _merge_qty(items) for target, items in moves.items()}
+        total = _merge_qty((pid, qty) for items in wanted.values() for pid, qty in items.items())
+        with ExitStack() as stack:
+            for location in sorted({source, *wanted}):
+                stack.enter_context(self.lock(location))
+            src = self.stock(source)
+            self._check(source, src, total)
+            self._remember(source, src, total)
+            for target, items in wanted.items():
+                dst = self.stock(target)
+                self._remember(target, dst, items)
+                for prod_id, qty in items.items():
+                    src[prod_id] = src.get(prod_id, 0) - qty
+                    dst[prod_id] = dst.get(prod_id, 0) + qty
+                self._notify(target, dst, items)
+            self._notify(source, src, total)
+            return dict(src)
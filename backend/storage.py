@@ -0,0 +1,945 @@
+import gc
+import heapq
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from datetime import date, datetime
+from itertools import chain, islice
+
+from columnar import TransactionColumns
+from eventlog import EventLog, replay
+
+# Stock movements kept per location for the audit (the endpoint returns at most this many)
+MOVEMENTS_KEPT = 1000
+
+
+def _ts(dt):
+    return dt.strftime("%Y-%m-%dT%H:%M:%S")
+
+
+def _bounds(start=None, end=None):
+    """Convert optional datetime bounds into ISO strings for range filters."""
+    return (_ts(start) if start else None, _ts(end) if end else None)
+
+
+def _page(records, match, cursor=None, descending=False, limit=None):
+    """Lazily yield ``records`` (a list in id order) that ``match`` and come after ``cursor``."""
+    ordered = reversed(records) if descending else records
+    if cursor is not None:
+        after = (lambda r: r["id"] < cursor) if descending else (lambda r: r["id"] > cursor)
+        ordered = (r for r in ordered if after(r))
+    return islice((r for r in ordered if match(r)), limit)
+
+
+def _in_range(value, start, end):
+    start_ts, end_ts = _bounds(start, end)
+    return (not start_ts or value >= start_ts) and (not end_ts or value < end_ts)
+
+
+class MemoryStorage:
+    """Plain dict/list backend with columnar sales. Nothing survives a restart; used for tests."""
+
+    def __init__(self):
+        self.stock = {}
+        self.meta = {}
+        self.transactions = TransactionColumns()
+        self.distributions = []
+        self.requests = []
+        self.report_snapshots = {}
+        self.idempotency_keys = {}
+        self.refills = []
+
+    # --- State ---
+
+    def is_empty(self):
+        return not self.stock
+
+    def load_stock(self):
+        stock = {}
+        for (location, prod_id), qty in self.stock.items():
+            stock.setdefault(location, {})[prod_id] = qty
+        return stock
+
+    def save_stock(self, location, items):
+        for prod_id, qty in items.items():
+            self.stock[(location, prod_id)] = qty
+
+    def get_meta(self, key, default=None):
+        return self.meta.get(key, default)
+
+    def set_meta(self, key, value):
+        self.meta[key] = value
+
+    def atomic(self):
+        """Writes made inside the block are persisted together or not at all."""
+        return nullcontext()
+
+    # --- Logs ---
+
+    def add_transaction(self, record):
+        self.add_transactions([record])
+
+    def add_transactions(self, records):
+        self.transactions.append(records)
+        for record in records:
+            if record.get("idempotency_key"):
+                self.idempotency_keys[record["idempotency_key"]] = record["id"]
+
+    def find_transaction_ids(self, keys):
+        """Map already used idempotency keys to their transaction id."""
+        return {key: self.idempotency_keys[key] for key in keys if key in self.idempotency_keys}
+
+    def add_distribution(self, record):
+        self.distributions.append(dict(record, id=len(self.distributions) + 1))
+
+    def add_request(self, record):
+        self.requests.append(record)
+
+    def max_transaction_id(self):
+        return self.transactions.max_id()
+
+    def max_request_id(self):
+        return self.requests[-1]["id"] if self.requests else 0
+
+    def list_distributions(self, outlet_id=None, start=None, end=None, cursor=None, descending=False, limit=None):
+        """Distributions in id order, filtered by outlet and ``[start, end)``, after ``cursor``."""
+        return _page(
+            self.distributions,
+            lambda r: (not outlet_id or r["outlet_id"] == outlet_id) and _in_range(r["date"], start, end),
+            cursor, descending, limit
+        )
+
+    def count_requests(self):
+        return len(self.requests)
+
+    def list_requests(self, outlet_id=None, start=None, end=None, status=None, cursor=None, descending=False,
+                      limit=None):
+        """Stock requests in id order, filtered like ``list_distributions`` plus ``status``."""
+        return _page(
+            self.requests,
+            lambda r: (not outlet_id or r["outlet_id"] == outlet_id) and (not status or r["status"] == status)
+            and _in_range(r["date"], start, end),
+            cursor, descending, limit
+        )
+
+    def pending_requests(self):
+        return [r for r in self.requests if r["status"] == "Pending"]
+
+    def set_request_status(self, request_ids, status):
+        wanted = set(request_ids)
+        for r in self.requests:
+            if r["id"] in wanted:
+                r["status"] = status
+
+    def query_transactions(self, outlet_id=None, start=None, end=None, cursor=None, descending=False, limit=None):
+        rows = self.transactions.select(outlet_id, start, end, cursor, descending)
+        return self.transactions.records(rows[:limit])
+
+    def total_revenue(self):
+        return self.transactions.total_revenue()
+
+    def product_sales(self, start=None, resolution="hour", end=None):
+        """Sold qty per (hour or day, outlet, product) as ``(bucket_start, outlet_id, product_id, qty)``."""
+        return self.transactions.product_sales(start, resolution, end)
+
+    def report_rows(self, outlet_id=None, start=None, end=None):
+        """Group transactions per (day, outlet) in first-seen order."""
+        return self.transactions.report_rows(outlet_id, start, end)
+
+    def add_refills(self, entries):
+        self.refills.extend(entries)
+
+    def list_refills(self, limit=50):
+        return list(reversed(self.refills[-limit:]))
+
+    def save_report_snapshot(self, row):
+        self.report_snapshots[(row["day"], row["outlet_id"])] = dict(row)
+
+    def load_report_snapshots(self):
+        return [dict(row) for row in self.report_snapshots.values()]
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def _encode_transaction(record):
+    return dict(record, timestamp=record["timestamp"].isoformat())
+
+
+def _decode_transaction(record):
+    return dict(record, timestamp=datetime.fromisoformat(record["timestamp"]))
+
+
+def _events(line):
+    """The events stored in one log line (a ``batch`` line holds several)."""
+    return line["events"] if line["type"] == "batch" else (line,)
+
+
+class EventLogStorage(MemoryStorage):
+    """In-memory state backed by an append-only event log.
+
+    Every mutation is appended to ``path`` as one NDJSON event and returns
+    once it is fsynced (group commit, see ``EventLog``). Every
+    ``snapshot_every`` events a background thread writes the whole state
+    compacted to ``path + ".snapshot"`` together with the log offset it
+    covers, so a restart loads the snapshot and replays only the tail of the
+    log. The log itself is never rewritten; the latest stock movements per
+    location are indexed as events are applied (and kept in the snapshot)
+    for the audit. Writes made inside ``atomic()`` go out as one ``batch``
+    event, so a torn write drops all of them.
+    """
+
+    def __init__(self, path, snapshot_every=50000, fsync=True):
+        super().__init__()
+        self.path = path
+        self.snapshot_path = path + ".snapshot"
+        self.snapshot_every = snapshot_every
+        self._lock = threading.RLock()
+        self._since_snapshot = 0
+        self._local = threading.local()
+        self.movements = {}
+        self._movement_seq = 0
+        self._snapshot_lock = threading.Lock()
+
+        # Loading creates millions of small objects; the cyclic GC would rescan them over and over.
+        gc.disable()
+        try:
+            offset = self._load_snapshot()
+            end = offset
+            sales = []
+            for end, line in replay(path, offset):
+                for event in _events(line):
+                    # Sales go into the columnar store in bulk; no other event reads them.
+                    if event["type"] == "sale":
+                        sales.extend(event["records"])
+                        if len(sales) >= 50000:
+                            MemoryStorage.add_transactions(self, [_decode_transaction(r) for r in sales])
+                            sales = []
+                    else:
+                        self._apply(event)
+                self._since_snapshot += 1
+            MemoryStorage.add_transactions(self, [_decode_transaction(r) for r in sales])
+        finally:
+            gc.enable()
+        if os.path.exists(path) and os.path.getsize(path) > end:
+            # Drop a torn write from a crash so new events start on a clean line.
+            with open(path, "r+b") as f:
+                f.truncate(end)
+        self.log = EventLog(path, fsync=fsync)
+        self._snapshot_due = threading.Event()
+        self._stop = threading.Event()
+        self._snapshotter = threading.Thread(target=self._snapshot_loop, name="event-log-snapshot", daemon=True)
+        self._snapshotter.start()
+
+    # --- Events ---
+
+    def _record(self, kind, **fields):
+        fields["type"] = kind
+        fields["at"] = datetime.now().isoformat()
+        batch = getattr(self._local, "batch", None)
+        if batch is not None:
+            batch.append(fields)
+            return
+        with self._lock:
+            self._apply(fields)
+            seq, due = self._append(fields)
+        self.log.wait(seq)
+        if due:
+            self._snapshot_due.set()
+
+    def _append(self, event):
+        seq = self.log.append(event)
+        self._since_snapshot += 1
+        return seq, self._since_snapshot >= self.snapshot_every
+
+    @contextmanager
+    def atomic(self):
+        """Collect the writes of the block into one ``batch`` event, applied and appended when it ends.
+
+        Blocks on different threads collect in parallel; the lock is only
+        taken to apply and append the batch. If the block raises, its writes
+        are dropped.
+        """
+        events = getattr(self._local, "batch", None)
+        if events is not None:
+            mark = len(events)
+            try:
+                yield
+            except BaseException:
+                del events[mark:]
+                raise
+            return
+        events = self._local.batch = []
+        try:
+            yield
+        finally:
+            self._local.batch = None
+        if not events:
+            return
+        with self._lock:
+            for event in events:
+                self._apply(event)
+            seq, due = self._append({"type": "batch", "events": events})
+        self.log.wait(seq)
+        if due:
+            self._snapshot_due.set()
+
+    def _apply(self, event):
+        kind = event["type"]
+        if kind == "stock":
+            self._track_movements(event)
+            super().save_stock(event["location"], dict(event["items"]))
+        elif kind == "meta":
+            super().set_meta(event["key"], event["value"])
+        elif kind == "sale":
+            super().add_transactions([_decode_transaction(r) for r in event["records"]])
+        elif kind == "distribution":
+            super().add_distribution(event["record"])
+        elif kind == "request":
+            super().add_request(event["record"])
+        elif kind == "request_status":
+            super().set_request_status(event["ids"], event["status"])
+        elif kind == "refill":
+            super().add_refills(event["entries"])
+        elif kind == "report_snapshot":
+            super().save_report_snapshot(dict(event["row"], day=date.fromisoformat(event["row"]["day"])))
+
+    def save_stock(self, location, items):
+        self._record("stock", location=location, items=[[pid, qty] for pid, qty in items.items()])
+
+    def set_meta(self, key, value):
+        self._record("meta", key=key, value=value)
+
+    def add_transactions(self, records):
+        self._record("sale", records=[_encode_transaction(r) for r in records])
+
+    def add_distribution(self, record):
+        self._record("distribution", record=record)
+
+    def add_request(self, record):
+        self._record("request", record=record)
+
+    def set_request_status(self, request_ids, status):
+        self._record("request_status", ids=list(request_ids), status=status)
+
+    def add_refills(self, entries):
+        self._record("refill", entries=entries)
+
+    def save_report_snapshot(self, row):
+        self._record("report_snapshot", row=dict(row, day=row["day"].isoformat()))
+
+    def _track_movements(self, event):
+        location = event["location"]
+        moves = self.movements.get(location)
+        if moves is None:
+            moves = self.movements[location] = deque(maxlen=MOVEMENTS_KEPT)
+        for prod_id, qty in event["items"]:
+            delta = qty - self.stock.get((location, prod_id), 0)
+            if delta:
+                self._movement_seq += 1
+                moves.append((self._movement_seq, {
+                    "at": event["at"], "location": location, "product_id": prod_id, "delta": delta, "qty": qty
+                }))
+
+    def stock_movements(self, location=None, limit=100):
+        """Latest stock changes as ``{at, location, product_id, delta, qty}``, newest first.
+
+        Served from the movement index, so at most ``MOVEMENTS_KEPT`` per location.
+        """
+        with self._lock:
+            moves = self.movements.get(location, ()) if location is not None else chain(*self.movements.values())
+            return [move for _, move in heapq.nlargest(limit, moves, key=lambda m: m[0])]
+
+    # --- Snapshots ---
+
+    def _load_snapshot(self):
+        if not os.path.exists(self.snapshot_path):
+            return 0
+        with open(self.snapshot_path, "rb") as f:
+            state = json.load(f)
+        for location, prod_id, qty in state["stock"]:
+            self.stock[(location, prod_id)] = qty
+        self.meta = state["meta"]
+        if isinstance(state["transactions"], dict):
+            self.transactions = TransactionColumns.from_dict(state["transactions"])
+            ids = self.transactions.ids.view()
+            self.idempotency_keys = {key: int(ids[row]) for row, key in self.transactions.idempotency_keys.items()}
+        else:
+            # Snapshots written before the columnar store held one dict per transaction.
+            MemoryStorage.add_transactions(self, [_decode_transaction(r) for r in state["transactions"]])
+        # Distribution ids are list positions; older snapshots were written without them.
+        self.distributions = [dict(r, id=i) for i, r in enumerate(state["distributions"], 1)]
+        self.requests = state["requests"]
+        self.refills = state["refills"]
+        for row in state["report_snapshots"]:
+            MemoryStorage.save_report_snapshot(self, dict(row, day=date.fromisoformat(row["day"])))
+        # Snapshots written before the movement index have none; the audit starts from here.
+        for move in state.get("movements", []):
+            self._movement_seq += 1
+            self.movements.setdefault(move["location"], deque(maxlen=MOVEMENTS_KEPT)).append((self._movement_seq, move))
+        return state["offset"]
+
+    def _snapshot_loop(self):
+        while True:
+            self._snapshot_due.wait()
+            if self._stop.is_set():
+                return
+            self._snapshot_due.clear()
+            self.snapshot()
+
+    def snapshot(self):
+        """Write the compacted state and the log offset it covers.
+
+        Writers are held off only while the state is copied; sales are
+        append-only, so the columns are dumped up to the row count taken
+        under the lock after releasing it.
+        """
+        with self._snapshot_lock:
+            self._write_snapshot()
+
+    def _write_snapshot(self):
+        with self._lock:
+            state = {
+                "offset": self.log.size,
+                "stock": [[location, prod_id, qty] for (location, prod_id), qty in self.stock.items()],
+                "meta": dict(self.meta),
+                "distributions": list(self.distributions),
+                "requests": [dict(r) for r in self.requests],
+                "refills": list(self.refills),
+                "report_snapshots": list(self.report_snapshots.values()),
+                "movements": list(chain(*self.movements.values()))
+            }
+            sales = len(self.transactions)
+            self._since_snapshot = 0
+        # Serialize outside the lock; the copies are not touched by writers.
+        state["transactions"] = self.transactions.to_dict(sales)
+        state["report_snapshots"] = [dict(row, day=row["day"].isoformat()) for row in state["report_snapshots"]]
+        state["movements"] = [move for _, move in sorted(state["movements"], key=lambda m: m[0])]
+        # Events up to the offset must be on disk before a snapshot claims to cover them.
+        self.log.flush()
+        tmp = f"{self.snapshot_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.snapshot_path)
+
+    def flush(self):
+        self.log.flush()
+
+    def close(self):
+        if self.log.closed:
+            return
+        self._stop.set()
+        self._snapshot_due.set()
+        self._snapshotter.join()
+        self.log.flush()
+        if self._since_snapshot:
+            self.snapshot()
+        self.log.close()
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS stock (
+    location TEXT NOT NULL,
+    product_id INTEGER NOT NULL,
+    qty INTEGER NOT NULL,
+    PRIMARY KEY (location, product_id)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS transactions (
+    id INTEGER PRIMARY KEY,
+    outlet_id TEXT NOT NULL,
+    date TEXT,
+    ts TEXT NOT NULL,
+    total REAL NOT NULL,
+    item_qty INTEGER NOT NULL,
+    items TEXT NOT NULL,
+    idempotency_key TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_transactions_outlet_ts ON transactions (outlet_id, ts);
+CREATE INDEX IF NOT EXISTS idx_transactions_ts ON transactions (ts);
+CREATE TABLE IF NOT EXISTS distributions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    outlet_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    ts TEXT NOT NULL,
+    outlet TEXT,
+    items_count INTEGER NOT NULL,
+    total_qty INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_distributions_outlet_ts ON distributions (outlet_id, ts);
+CREATE TABLE IF NOT EXISTS requests (
+    id INTEGER PRIMARY KEY,
+    outlet_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    items TEXT NOT NULL,
+    note TEXT,
+    status TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_requests_outlet_date ON requests (outlet_id, date);
+CREATE INDEX IF NOT EXISTS idx_requests_status ON requests (status, id);
+CREATE TABLE IF NOT EXISTS refill_log (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    date TEXT NOT NULL,
+    product_id INTEGER NOT NULL,
+    qty INTEGER NOT NULL,
+    stock_after INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS report_snapshots (
+    day TEXT NOT NULL,
+    outlet_id TEXT NOT NULL,
+    transaksi INTEGER NOT NULL,
+    item_terjual INTEGER NOT NULL,
+    omzet REAL NOT NULL,
+    PRIMARY KEY (day, outlet_id)
+);
+"""
+
+
+class SQLiteStorage:
+    """SQLite backend in WAL mode with batched commits.
+
+    Writes accumulate in an open transaction and are committed once
+    ``batch_size`` writes are pending or ``commit_interval`` seconds have
+    passed since the last commit; a background thread commits a lone write
+    after at most ``commit_interval``. ``flush()`` forces a commit. No
+    commit happens inside an ``atomic()`` block, so its writes land together,
+    and a savepoint drops them if the block raises. The connection lock is
+    taken at the first write of a block and held until the block ends, so
+    blocks on other threads only wait while one is writing.
+
+    With ``shared=True`` several processes use the same database: every
+    write outside ``atomic()`` commits at once, and ``atomic()`` opens the
+    transaction with ``BEGIN IMMEDIATE``, so it holds the database write
+    lock against the other processes until it ends.
+    """
+
+    def __init__(self, path, batch_size=50, commit_interval=1.0, shared=False):
+        self.path = path
+        self.shared = shared
+        self.batch_size = 1 if shared else batch_size
+        self.commit_interval = commit_interval
+        self._lock = threading.RLock()
+        self._pending = 0
+        self._local = threading.local()
+        self._last_commit = time.monotonic()
+        # Other processes may hold the write lock for a whole request; wait for it rather than fail.
+        self.conn = sqlite3.connect(path, timeout=30 if shared else 5, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._migrate()
+        self.conn.executescript(SCHEMA)
+        self.conn.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_transactions_idempotency ON transactions (idempotency_key) "
+            "WHERE idempotency_key IS NOT NULL"
+        )
+        self.conn.commit()
+        self._stop = threading.Event()
+        self._committer = threading.Thread(target=self._commit_loop, name="sqlite-commit", daemon=True)
+        self._committer.start()
+
+    def _migrate(self):
+        """Bring databases created by older versions up to the current schema."""
+        columns = {row["name"] for row in self.conn.execute("PRAGMA table_info(transactions)")}
+        if columns and "idempotency_key" not in columns:
+            self.conn.execute("ALTER TABLE transactions ADD COLUMN idempotency_key TEXT")
+
+    def _write(self, sql, params=()):
+        with self._lock:
+            self._open_blocks()
+            cur = self.conn.execute(sql, params)
+            self._pending += 1
+            self._maybe_commit()
+            return cur
+
+    def _write_many(self, sql, rows):
+        with self._lock:
+            self._open_blocks()
+            self.conn.executemany(sql, rows)
+            self._pending += 1
+            self._maybe_commit()
+
+    def _maybe_commit(self):
+        if self._blocks():
+            return
+        if self._pending >= self.batch_size or time.monotonic() - self._last_commit >= self.commit_interval:
+            self._commit()
+
+    def _commit_loop(self):
+        # Holding the lock means no atomic() block is open, so pending writes are whole.
+        while not self._stop.wait(self.commit_interval):
+            with self._lock:
+                if self.conn is not None and self._pending:
+                    self._commit()
+
+    def _blocks(self):
+        """This thread's open ``atomic()`` blocks: the pending count at each savepoint, None until opened."""
+        blocks = getattr(self._local, "blocks", None)
+        if blocks is None:
+            blocks = self._local.blocks = []
+        return blocks
+
+    def _open_blocks(self):
+        """Give this thread's open blocks their savepoints; opening the outermost takes the lock."""
+        blocks = self._blocks()
+        if not blocks or blocks[-1] is not None:
+            return
+        if blocks[0] is None:
+            self._lock.acquire()
+            if self.shared:
+                if self.conn.in_transaction:
+                    self._commit()
+                self.conn.execute("BEGIN IMMEDIATE")
+            elif not self.conn.in_transaction:
+                # Without it the savepoint would open (and its release commit) a transaction of its own.
+                self.conn.execute("BEGIN")
+        for depth, pending in enumerate(blocks):
+            if pending is None:
+                self.conn.execute(f"SAVEPOINT atomic_{depth}")
+                blocks[depth] = self._pending
+
+    @contextmanager
+    def atomic(self):
+        """Hold commits (and other writers) until the block ends; roll its writes back if it raises.
+
+        The lock is taken at the first write of the block, or at once when
+        shared so the block sees the latest data of the other processes.
+        """
+        blocks = self._blocks()
+        depth = len(blocks)
+        blocks.append(None)
+        if self.shared:
+            self._open_blocks()
+        try:
+            yield
+        except BaseException:
+            if blocks[depth] is not None:
+                self.conn.execute(f"ROLLBACK TO atomic_{depth}")
+                self._pending = blocks[depth]
+            raise
+        finally:
+            if blocks.pop() is not None:
+                self.conn.execute(f"RELEASE atomic_{depth}")
+                if not depth:
+                    try:
+                        if self.shared or not self._pending:
+                            self._commit()
+                        else:
+                            self._maybe_commit()
+                    finally:
+                        self._lock.release()
+
+    def locked(self):
+        """Keep writers of this process out of the block (other processes are not affected)."""
+        return self._lock
+
+    def data_version(self):
+        """Changes whenever another connection, e.g. another worker process, commits."""
+        return self._read("PRAGMA data_version")[0][0]
+
+    def _commit(self):
+        self.conn.commit()
+        self._pending = 0
+        self._last_commit = time.monotonic()
+
+    def _read(self, sql, params=()):
+        with self._lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    # --- State ---
+
+    def is_empty(self):
+        return not self._read("SELECT 1 FROM stock LIMIT 1")
+
+    def load_stock(self):
+        stock = {}
+        for row in self._read("SELECT location, product_id, qty FROM stock"):
+            stock.setdefault(row["location"], {})[row["product_id"]] = row["qty"]
+        return stock
+
+    def save_stock(self, location, items):
+        self._write_many(
+            "INSERT INTO stock (location, product_id, qty) VALUES (?, ?, ?) "
+            "ON CONFLICT(location, product_id) DO UPDATE SET qty = excluded.qty",
+            [(location, prod_id, qty) for prod_id, qty in items.items()]
+        )
+
+    def get_meta(self, key, default=None):
+        rows = self._read("SELECT value FROM meta WHERE key = ?", (key,))
+        return json.loads(rows[0]["value"]) if rows else default
+
+    def set_meta(self, key, value):
+        self._write(
+            "INSERT INTO meta (key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, json.dumps(value))
+        )
+
+    # --- Logs ---
+
+    def add_transaction(self, record):
+        self.add_transactions([record])
+
+    def add_transactions(self, records):
+        self._write_many(
+            "INSERT INTO transactions (id, outlet_id, date, ts, total, item_qty, items, idempotency_key) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    record["id"], record["outlet_id"], str(record["date"]), _ts(record["timestamp"]),
+                    record["total"], sum(item["qty"] for item in record["items"]), json.dumps(record["items"]),
+                    record.get("idempotency_key")
+                )
+                for record in records
+            ]
+        )
+
+    def find_transaction_ids(self, keys):
+        """Map already used idempotency keys to their transaction id."""
+        keys = list(keys)
+        found = {}
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            placeholders = ", ".join("?" * len(chunk))
+            for row in self._read(
+                f"SELECT idempotency_key, id FROM transactions WHERE idempotency_key IN ({placeholders})", chunk
+            ):
+                found[row["idempotency_key"]] = row["id"]
+        return found
+
+    def add_distribution(self, record):
+        self._write(
+            "INSERT INTO distributions (outlet_id, date, ts, outlet, items_count, total_qty) VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                record["outlet_id"], record["date"], _ts(datetime.fromisoformat(record["date"])),
+                record["outlet"], record["items_count"], record["total_qty"]
+            )
+        )
+
+    def add_request(self, record):
+        self._write(
+            "INSERT INTO requests (id, outlet_id, date, items, note, status) VALUES (?, ?, ?, ?, ?, ?)",
+            (record["id"], record["outlet_id"], record["date"], json.dumps(record["items"]), record["note"], record["status"])
+        )
+
+    def max_transaction_id(self):
+        return self._read("SELECT COALESCE(MAX(id), 0) AS max_id FROM transactions")[0]["max_id"]
+
+    def _scan(self, table, clauses, params, cursor=None, descending=False, limit=None, chunk=500):
+        """Rows of ``table`` in id order, read in keyset chunks.
+
+        Each chunk is a short query of its own, so a long export holds neither
+        the whole result in memory nor the connection lock between chunks.
+        """
+        op, order = ("<", "DESC") if descending else (">", "ASC")
+        while limit is None or limit > 0:
+            size = chunk if limit is None else min(chunk, limit)
+            where = list(clauses)
+            args = list(params)
+            if cursor is not None:
+                where.append(f"id {op} ?")
+                args.append(cursor)
+            sql = f"SELECT * FROM {table}" + (" WHERE " + " AND ".join(where) if where else "")
+            rows = self._read(f"{sql} ORDER BY id {order} LIMIT ?", args + [size])
+            yield from rows
+            if len(rows) < size:
+                return
+            cursor = rows[-1]["id"]
+            if limit is not None:
+                limit -= len(rows)
+
+    def list_distributions(self, outlet_id=None, start=None, end=None, cursor=None, descending=False, limit=None):
+        """Distributions in id order, filtered by outlet and ``[start, end)``, after ``cursor``."""
+        clauses, params = self._filters(outlet_id, start, end)
+        for row in self._scan("distributions", clauses, params, cursor, descending, limit):
+            yield {
+                "id": row["id"],
+                "date": row["date"],
+                "outlet_id": row["outlet_id"],
+                "outlet": row["outlet"],
+                "items_count": row["items_count"],
+                "total_qty": row["total_qty"]
+            }
+
+    def count_requests(self):
+        return self._read("SELECT COUNT(*) AS n FROM requests")[0]["n"]
+
+    def max_request_id(self):
+        return self._read("SELECT COALESCE(MAX(id), 0) AS max_id FROM requests")[0]["max_id"]
+
+    @staticmethod
+    def _request(row):
+        return {
+            "id": row["id"],
+            "date": row["date"],
+            "outlet_id": row["outlet_id"],
+            "items": json.loads(row["items"]),
+            "note": row["note"],
+            "status": row["status"]
+        }
+
+    def list_requests(self, outlet_id=None, start=None, end=None, status=None, cursor=None, descending=False,
+                      limit=None):
+        """Stock requests in id order, filtered like ``list_distributions`` plus ``status``."""
+        clauses, params = self._filters(outlet_id, start, end, column="date")
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        for row in self._scan("requests", clauses, params, cursor, descending, limit):
+            yield self._request(row)
+
+    def pending_requests(self):
+        return [self._request(row) for row in self._read("SELECT * FROM requests WHERE status = 'Pending' ORDER BY id")]
+
+    def set_request_status(self, request_ids, status):
+        self._write_many("UPDATE requests SET status = ? WHERE id = ?", [(status, rid) for rid in request_ids])
+
+    @staticmethod
+    def _filters(outlet_id, start, end, column="ts"):
+        clauses, params = [], []
+        if outlet_id:
+            clauses.append("outlet_id = ?")
+            params.append(outlet_id)
+        start_ts, end_ts = _bounds(start, end)
+        if start_ts:
+            clauses.append(f"{column} >= ?")
+            params.append(start_ts)
+        if end_ts:
+            clauses.append(f"{column} < ?")
+            params.append(end_ts)
+        return clauses, params
+
+    @classmethod
+    def _range_clause(cls, outlet_id, start, end):
+        clauses, params = cls._filters(outlet_id, start, end)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def query_transactions(self, outlet_id=None, start=None, end=None, cursor=None, descending=False, limit=None):
+        clauses, params = self._filters(outlet_id, start, end)
+        for row in self._scan("transactions", clauses, params, cursor, descending, limit):
+            yield {
+                "id": row["id"],
+                "outlet_id": row["outlet_id"],
+                "items": json.loads(row["items"]),
+                "total": row["total"],
+                "date": row["date"],
+                "timestamp": datetime.fromisoformat(row["ts"])
+            }
+
+    def total_revenue(self):
+        return self._read("SELECT COALESCE(SUM(total), 0) AS total FROM transactions")[0]["total"]
+
+    def product_sales(self, start=None, resolution="hour", end=None):
+        """Sold qty per (hour or day, outlet, product) as ``(bucket_start, outlet_id, product_id, qty)``."""
+        where, params = self._range_clause(None, start, end)
+        width = 13 if resolution == "hour" else 10
+        rows = self._read(
+            f"SELECT substr(ts, 1, {width}) AS bucket, outlet_id, json_extract(item.value, '$.id') AS product_id, "
+            "SUM(json_extract(item.value, '$.qty')) AS qty "
+            f"FROM transactions, json_each(transactions.items) AS item{where} "
+            "GROUP BY bucket, outlet_id, product_id",
+            params
+        )
+        # Few distinct buckets, many rows: parse each bucket once.
+        suffix = ":00" if resolution == "hour" else ""
+        buckets = {}
+        result = []
+        for row in rows:
+            bucket = buckets.get(row["bucket"])
+            if bucket is None:
+                bucket = buckets[row["bucket"]] = datetime.fromisoformat(row["bucket"] + suffix)
+            result.append((bucket, row["outlet_id"], row["product_id"], row["qty"]))
+        return result
+
+    def report_rows(self, outlet_id=None, start=None, end=None):
+        """Group transactions per (day, outlet) in first-seen order."""
+        where, params = self._range_clause(outlet_id, start, end)
+        rows = self._read(
+            "SELECT substr(ts, 1, 10) AS day, outlet_id, COUNT(*) AS transaksi, "
+            "SUM(item_qty) AS item_terjual, SUM(total) AS omzet "
+            f"FROM transactions{where} GROUP BY day, outlet_id ORDER BY MIN(id)",
+            params
+        )
+        return [
+            {
+                "day": date.fromisoformat(row["day"]),
+                "outlet_id": row["outlet_id"],
+                "transaksi": row["transaksi"],
+                "item_terjual": row["item_terjual"],
+                "omzet": row["omzet"]
+            }
+            for row in rows
+        ]
+
+    def add_refills(self, entries):
+        self._write_many(
+            "INSERT INTO refill_log (date, product_id, qty, stock_after) VALUES (?, ?, ?, ?)",
+            [(e["date"], e["product_id"], e["qty"], e["stock_after"]) for e in entries]
+        )
+
+    def list_refills(self, limit=50):
+        """Most recent refill log entries first."""
+        return [
+            {"date": row["date"], "product_id": row["product_id"], "qty": row["qty"], "stock_after": row["stock_after"]}
+            for row in self._read("SELECT * FROM refill_log ORDER BY id DESC LIMIT ?", (limit,))
+        ]
+
+    def save_report_snapshot(self, row):
+        self._write(
+            "INSERT INTO report_snapshots (day, outlet_id, transaksi, item_terjual, omzet) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(day, outlet_id) DO UPDATE SET transaksi = excluded.transaksi, "
+            "item_terjual = excluded.item_terjual, omzet = excluded.omzet",
+            (row["day"].isoformat(), row["outlet_id"], row["transaksi"], row["item_terjual"], row["omzet"])
+        )
+
+    def load_report_snapshots(self):
+        return [
+            {
+                "day": date.fromisoformat(row["day"]),
+                "outlet_id": row["outlet_id"],
+                "transaksi": row["transaksi"],
+                "item_terjual": row["item_terjual"],
+                "omzet": row["omzet"]
+            }
+            for row in self._read("SELECT * FROM report_snapshots")
+        ]
+
+    def flush(self):
+        with self._lock:
+            # Inside atomic() the commit is left to the end of the block.
+            if self._pending and not self._blocks():
+                self._commit()
+
+    def close(self):
+        self._stop.set()
+        with self._lock:
+            if self.conn is None:
+                return
+            self._commit()
+            self.conn.close()
+            self.conn = None
+
+
+def create_storage(kind="sqlite", path="dkriuk.db", shared=False):
+    """``shared`` (several worker processes on one database) is only supported by SQLite."""
+    if shared and kind != "sqlite":
+        raise ValueError(f"Storage backend {kind} cannot be shared between processes, use sqlite")
+    if kind == "memory":
+        return MemoryStorage()
+    if kind == "sqlite":
+        return SQLiteStorage(path, shared=shared)
+    if kind == "log":
+        return EventLogStorage(path)
+    raise ValueError(f"Unknown storage backend: {kind}")
@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+# Modules live next to app.py and import each other by plain name.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# The app builds its storage at import time; keep it in process.
+os.environ.setdefault("DKRIUK_STORAGE", "memory")
+
+
+@pytest.fixture(params=["memory", "sqlite", "log"])
+def backend(request, tmp_path):
+    """A fresh store of each backend kind."""
+    from sample_data import open_storage
+
+    storage = open_storage(request.param, tmp_path)
+    yield storage
+    storage.close()
@@ -0,0 +1,77 @@
+"""Synthetic sales, distributions and requests shared by the storage tests."""
+import random
+from datetime import datetime, timedelta
+
+from storage import EventLogStorage, MemoryStorage, SQLiteStorage
+
+START = datetime(2026, 3, 1, 6, 0)
+OUTLETS = ["outlet_1", "outlet_2", "outlet_3"]
+PRODUCTS = {pid: f"Produk {pid}" for pid in range(1, 7)}
+
+
+def open_storage(kind, path):
+    if kind == "memory":
+        return MemoryStorage()
+    if kind == "sqlite":
+        return SQLiteStorage(str(path / "dkriuk.db"))
+    return EventLogStorage(str(path / "dkriuk.log"), fsync=False)
+
+
+def make_sales(n, seed=1, first_id=1):
+    rng = random.Random(seed)
+    records = []
+    for i in range(first_id, first_id + n):
+        ts = START + timedelta(seconds=rng.randrange(10 * 86400), microseconds=rng.randrange(10 ** 6))
+        items = [
+            {"id": pid, "name": PRODUCTS[pid], "qty": rng.randint(1, 5), "price": float(rng.choice([3000, 8000, 10000])),
+             "image": ""}
+            for pid in rng.sample(sorted(PRODUCTS), rng.randint(1, 3))
+        ]
+        records.append({
+            "id": i, "outlet_id": rng.choice(OUTLETS), "items": items,
+            "total": sum(item["qty"] * item["price"] for item in items),
+            "date": ts.isoformat(), "timestamp": ts, "idempotency_key": f"k{i}" if i % 7 == 0 else None
+        })
+    return records
+
+
+def fill(storage, seed=3):
+    rng = random.Random(seed)
+    for records in (make_sales(150, seed)[i:i + 40] for i in range(0, 150, 40)):
+        storage.add_transactions(records)
+    for i in range(1, 61):
+        day = START + timedelta(hours=rng.randrange(240), microseconds=rng.randrange(10 ** 6))
+        outlet_id = rng.choice(OUTLETS)
+        storage.add_distribution({
+            "date": day.isoformat(), "outlet_id": outlet_id, "outlet": outlet_id.title(),
+            "items_count": rng.randint(1, 4), "total_qty": rng.randint(1, 50)
+        })
+        storage.add_request({
+            "id": i, "outlet_id": outlet_id, "date": day.isoformat(), "items": [{"id": 1, "qty": i}],
+            "note": "", "status": "Pending"
+        })
+    storage.set_request_status(range(1, 61, 3), "Dikirim")
+    storage.flush()
+
+
+LISTING_FILTERS = [
+    {},
+    {"outlet_id": "outlet_2"},
+    {"start": START + timedelta(days=2), "end": START + timedelta(days=5)},
+    {"outlet_id": "outlet_1", "start": START + timedelta(days=3)},
+    {"cursor": 20, "limit": 15},
+    {"cursor": 40, "descending": True, "limit": 7},
+    {"descending": True, "outlet_id": "outlet_3", "end": START + timedelta(days=6)},
+]
+
+
+def listings(storage):
+    result = []
+    for f in LISTING_FILTERS:
+        result.append(("transaksi", [
+            {k: t[k] for k in ("id", "outlet_id", "items", "total", "date")} for t in storage.query_transactions(**f)
+        ]))
+        result.append(("distribusi", list(storage.list_distributions(**f))))
+        result.append(("requests", list(storage.list_requests(**f))))
+        result.append(("requests Dikirim", list(storage.list_requests(status="Dikirim", **f))))
+    return result
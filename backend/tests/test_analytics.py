@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from analytics import StockAnalytics, waste_risk
+
+
+def test_waste_risk_follows_the_coverage_curve():
+    assert waste_risk(np.array([0.5, 1.5, 3.0, 7.0, 30.0])).tolist() == [5.0, 5.0, 23.0, 51.0, 76.0]
+
+
+def test_coverage_and_overstock_per_outlet_and_product():
+    analytics = StockAnalytics()
+    analytics.set_stock("outlet_1", {1: 100, 2: 100})
+    analytics.set_stock("outlet_2", {1: 10, 2: 0})
+    velocity = np.array([[10.0, 40.0], [20.0, 30.0]])
+    result = analytics.analyze(["outlet_1", "outlet_2"], [1, 2], velocity=velocity, outlet_capacity=180,
+                               velocity_floor=0)
+
+    assert result["outlets"]["stock"].tolist() == [200, 10]
+    assert result["outlets"]["coverage_days"].tolist() == pytest.approx([4.0, 0.2])
+    assert result["outlets"]["overstock"].tolist() == [20, 0]
+    assert result["products"]["coverage_days"].tolist() == pytest.approx([110 / 30, 100 / 70])
+    # Overstock counts toward the outlet risk when it is larger than the coverage risk.
+    assert result["outlets"]["waste_risk"][0] == pytest.approx(float(waste_risk(4.0)))
+    assert result["waste"]["pcs"] == 20
+
+
+def test_velocity_floor_keeps_idle_outlets_finite():
+    analytics = StockAnalytics()
+    analytics.set_stock("outlet_1", {1: 50})
+    result = analytics.analyze(["outlet_1"], [1], velocity=np.zeros((1, 1)), velocity_floor=80)
+    assert result["outlets"]["coverage_days"].tolist() == [50 / 80]
+    assert result["waste"]["percent"] == 5.0
+
+
+def test_analysis_endpoint_matches_the_dashboard_figures():
+    import app
+
+    client = app.app.test_client()
+    analysis = client.get("/api/analytics/stock").get_json()
+    dashboard = client.get("/api/dashboard").get_json()
+    assert dashboard["stats"]["potensi_waste"] == f"{analysis['waste']['percent']}%"
+    assert dashboard["stats"]["potensi_waste_pcs"] == analysis["waste"]["pcs"]
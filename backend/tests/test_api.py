@@ -0,0 +1,41 @@
+def test_cross_origin_clients_can_read_paging_and_cache_headers():
+    import app
+
+    client = app.app.test_client()
+    res = client.get("/api/laporan?limit=1", headers={"Origin": "http://localhost:5173"})
+    assert res.status_code == 200 and res.headers["X-Total-Count"]
+    exposed = {h.strip().lower() for h in res.headers["Access-Control-Expose-Headers"].split(",")}
+    assert {"x-next-cursor", "x-total-count", "etag"} <= exposed
+
+
+def test_failed_sale_puts_the_stock_back(monkeypatch):
+    import app
+
+    client = app.app.test_client()
+    before = app.inventory["outlet_1"][1]
+    sales = app.storage.max_transaction_id()
+
+    def broken(records):
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr(app.storage, "add_transactions", broken)
+    res = client.post("/api/pos/transaksi", json={"outlet_id": "outlet_1", "items": [{"id": 1, "qty": 2}]})
+    assert res.status_code == 500
+    assert app.inventory["outlet_1"][1] == before
+    assert app.storage.load_stock()["outlet_1"][1] == before
+    assert app.storage.max_transaction_id() == sales
+
+
+def test_pos_rejects_prices_that_are_not_finite_or_negative():
+    import app
+
+    client = app.app.test_client()
+    before = app.inventory["outlet_1"][1]
+    for price in ("nan", "inf", "-inf", -500):
+        res = client.post("/api/pos/transaksi", json={"outlet_id": "outlet_1", "items": [{"id": 1, "qty": 1, "price": price}]})
+        assert res.status_code == 400, price
+    assert app.inventory["outlet_1"][1] == before
+
+    res = client.post("/api/pos/transaksi", json={"outlet_id": "outlet_1", "items": [{"id": 1, "qty": 2, "price": "1500.6"}]})
+    assert res.status_code == 200 and res.get_json()["total"] == 3002
+    assert next(iter(app.storage.query_transactions(descending=True, limit=1)))["items"][0]["price"] == 1501
@@ -0,0 +1,75 @@
+import json
+import uuid
+
+
+def sale(key=None, qty=1, **extra):
+    record = {"outlet_id": "outlet_2", "items": [{"id": 2, "qty": qty}], **extra}
+    if key:
+        record["idempotency_key"] = key
+    return record
+
+
+def statuses(res):
+    assert res.status_code == 200, res.get_json()
+    return [r["status"] for r in res.get_json()["results"]]
+
+
+def test_replayed_batch_is_reported_as_duplicates():
+    import app
+
+    client = app.app.test_client()
+    app.stock_ledger.add("outlet_2", [(2, 10)])
+    keys = [uuid.uuid4().hex for _ in range(3)]
+    before = app.inventory["outlet_2"][2]
+
+    first = client.post("/api/pos/transaksi/batch", json=[sale(key) for key in keys])
+    assert statuses(first) == ["ok", "ok", "ok"]
+    replay = client.post("/api/pos/transaksi/batch", json=[sale(key) for key in keys])
+    assert statuses(replay) == ["duplicate"] * 3
+    assert [r["id"] for r in replay.get_json()["results"]] == [r["id"] for r in first.get_json()["results"]]
+    assert app.inventory["outlet_2"][2] == before - 3
+
+    # The single route honours the same keys.
+    res = client.post("/api/pos/transaksi", json=sale(keys[0]))
+    assert res.status_code == 200 and res.get_json()["duplicate"] is True
+
+
+def test_ndjson_body_with_a_broken_line():
+    import app
+
+    client = app.app.test_client()
+    app.stock_ledger.add("outlet_2", [(2, 10)])
+    body = "\n".join([json.dumps(sale()), "{not json", "", json.dumps(sale(date="2026-03-01T08:00:00Z"))])
+    res = client.post("/api/pos/transaksi/batch", data=body, content_type="application/x-ndjson")
+    assert statuses(res) == ["ok", "error", "ok"]
+    stored = next(iter(app.storage.query_transactions(descending=True, limit=1)))
+    assert stored["id"] == res.get_json()["results"][2]["id"] and stored["date"].startswith("2026-03-01T08:00:00")
+
+
+def test_duplicate_keys_within_one_batch_apply_once():
+    import app
+
+    client = app.app.test_client()
+    app.stock_ledger.add("outlet_2", [(2, 10)])
+    key = uuid.uuid4().hex
+    before = app.inventory["outlet_2"][2]
+    res = client.post("/api/pos/transaksi/batch", json=[sale(key, qty=2), sale(), sale(key, qty=2)])
+    results = res.get_json()["results"]
+    assert statuses(res) == ["ok", "ok", "duplicate"]
+    assert results[2]["id"] == results[0]["id"]
+    assert app.inventory["outlet_2"][2] == before - 3
+
+
+def test_invalid_dates_are_rejected_per_record():
+    import app
+
+    client = app.app.test_client()
+    app.stock_ledger.add("outlet_2", [(2, 10)])
+    before = app.inventory["outlet_2"][2]
+    res = client.post("/api/pos/transaksi/batch", json=[sale(date="kemarin"), sale(date=20260301), sale()])
+    assert statuses(res) == ["error", "error", "ok"]
+    assert "date" in res.get_json()["results"][0]["error"]
+    assert app.inventory["outlet_2"][2] == before - 1
+
+    res = client.post("/api/pos/transaksi", json=sale(date="kemarin"))
+    assert res.status_code == 400
@@ -0,0 +1,23 @@
+from cache import Memo, StateVersion, VersionedCache
+
+
+def test_state_tags_do_not_repeat_across_processes():
+    before, after = StateVersion(), StateVersion()
+    before.bump()
+    after.bump()
+    assert before.value == after.value
+    assert before.tag != after.tag
+
+
+def test_memo_recomputes_only_on_a_new_key():
+    calls = []
+    memo = Memo(lambda: calls.append(1) or len(calls))
+    assert memo.get("a") == memo.get("a") == 1
+    assert memo.get("b") == 2
+
+
+def test_versioned_cache_rebuilds_on_version_change():
+    cache = VersionedCache()
+    assert cache.get("products", 1, lambda: "v1") == "v1"
+    assert cache.get("products", 1, lambda: "other") == "v1"
+    assert cache.get("products", 2, lambda: "v2") == "v2"
@@ -0,0 +1,71 @@
+import pytest
+
+from catalog import Catalog
+
+OUTLETS = [{"id": "outlet_1", "name": "Outlet 1"}, {"id": "outlet_2", "name": "Outlet 2"}]
+PRODUCTS = [{"id": 1, "name": "Ayam Dada", "price": 10000}, {"id": 2, "name": "Sayap", "price": 8000}]
+
+
+def test_reload_stores_parsed_prices():
+    catalog = Catalog(OUTLETS, PRODUCTS)
+    catalog.load(products=[{"id": "1", "name": "Ayam Dada", "price": "12000"}, {"id": 3, "name": "Es Teh", "price": "2500.5"}])
+    assert catalog.product(1).price == 12000 and isinstance(catalog.product(1).price, int)
+    assert catalog.product(3).price == 2500.5
+    assert catalog.product(2) is None
+    # Outlets were not part of the reload and stay as they were.
+    assert [o.id for o in catalog.outlets] == ["outlet_1", "outlet_2"]
+    assert catalog.version == 2
+
+
+@pytest.mark.parametrize("products", [
+    [{"id": 1, "name": "Ayam", "price": "nan"}],
+    [{"id": 1, "name": "Ayam", "price": "inf"}],
+    [{"id": 1, "name": "Ayam", "price": -1}],
+    [{"id": 1, "name": "Ayam"}],
+    [{"id": 1, "name": "Ayam", "price": 1}, {"id": 1, "name": "Sayap", "price": 2}],
+    {"id": 1, "name": "Ayam", "price": 1},
+])
+def test_bad_reload_keeps_the_current_catalog(products):
+    catalog = Catalog(OUTLETS, PRODUCTS)
+    with pytest.raises(ValueError):
+        catalog.load(products=products)
+    assert catalog.to_dict() == Catalog(OUTLETS, PRODUCTS).to_dict() and catalog.version == 1
+
+
+def test_unhashable_ids_are_unknown():
+    catalog = Catalog(OUTLETS, PRODUCTS)
+    assert catalog.outlet(["outlet_1"]) is None
+    assert catalog.product({"id": 1}) is None
+
+
+def test_requests_with_unhashable_outlet_ids_get_a_400():
+    import app
+
+    client = app.app.test_client()
+    res = client.post("/api/pos/transaksi", json={"outlet_id": ["outlet_1"], "items": [{"id": 1, "qty": 1}]})
+    assert res.status_code == 400
+    res = client.post("/api/replenishment/apply", json={"outlet_ids": [["outlet_1"]]})
+    assert res.status_code == 400
+    res = client.post("/api/pos/transaksi/batch", json=[
+        {"outlet_id": {"id": "outlet_1"}, "items": [{"id": 1, "qty": 1}]},
+        {"outlet_id": "outlet_1", "items": [{"id": 1, "qty": 1}]},
+    ])
+    assert res.status_code == 200
+    assert [r["status"] for r in res.get_json()["results"]] == ["error", "ok"]
+
+
+def test_reload_route_serves_the_parsed_price():
+    import app
+
+    client = app.app.test_client()
+    original = app.catalog.to_dict()
+    products = [dict(p, price=str(p["price"])) for p in original["products"]]
+    try:
+        res = client.post("/api/catalog/reload", json={"products": products})
+        assert res.status_code == 200
+        served = client.get("/api/products").get_json()
+        assert [p["price"] for p in served] == [p["price"] for p in original["products"]]
+        res = client.post("/api/catalog/reload", json={"products": [{"id": 1, "name": "Ayam", "price": "nan"}]})
+        assert res.status_code == 400
+    finally:
+        app.catalog.load(original["outlets"], original["products"])
@@ -0,0 +1,20 @@
+import numpy as np
+
+from analytics import StockAnalytics
+from cells import IdIndex
+
+
+def test_positions_never_change_once_given_out():
+    index = IdIndex(["outlet_1", "outlet_2"])
+    assert index.add("outlet_3") == 2
+    assert index.add("outlet_1") == 0
+    assert index.ids == ["outlet_1", "outlet_2", "outlet_3"] and index.get("missing") is None
+
+
+def test_grid_rows_follow_ids_not_catalog_order():
+    analytics = StockAnalytics()
+    for n in range(1, 6):
+        analytics.set_stock(f"outlet_{n}", {1: n, 2: 10 * n})
+    # A reload that reorders and adds outlets sees the same rows for the known ones.
+    result = analytics.analyze(["outlet_9", "outlet_5", "outlet_2"], [2, 1], velocity=np.ones((3, 2)))
+    assert result["cells"]["stock"].tolist() == [[0, 0], [50, 5], [20, 2]]
@@ -0,0 +1,58 @@
+from datetime import timedelta
+
+import pytest
+
+from sample_data import START, make_sales
+from storage import EventLogStorage, MemoryStorage, SQLiteStorage
+
+
+def test_columnar_aggregates_match_sqlite(tmp_path):
+    memory = MemoryStorage()
+    sqlite = SQLiteStorage(str(tmp_path / "dkriuk.db"))
+    records = make_sales(20000, seed=5)
+    for i in range(0, len(records), 1000):
+        memory.add_transactions(records[i:i + 1000])
+        sqlite.add_transactions(records[i:i + 1000])
+    sqlite.flush()
+
+    assert memory.max_transaction_id() == sqlite.max_transaction_id() == 20000
+    assert memory.total_revenue() == pytest.approx(sqlite.total_revenue())
+    for resolution in ("hour", "day"):
+        for bounds in ({}, {"start": START + timedelta(days=2), "end": START + timedelta(days=4)}):
+            assert sorted(memory.product_sales(resolution=resolution, **bounds)) == sorted(
+                sqlite.product_sales(resolution=resolution, **bounds)
+            )
+    for outlet_id in (None, "outlet_2"):
+        expected = sqlite.report_rows(outlet_id=outlet_id, start=START + timedelta(days=1))
+        assert memory.report_rows(outlet_id=outlet_id, start=START + timedelta(days=1)) == expected
+    keys = [f"k{i}" for i in range(0, 300, 7)] + ["unknown"]
+    assert memory.find_transaction_ids(keys) == sqlite.find_transaction_ids(keys)
+    sqlite.close()
+
+
+def test_lines_keep_the_name_and_image_they_were_sold_with(backend):
+    first, renamed = make_sales(2)
+    # The same product, renamed by a catalog reload in between; the second line overrides the image.
+    first["items"] = [dict(id=1, name="Nama Lama", qty=1, price=3000.0, image="lama.jpg")]
+    renamed["items"] = [dict(first["items"][0], name="Nama Baru", image="baru.jpg"),
+                        dict(first["items"][0], name="Nama Baru", image="khusus.jpg")]
+    backend.add_transactions([first, renamed])
+    backend.flush()
+
+    stored = [t["items"] for t in backend.query_transactions()]
+    assert stored == [first["items"], renamed["items"]]
+
+
+def test_event_log_snapshot_keeps_line_labels(tmp_path):
+    path = str(tmp_path / "dkriuk.log")
+    storage = EventLogStorage(path, fsync=False)
+    records = make_sales(5)
+    records[3]["items"][0]["name"] = "Nama Baru"
+    storage.add_transactions(records[:4])
+    storage.snapshot()
+    storage.add_transactions(records[4:])
+    storage.log.close()
+
+    restored = EventLogStorage(path, fsync=False)
+    assert [t["items"] for t in restored.query_transactions()] == [r["items"] for r in records]
+    restored.close()
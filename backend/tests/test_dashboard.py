@@ -0,0 +1,43 @@
+def test_revenue_is_kept_up_to_date_without_summing_the_sales(monkeypatch):
+    import app
+
+    client = app.app.test_client()
+
+    def full_scan():
+        raise AssertionError("dashboard summed the sales table")
+
+    monkeypatch.setattr(app.storage, "total_revenue", full_scan)
+    before = client.get("/api/dashboard").get_json()["stats"]["total_pendapatan"]
+    res = client.post("/api/pos/transaksi", json={"outlet_id": "outlet_3", "items": [{"id": 6, "qty": 1}]})
+    assert res.status_code == 200
+    after = client.get("/api/dashboard").get_json()["stats"]["total_pendapatan"]
+    assert after == before + res.get_json()["total"]
+    monkeypatch.undo()
+    assert after == app.storage.total_revenue() + 15700000
+
+
+def revalidate(client, path):
+    first = client.get(path)
+    assert first.status_code == 200 and first.headers["ETag"]
+    again = client.get(path, headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304 and not again.data
+    return first.headers["ETag"]
+
+
+def test_unchanged_state_is_answered_with_304_and_a_sale_changes_the_etag():
+    import app
+
+    client = app.app.test_client()
+    paths = ["/api/dashboard", "/api/products?outlet_id=outlet_1", "/api/laporan"]
+    etags = {path: revalidate(client, path) for path in paths}
+    other_outlet = revalidate(client, "/api/products?outlet_id=outlet_2")
+
+    res = client.post("/api/pos/transaksi", json={"outlet_id": "outlet_1", "items": [{"id": 2, "qty": 1}]})
+    assert res.status_code == 200
+    for path in paths:
+        res = client.get(path, headers={"If-None-Match": etags[path]})
+        assert res.status_code == 200, path
+        assert res.headers["ETag"] != etags[path]
+    # Another outlet's product list did not change and is still served from the client's copy.
+    res = client.get("/api/products?outlet_id=outlet_2", headers={"If-None-Match": other_outlet})
+    assert res.status_code == 304
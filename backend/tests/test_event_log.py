@@ -0,0 +1,74 @@
+import threading
+
+from sample_data import fill, listings, make_sales
+from storage import EventLogStorage
+
+
+def test_event_log_replays_up_to_a_torn_line(tmp_path):
+    path = str(tmp_path / "dkriuk.log")
+    storage = EventLogStorage(path, fsync=False)
+    storage.save_stock("outlet_1", {1: 10})
+    storage.add_transactions(make_sales(3))
+    storage.save_stock("outlet_1", {1: 7})
+    storage.log.close()
+    with open(path, "ab") as f:
+        f.write(b'{"type":"stock","location":"outlet_1","items":[[1,')
+
+    reopened = EventLogStorage(path, fsync=False)
+    assert reopened.load_stock() == {"outlet_1": {1: 7}}
+    assert reopened.max_transaction_id() == 3
+    # The torn tail is cut off, so the next event starts on a clean line.
+    reopened.save_stock("outlet_1", {1: 6})
+    reopened.log.close()
+    assert EventLogStorage(path, fsync=False).load_stock() == {"outlet_1": {1: 6}}
+
+
+def test_event_log_snapshot_plus_tail_equals_full_replay(tmp_path):
+    path = str(tmp_path / "dkriuk.log")
+    storage = EventLogStorage(path, snapshot_every=100, fsync=False)
+    fill(storage)
+    storage.save_stock("outlet_1", {1: 3})
+    expected = listings(storage)
+    storage.log.close()
+
+    restored = EventLogStorage(path, fsync=False)
+    assert listings(restored) == expected
+    assert restored.load_stock() == {"outlet_1": {1: 3}}
+    restored.close()
+
+
+def test_stock_audit_survives_snapshot_and_tail_replay(tmp_path):
+    path = str(tmp_path / "dkriuk.log")
+    storage = EventLogStorage(path, fsync=False)
+    storage.save_stock("outlet_1", {1: 10})
+    storage.save_stock("outlet_1", {1: 7})
+    storage.snapshot()
+    with storage.atomic():
+        storage.save_stock("outlet_1", {1: 9, 2: 3})
+        storage.save_stock("hub_pusat", {1: 5})
+    storage.log.close()
+
+    restored = EventLogStorage(path, fsync=False)
+    moves = [(m["location"], m["product_id"], m["delta"], m["qty"]) for m in restored.stock_movements()]
+    assert moves == [("hub_pusat", 1, 5, 5), ("outlet_1", 2, 3, 3), ("outlet_1", 1, 2, 9),
+                     ("outlet_1", 1, -3, 7), ("outlet_1", 1, 10, 10)]
+    assert [m["qty"] for m in restored.stock_movements("outlet_1", limit=2)] == [3, 9]
+    restored.close()
+
+
+def test_due_snapshot_is_written_off_the_writing_thread(tmp_path, monkeypatch):
+    storage = EventLogStorage(str(tmp_path / "dkriuk.log"), snapshot_every=1, fsync=False)
+    written = threading.Event()
+    threads = []
+    write_snapshot = storage._write_snapshot
+
+    def spy():
+        threads.append(threading.current_thread().name)
+        write_snapshot()
+        written.set()
+
+    monkeypatch.setattr(storage, "_write_snapshot", spy)
+    storage.save_stock("outlet_1", {1: 1})
+    assert written.wait(5)
+    assert threads == ["event-log-snapshot"]
+    storage.close()
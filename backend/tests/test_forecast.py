@@ -0,0 +1,29 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from bench.forecast import backtest
+from forecast import DemandForecast
+
+NOW = datetime(2026, 3, 2, 0, 0)
+
+
+def test_forecast_beats_the_velocity_rule_on_a_walk_forward_backtest():
+    result = backtest(outlets=20, products=3, days=28, test_days=2, seed=3)
+    assert result["forecast_wape"] < 0.3
+    assert result["forecast_wape"] < 0.75 * result["rule_wape"]
+
+
+def test_steady_sales_give_a_steady_forecast_and_a_matching_stockout():
+    model = DemandForecast()
+    # Two units every hour for two weeks.
+    rows = [(NOW - timedelta(hours=h), "outlet_1", 1, 2) for h in range(1, 24 * 14 + 1)]
+    model.load_sales(rows, NOW)
+    demand = model.demand(["outlet_1"], [1, 2], hours=24, now=NOW)
+    assert abs(demand[0, 0] - 48) < 5
+    assert demand[0, 1] == 0
+
+    hours = model.stockout_hours(["outlet_1"], [1, 2], np.array([[24, 24]]), now=NOW)
+    assert abs(hours[0, 0] - 12) < 2
+    # Nothing sells, so it never runs out within the horizon.
+    assert hours[0, 1] == np.inf
@@ -0,0 +1,55 @@
+import itertools
+import time
+
+from live import DashboardBroadcaster, diff_dashboard
+
+
+def dashboard(n):
+    return {"stats": {"n": n}, "inventory": [{"id": "outlet_1", "stock": n}], "requests_count": 0}
+
+
+def test_burst_of_notifications_is_one_recompute():
+    counter = itertools.count()
+    broadcaster = DashboardBroadcaster(lambda: dashboard(next(counter)), coalesce_seconds=0.25)
+    q = broadcaster.subscribe()
+    assert q.get(timeout=1)[0] == "snapshot"
+
+    for _ in range(10):
+        broadcaster.notify()
+        time.sleep(0.02)
+    time.sleep(0.5)
+
+    events = []
+    while not q.empty():
+        events.append(q.get_nowait())
+    assert [e[0] for e in events] == ["delta"]
+    assert next(counter) == 2
+    broadcaster.unsubscribe(q)
+
+
+def test_subscribers_are_capped():
+    broadcaster = DashboardBroadcaster(lambda: dashboard(0), max_subscribers=1)
+    first = broadcaster.subscribe()
+    assert first is not None
+    assert broadcaster.subscribe() is None
+    broadcaster.unsubscribe(first)
+    assert broadcaster.subscribe() is not None
+
+
+def test_diff_reports_changed_and_removed_rows():
+    old = {"stats": {"a": 1, "b": 2}, "inventory": [{"id": "o1", "x": 1}, {"id": "o2", "x": 1}], "requests_count": 1}
+    new = {"stats": {"a": 1, "b": 3}, "inventory": [{"id": "o1", "x": 2}], "requests_count": 1}
+    assert diff_dashboard(old, new) == {"stats": {"b": 3}, "inventory": [{"id": "o1", "x": 2}], "removed": ["o2"]}
+    assert diff_dashboard(new, new) is None
+
+
+def test_stream_endpoint_answers_503_beyond_the_limit():
+    import app
+
+    client = app.app.test_client()
+    app.live_dashboard.max_subscribers = 0
+    try:
+        res = client.get("/api/dashboard/stream")
+        assert res.status_code == 503 and res.headers["Retry-After"]
+    finally:
+        app.live_dashboard.max_subscribers = None
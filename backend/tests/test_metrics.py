@@ -0,0 +1,59 @@
+import re
+
+from metrics import MetricsRegistry
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    latency = registry.histogram("op_seconds", "Op latency", ("op",), buckets=(0.01, 0.1))
+    for value in (0.005, 0.05, 0.05, 3.0):
+        latency.observe(value, "save")
+    lines = registry.render().splitlines()
+    assert lines[:2] == ["# HELP op_seconds Op latency", "# TYPE op_seconds histogram"]
+    assert lines[2:] == [
+        'op_seconds_bucket{op="save",le="0.01"} 1',
+        'op_seconds_bucket{op="save",le="0.1"} 3',
+        'op_seconds_bucket{op="save",le="+Inf"} 4',
+        'op_seconds_sum{op="save"} 3.105',
+        'op_seconds_count{op="save"} 4',
+    ]
+
+
+def test_counter_escapes_label_values_and_renders_zero_without_labels():
+    registry = MetricsRegistry()
+    registry.counter("plain_total", "No labels")
+    errors = registry.counter("errors_total", "Errors", ("path",))
+    errors.inc('/a"b\\c', amount=2)
+    assert registry.render().splitlines() == [
+        "# HELP plain_total No labels", "# TYPE plain_total counter", "plain_total 0",
+        "# HELP errors_total Errors", "# TYPE errors_total counter", 'errors_total{path="/a\\"b\\\\c"} 2',
+    ]
+
+
+def sample(text, name, **labels):
+    wanted = ",".join(f'{k}="{v}"' for k, v in labels.items())
+    pattern = "^" + re.escape(name) + (r"\{" + re.escape(wanted) + r"\}" if wanted else "") + r" (\S+)$"
+    match = re.search(pattern, text, re.MULTILINE)
+    return float(match.group(1)) if match else 0.0
+
+
+def test_metrics_endpoint_counts_requests_and_sales():
+    import app
+
+    client = app.app.test_client()
+    before = client.get("/api/metrics").get_data(as_text=True)
+    res = client.post("/api/pos/transaksi", json={"outlet_id": "outlet_1", "items": [{"id": 3, "qty": 2}]})
+    assert res.status_code == 200
+    res = client.get("/api/metrics")
+    assert res.status_code == 200 and res.mimetype == "text/plain"
+    after = res.get_data(as_text=True)
+
+    route = dict(method="POST", route="/api/pos/transaksi")
+    assert sample(after, "dkriuk_http_requests_total", **route, status="200") == \
+        sample(before, "dkriuk_http_requests_total", **route, status="200") + 1
+    assert sample(after, "dkriuk_http_request_duration_seconds_count", **route) == \
+        sample(before, "dkriuk_http_request_duration_seconds_count", **route) + 1
+    assert sample(after, "dkriuk_transactions_total") == sample(before, "dkriuk_transactions_total") + 1
+    assert sample(after, "dkriuk_items_sold_total") == sample(before, "dkriuk_items_sold_total") + 2
+    assert sample(after, "dkriuk_outlet_stock_units") == app.outlets_total_stock()
+    assert 'dkriuk_span_duration_seconds_count{span="record_transactions"}' in after
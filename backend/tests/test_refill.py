@@ -0,0 +1,61 @@
+import threading
+from datetime import datetime, timedelta
+
+from refill import RefillRule, RefillScheduler
+
+ANCHOR = datetime(2026, 3, 1, 6, 0)
+
+
+def scheduler(stock, **kwargs):
+    settled = []
+    refill = RefillScheduler(stock, threading.RLock(), ANCHOR, interval_seconds=60,
+                             on_settle=lambda entries, anchor: settled.append((entries, anchor)), **kwargs)
+    return refill, settled
+
+
+def test_settle_catches_up_on_every_missed_interval_at_once():
+    stock = {1: 10, 2: 0}
+    refill, settled = scheduler(stock, default_rate=5, rules={2: RefillRule(3)})
+    now = ANCHOR + timedelta(minutes=4, seconds=30)
+
+    # Reading does not write anything.
+    assert refill.current(now) == {1: 30, 2: 12}
+    assert stock == {1: 10, 2: 0} and refill.anchor == ANCHOR
+
+    entries = refill.settle(now)
+    assert stock == {1: 30, 2: 12}
+    # The anchor moves by whole intervals, so the half interval is not lost.
+    assert refill.anchor == ANCHOR + timedelta(minutes=4)
+    assert [(e["product_id"], e["qty"], e["stock_after"]) for e in entries] == [(1, 20, 30), (2, 12, 12)]
+    assert settled == [(entries, refill.anchor)]
+    assert refill.settle(now) == []
+
+
+def test_cap_limits_refill_but_never_lowers_stock():
+    stock = {1: 90, 2: 300}
+    refill, _ = scheduler(stock, default_rate=50, rules={1: RefillRule(50, cap=100), 2: RefillRule(50, cap=200)})
+    refill.settle(ANCHOR + timedelta(hours=1))
+    assert stock == {1: 100, 2: 300}
+
+
+def test_rate_zero_turns_refill_off():
+    stock = {1: 10, 2: 10}
+    refill, _ = scheduler(stock, default_rate=0, rules={2: RefillRule(0, cap=100)})
+    assert refill.settle(ANCHOR + timedelta(hours=1)) == []
+    assert stock == {1: 10, 2: 10}
+
+
+def test_refill_route_validates_rules_and_accepts_a_zero_rate():
+    import app
+
+    client = app.app.test_client()
+    original = app.refill_scheduler.default_rate
+    try:
+        assert client.post("/api/hub/refill", json={"rules": {"id": 1, "rate": 5}}).status_code == 400
+        assert client.post("/api/hub/refill", json={"rules": [1, 2]}).status_code == 400
+        assert client.post("/api/hub/refill", json={"default_rate": -1}).status_code == 400
+        res = client.post("/api/hub/refill", json={"default_rate": 0})
+        assert res.status_code == 200 and res.get_json()["default_rate"] == 0
+        assert app.refill_scheduler.default_rate == 0
+    finally:
+        app.refill_scheduler.configure(default_rate=original)
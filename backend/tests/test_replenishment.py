@@ -0,0 +1,54 @@
+import numpy as np
+
+from replenish import plan_replenishment
+
+
+def test_plan_covers_target_days_and_pending_requests():
+    stock = [[10, 0], [0, 0]]
+    velocity = [[5, 1], [2, 0]]
+    requested = [[0, 0], [0, 30]]
+    alloc = plan_replenishment(stock, velocity, requested, hub=[100, 100], target_days=4, min_drop=5)
+    # 4 days of velocity minus stock; small drops are skipped; requests are met in full.
+    assert alloc.tolist() == [[10, 0], [8, 30]]
+
+
+def test_short_hub_is_shared_for_equal_days_of_coverage():
+    stock = [[0], [10]]
+    velocity = [[10], [10]]
+    alloc = plan_replenishment(stock, velocity, np.zeros((2, 1)), hub=[30], target_days=5, min_drop=1)
+    # Both outlets end up with the same stock, i.e. the same days of coverage (rounded down).
+    assert alloc.tolist() == [[19], [9]]
+
+
+def test_preview_then_apply_sends_the_plan_and_fulfils_requests():
+    import app
+
+    client = app.app.test_client()
+    res = client.post("/api/requests", json={"outlet_id": "outlet_3", "requests": [{"id": 5, "qty": 40}]})
+    assert res.status_code == 201
+    request_id = max(r["id"] for r in app.storage.pending_requests())
+
+    plan = client.get("/api/replenishment/plan?outlet_ids=outlet_3").get_json()
+    drop = next(d for d in plan["distributions"] if d["outlet_id"] == "outlet_3")
+    assert request_id in drop["request_ids"]
+    assert next(i["qty"] for i in drop["items"] if i["id"] == 5) >= 40
+
+    res = client.post("/api/replenishment/apply", json={"outlet_ids": ["outlet_3"], "plan_id": "00000000"})
+    assert res.status_code == 409 and res.get_json()["plan"]["plan_id"] == plan["plan_id"]
+
+    hub_before = dict(app.hub_inventory)
+    outlet_before = dict(app.inventory["outlet_3"])
+    res = client.post("/api/replenishment/apply", json={"outlet_ids": ["outlet_3"], "plan_id": plan["plan_id"]})
+    assert res.status_code == 201, res.get_json()
+    for item in drop["items"]:
+        assert app.inventory["outlet_3"][item["id"]] == outlet_before.get(item["id"], 0) + item["qty"]
+        assert app.hub_inventory[item["id"]] == hub_before[item["id"]] - item["qty"]
+    assert request_id not in [r["id"] for r in app.storage.pending_requests()]
+
+
+def test_apply_rejects_outlet_ids_that_are_not_strings():
+    import app
+
+    client = app.app.test_client()
+    res = client.post("/api/replenishment/apply", json={"outlet_ids": ["outlet_1", ["outlet_2"]]})
+    assert res.status_code == 400
@@ -0,0 +1,84 @@
+from datetime import date
+
+from reports import ReportRollup
+
+DAY = date(2026, 3, 10)
+NEXT = date(2026, 3, 11)
+
+
+def test_closing_a_day_publishes_final_rows():
+    published = []
+    rollup = ReportRollup(on_freeze=lambda rows, until: published.append((rows, until)))
+    rollup.record(DAY, "outlet_1", 3, 30000, today=DAY)
+    rollup.record(DAY, "outlet_1", 2, 20000, today=DAY)
+    rollup.record(DAY, "outlet_2", 1, 5000, today=DAY)
+    published.clear()
+
+    rollup.close_days(today=NEXT)
+
+    rows, until = published[-1]
+    assert until == NEXT
+    assert sorted((r["outlet_id"], r["transaksi"], r["item_terjual"], r["omzet"], r["final"]) for r in rows) == [
+        ("outlet_1", 2, 5, 50000, True), ("outlet_2", 1, 1, 5000, True)
+    ]
+    # Closing again is a no-op.
+    rollup.close_days(today=NEXT)
+    assert len(published) == 1
+
+
+def test_late_sale_publishes_a_new_final_version():
+    published = []
+    rollup = ReportRollup(on_freeze=lambda rows, until: published.extend(rows))
+    rollup.record(DAY, "outlet_1", 3, 30000, today=DAY)
+    rollup.close_days(today=NEXT)
+    frozen = rollup.query(today=NEXT)[0][0]
+
+    rollup.record(DAY, "outlet_1", 1, 10000, today=NEXT)
+
+    assert frozen["transaksi"] == 1
+    assert published[-1] == dict(frozen, transaksi=2, item_terjual=4, omzet=40000)
+    rows, total = rollup.query(start=DAY, end=DAY, today=NEXT)
+    assert total == 1 and rows[0]["transaksi"] == 2 and rows[0]["final"]
+
+
+def test_open_rows_stay_open_until_the_day_ends():
+    rollup = ReportRollup()
+    rollup.record(NEXT, "outlet_1", 1, 1000, today=NEXT)
+    rows, _ = rollup.query(today=NEXT)
+    assert not rows[0]["final"]
+
+
+def test_query_is_newest_first_with_paging_and_filters():
+    rollup = ReportRollup()
+    for n, day in enumerate([date(2026, 3, d) for d in range(1, 6)]):
+        for outlet_id in ("outlet_1", "outlet_2"):
+            rollup.load_open({"day": day, "outlet_id": outlet_id, "transaksi": n, "item_terjual": n, "omzet": n})
+
+    rows, total = rollup.query(offset=1, limit=3, today=date(2026, 3, 5))
+    assert total == 10
+    assert [(r["day"].day, r["outlet_id"]) for r in rows] == [(5, "outlet_2"), (4, "outlet_1"), (4, "outlet_2")]
+
+    rows, total = rollup.query(start=date(2026, 3, 2), end=date(2026, 3, 3), outlet_id="outlet_2",
+                               today=date(2026, 3, 5))
+    assert total == 2 and [r["day"].day for r in rows] == [3, 2]
+
+
+def test_laporan_row_of_today_follows_each_sale():
+    import app
+
+    client = app.app.test_client()
+    today = date.today().isoformat()
+
+    def row():
+        rows = client.get(f"/api/laporan?start={today}&end={today}&outlet_id=outlet_4").get_json()
+        return rows[0] if rows else {"transaksi": 0, "item_terjual": 0, "omzet": 0}
+
+    before = row()
+    res = client.post("/api/pos/transaksi", json={"outlet_id": "outlet_4", "items": [{"id": 5, "qty": 2}]})
+    assert res.status_code == 200
+    after = row()
+    assert after["status"] == "Open" and after["outlet"] == app.get_outlet_name("outlet_4")
+    assert (after["transaksi"], after["item_terjual"], after["omzet"]) == (
+        before["transaksi"] + 1, before["item_terjual"] + 2, before["omzet"] + res.get_json()["total"]
+    )
+    assert client.get("/api/laporan?start=kemarin").status_code == 400
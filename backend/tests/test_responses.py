@@ -0,0 +1,84 @@
+import gzip
+import json
+from datetime import date, datetime
+
+import pytest
+
+import responses
+
+
+def test_orjson_and_stdlib_encoders_produce_the_same_bytes(monkeypatch):
+    if responses.orjson is None:
+        pytest.skip("orjson is not installed")
+    from app import app
+
+    obj = {
+        "nama": "Kopi Susu Gula Aren é",
+        "harga": [18000, 2.5, 0.1, None, True],
+        "tanggal": date(2024, 1, 2),
+        "waktu": datetime(2024, 1, 2, 3, 4, 5),
+        "stok": {3: 10, 1: 4}
+    }
+    fast = responses.encode_json(obj, app.json.default)
+    monkeypatch.setattr(responses, "orjson", None)
+    assert responses.encode_json(obj, app.json.default) == fast
+    assert json.loads(fast)["stok"] == {"1": 4, "3": 10}
+
+
+def test_payload_gzip_is_deterministic_and_etag_follows_the_body():
+    payload = responses.Payload(b'{"a":1}' * 400)
+    assert gzip.decompress(payload.gzipped()) == payload.body
+    assert payload.gzipped() == responses.Payload(payload.body).gzipped()
+    assert payload.etag == responses.Payload(payload.body).etag
+    assert payload.etag != responses.Payload(b'{"a":2}' * 400).etag
+
+
+def test_cached_payload_is_gzipped_only_for_clients_that_accept_it():
+    from app import app
+
+    client = app.test_client()
+    plain = client.get("/api/catalog")
+    assert len(plain.data) >= responses.GZIP_MIN_BYTES
+    assert "Content-Encoding" not in plain.headers
+    zipped = client.get("/api/catalog", headers={"Accept-Encoding": "gzip, deflate"})
+    assert zipped.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in zipped.headers["Vary"]
+    assert gzip.decompress(zipped.data) == plain.data
+
+
+def test_large_json_responses_are_gzipped_and_small_ones_are_not():
+    from app import app
+
+    client = app.test_client()
+    for _ in range(8):
+        res = client.post("/api/pos/transaksi", json={"outlet_id": "outlet_2", "items": [{"id": 1, "qty": 1}]})
+        assert res.status_code == 200
+    path = "/api/pos/transaksi?outlet_id=outlet_2&order=desc"
+    plain = client.get(path)
+    assert len(plain.data) >= responses.GZIP_MIN_BYTES
+    zipped = client.get(path, headers={"Accept-Encoding": "gzip"})
+    assert zipped.headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(zipped.data)) == plain.get_json()
+
+    small = client.get("/api/sales/recent?hours=1", headers={"Accept-Encoding": "gzip"})
+    assert len(small.data) < responses.GZIP_MIN_BYTES
+    assert "Content-Encoding" not in small.headers
+    assert small.get_json()["hours"] == 1
+
+
+def test_streamed_and_error_responses_are_left_alone():
+    from app import app
+
+    body = b"x" * (2 * responses.GZIP_MIN_BYTES)
+    with app.test_request_context(headers={"Accept-Encoding": "gzip"}):
+        from flask import request
+
+        assert responses.should_compress(app.response_class(body, mimetype="text/csv"), request)
+        assert not responses.should_compress(app.response_class(body, mimetype="image/png"), request)
+        assert not responses.should_compress(app.response_class(body, status=500, mimetype="text/plain"), request)
+        streamed = app.response_class(iter([body]), mimetype="text/csv")
+        assert not responses.should_compress(streamed, request)
+    with app.test_request_context():
+        from flask import request
+
+        assert not responses.should_compress(app.response_class(body, mimetype="text/csv"), request)
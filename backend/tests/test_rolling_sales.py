@@ -0,0 +1,38 @@
+from datetime import datetime, timedelta
+
+from rolling_sales import RollingSales
+
+NOW = datetime(2026, 3, 10, 12, 0)
+
+
+def test_window_sums_only_the_buckets_inside_it():
+    stats = RollingSales(bucket_seconds=60, retention_hours=48)
+    stats.record(NOW - timedelta(minutes=5), 2, 20000.0, now=NOW)
+    stats.record(NOW - timedelta(hours=3), 1, 8000.0, now=NOW)
+    stats.record(NOW - timedelta(hours=30), 4, 12000.0, now=NOW)
+    assert stats.window(hours=1, now=NOW) == (2, 20000.0)
+    assert stats.window(hours=24, now=NOW) == (3, 28000.0)
+    assert stats.window(hours=48, now=NOW) == (7, 40000.0)
+
+
+def test_old_and_overwritten_buckets_drop_out():
+    stats = RollingSales(bucket_seconds=60, retention_hours=1)
+    stats.record(NOW - timedelta(hours=2), 5, 50000.0, now=NOW)
+    assert stats.window(hours=1, now=NOW) == (0, 0.0)
+    stats.record(NOW, 1, 3000.0, now=NOW)
+    # A slot reused an hour later no longer holds the old bucket.
+    later = NOW + timedelta(minutes=61)
+    stats.record(later, 2, 6000.0, now=later)
+    assert stats.window(hours=1, now=later) == (2, 6000.0)
+
+
+def test_recent_sales_route_counts_a_new_sale():
+    import app
+
+    client = app.app.test_client()
+    before = client.get("/api/sales/recent?hours=24").get_json()
+    res = client.post("/api/pos/transaksi", json={"outlet_id": "outlet_1", "items": [{"id": 6, "qty": 2}]})
+    assert res.status_code == 200
+    after = client.get("/api/sales/recent?hours=24").get_json()
+    assert after["qty"] == before["qty"] + 2
+    assert after["revenue"] == before["revenue"] + res.get_json()["total"]
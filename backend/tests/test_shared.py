@@ -0,0 +1,62 @@
+import http.client
+import json
+import threading
+
+from bench.loadgen import running_server
+from storage import SQLiteStorage
+
+PORT = 5121
+STOCK = 300
+
+
+def call(method, path, body=None):
+    conn = http.client.HTTPConnection("127.0.0.1", PORT, timeout=30)
+    try:
+        conn.request(method, path, body=json.dumps(body) if body is not None else None,
+                     headers={"Content-Type": "application/json"} if body is not None else {})
+        res = conn.getresponse()
+        return res.status, json.loads(res.read() or b"null")
+    finally:
+        conn.close()
+
+
+def test_workers_share_stock_and_sales_through_sqlite(tmp_path):
+    db = str(tmp_path / "dkriuk.db")
+    seed = SQLiteStorage(db)
+    seed.save_stock("hub_pusat", {1: 1000})
+    seed.save_stock("outlet_1", {1: STOCK})
+    seed.close()
+
+    sold = []
+    lock = threading.Lock()
+
+    def client(n):
+        for i in range(40):
+            qty = 1 + (n + i) % 3
+            # A fresh connection per sale, so the sales spread over the worker processes.
+            status, body = call("POST", "/api/pos/transaksi", {"outlet_id": "outlet_1", "items": [{"id": 1, "qty": qty}]})
+            assert status in (200, 400), body
+            if status == 200:
+                with lock:
+                    sold.append(qty)
+
+    with running_server(db, PORT, threads=4, workers=3):
+        threads = [threading.Thread(target=client, args=(n,)) for n in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        # Whichever worker answers, it has seen the sales of the others.
+        for _ in range(6):
+            status, products = call("GET", "/api/products?outlet_id=outlet_1")
+            assert status == 200
+            assert next(p["stock"] for p in products if p["id"] == 1) == STOCK - sum(sold)
+
+    storage = SQLiteStorage(db)
+    assert storage.load_stock()["outlet_1"][1] == STOCK - sum(sold) >= 0
+    records = list(storage.query_transactions())
+    assert len(records) == len(sold) == storage.max_transaction_id()
+    assert sorted(r["id"] for r in records) == list(range(1, len(sold) + 1))
+    assert sum(i["qty"] for r in records for i in r["items"]) == sum(sold)
+    storage.close()
@@ -0,0 +1,81 @@
+import threading
+
+import pytest
+
+from stock import InsufficientStock, StockLedger
+
+
+def test_concurrent_takes_never_oversell():
+    inventory = {"outlet_1": {1: 500}}
+    ledger = StockLedger(inventory, {}, "hub")
+    sold = []
+    lock = threading.Lock()
+
+    def worker():
+        for _ in range(200):
+            try:
+                ledger.take("outlet_1", [(1, 3)])
+            except InsufficientStock:
+                continue
+            with lock:
+                sold.append(3)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert inventory["outlet_1"][1] == 500 - sum(sold)
+    assert 0 <= inventory["outlet_1"][1] < 3
+
+
+def test_transfer_is_all_or_nothing():
+    inventory = {"outlet_1": {1: 0, 2: 0}}
+    hub = {1: 10, 2: 1}
+    changes = []
+    ledger = StockLedger(inventory, hub, "hub", on_change=lambda loc, items: changes.append((loc, items)))
+
+    with pytest.raises(InsufficientStock) as exc:
+        ledger.transfer("hub", "outlet_1", [(1, 5), (2, 2)])
+    assert exc.value.product_id == 2
+    assert hub == {1: 10, 2: 1} and inventory["outlet_1"] == {1: 0, 2: 0}
+    assert changes == []
+
+    ledger.transfer("hub", "outlet_1", [(1, 5), (1, 2), (2, 1)])
+    assert hub == {1: 3, 2: 0} and inventory["outlet_1"] == {1: 7, 2: 1}
+    assert changes == [("hub", {1: 3, 2: 0}), ("outlet_1", {1: 7, 2: 1})]
+
+
+def test_take_each_rejects_orders_independently():
+    inventory = {"outlet_1": {1: 5}}
+    ledger = StockLedger(inventory, {}, "hub")
+    outcomes = ledger.take_each("outlet_1", [[(1, 3)], [(1, 3)], [(1, 2)]])
+    assert outcomes[0] is None and isinstance(outcomes[1], InsufficientStock) and outcomes[2] is None
+    assert inventory["outlet_1"][1] == 0
+
+
+def test_concurrent_pos_and_distribusi_requests():
+    from bench import stress_stock
+
+    assert stress_stock.run(threads=8, ops=60) == []
+
+
+def test_undo_on_error_puts_back_the_changes_of_the_block():
+    inventory = {"outlet_1": {1: 5, 2: 1}}
+    hub = {1: 10}
+    changes = []
+    ledger = StockLedger(inventory, hub, "hub", on_change=lambda loc, items: changes.append((loc, items)))
+
+    with pytest.raises(RuntimeError):
+        with ledger.undo_on_error():
+            ledger.take("outlet_1", [(1, 2), (2, 1)])
+            ledger.transfer("hub", "outlet_1", [(1, 4)])
+            raise RuntimeError("storing the sale failed")
+    assert inventory["outlet_1"] == {1: 5, 2: 1} and hub == {1: 10}
+    # The restored quantities are passed on like any other change.
+    assert changes[-3:] == [("outlet_1", {1: 3}), ("hub", {1: 10}), ("outlet_1", {1: 5, 2: 1})]
+
+    with ledger.undo_on_error():
+        ledger.take("outlet_1", [(1, 2)])
+    assert inventory["outlet_1"][1] == 3
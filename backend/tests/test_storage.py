@@ -0,0 +1,123 @@
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from sample_data import make_sales, open_storage
+from storage import EventLogStorage, SQLiteStorage
+
+
+def test_stock_and_meta_round_trip(backend):
+    backend.save_stock("outlet_1", {1: 10, 2: 5})
+    backend.save_stock("outlet_1", {2: 4})
+    backend.save_stock("hub_pusat", {1: 100})
+    backend.set_meta("last_hub_refill", "2026-03-01T06:00:00")
+    assert backend.load_stock() == {"outlet_1": {1: 10, 2: 4}, "hub_pusat": {1: 100}}
+    assert backend.get_meta("last_hub_refill") == "2026-03-01T06:00:00"
+    assert backend.get_meta("missing", "default") == "default"
+
+
+CRASH_AFTER_SALE = """
+import os, time
+import app
+client = app.app.test_client()
+res = client.post("/api/pos/transaksi", json={"outlet_id": "outlet_1", "items": [{"id": 1, "qty": 2}]})
+assert res.status_code == 200, res.get_json()
+time.sleep(app.storage.commit_interval * 2)
+os._exit(0)
+"""
+
+
+def test_lone_sale_survives_a_crash_with_its_stock_change(tmp_path):
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    db = str(tmp_path / "dkriuk.db")
+    env = dict(os.environ, DKRIUK_STORAGE="sqlite", DKRIUK_DB=db)
+    subprocess.run([sys.executable, "-c", CRASH_AFTER_SALE], cwd=backend_dir, env=env, check=True, timeout=60)
+
+    storage = SQLiteStorage(db)
+    assert storage.load_stock()["outlet_1"][1] == 22
+    assert storage.max_transaction_id() == 1
+    storage.close()
+
+
+def test_sqlite_atomic_block_is_not_split_by_the_batch_size(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "dkriuk.db"), batch_size=1)
+    reader = SQLiteStorage(str(tmp_path / "dkriuk.db"))
+    with storage.atomic():
+        storage.save_stock("outlet_1", {1: 22})
+        assert reader.load_stock() == {}
+        storage.add_transactions(make_sales(1))
+        assert reader.max_transaction_id() == 0
+    assert reader.load_stock() == {"outlet_1": {1: 22}} and reader.max_transaction_id() == 1
+    storage.close()
+    reader.close()
+
+
+def test_event_log_atomic_block_is_one_line(tmp_path):
+    path = str(tmp_path / "dkriuk.log")
+    storage = EventLogStorage(path, fsync=False)
+    with storage.atomic():
+        storage.save_stock("outlet_1", {1: 22})
+        storage.add_transactions(make_sales(1))
+    storage.log.close()
+    with open(path, "rb") as f:
+        lines = f.read().splitlines()
+    assert len(lines) == 1
+
+    # A torn batch drops the stock change and the sale together.
+    with open(path, "wb") as f:
+        f.write(lines[0][:-5])
+    reopened = EventLogStorage(path, fsync=False)
+    assert reopened.load_stock() == {} and reopened.max_transaction_id() == 0
+
+
+@pytest.mark.parametrize("kind", ["sqlite", "log"])
+def test_atomic_block_that_raises_writes_nothing(tmp_path, kind):
+    storage = open_storage(kind, tmp_path)
+    storage.save_stock("outlet_1", {1: 22})
+    with pytest.raises(RuntimeError):
+        with storage.atomic():
+            storage.save_stock("outlet_1", {1: 20})
+            with storage.atomic():
+                storage.add_transactions(make_sales(1))
+            raise RuntimeError("fails after the writes")
+    # A nested block that raises drops only its own writes.
+    with storage.atomic():
+        storage.save_stock("outlet_2", {1: 5})
+        with pytest.raises(RuntimeError):
+            with storage.atomic():
+                storage.add_transactions(make_sales(1))
+                raise RuntimeError("fails after the sale")
+    storage.close()
+
+    reopened = open_storage(kind, tmp_path)
+    assert reopened.load_stock() == {"outlet_1": {1: 22}, "outlet_2": {1: 5}}
+    assert reopened.max_transaction_id() == 0
+    reopened.close()
+
+
+@pytest.mark.parametrize("kind", ["sqlite", "log"])
+def test_open_atomic_block_does_not_hold_back_other_writers(tmp_path, kind):
+    storage = open_storage(kind, tmp_path)
+    entered, go_on = threading.Event(), threading.Event()
+    order = []
+
+    def block():
+        with storage.atomic():
+            entered.set()
+            go_on.wait(5)
+            storage.save_stock("outlet_1", {1: 1})
+        order.append("block")
+
+    thread = threading.Thread(target=block)
+    thread.start()
+    assert entered.wait(5)
+    storage.save_stock("outlet_2", {1: 2})
+    order.append("other")
+    go_on.set()
+    thread.join()
+    assert order == ["other", "block"]
+    assert storage.load_stock() == {"outlet_1": {1: 1}, "outlet_2": {1: 2}}
+    storage.close()
@@ -27,6 +27,47 @@ const AdminDashboard = () => {
 
     useEffect(() => {
         fetchData();
+
+        // Live updates: one snapshot, then only the fields/rows that changed
+        if (typeof EventSource === 'undefined') return undefined;
+        const source = new EventSource('http://localhost:5000/api/dashboard/stream');
+        source.addEventListener('snapshot', (event) => {
+            const data = JSON.parse(event.data);
+            setStats(data.stats);
+            setInventory(Array.isArray(data.inventory) ? data.inventory : []);
+            setRequestsCount(data.requests_count || 0);
+            setLoading(false);
+        });
+        source.addEventListener('delta', (event) => {
+            const delta = JSON.parse(event.data);
+            if (delta.stats) {
+                setStats(prev => ({ ...(prev || {}), ...delta.stats }));
+            }
+            if (delta.inventory || delta.removed) {
+                setInventory(prev => {
+                    const changed = new Map((delta.inventory || []).map(row => [row.id, row]));
+                    const removed = new Set(delta.removed || []);
+                    const next = prev.filter(row => !removed.has(row.id)).map(row => changed.get(row.id) || row);
+                    const known = new Set(next.map(row => row.id));
+                    (delta.inventory || []).forEach(row => { if (!known.has(row.id)) next.push(row); });
+                    return next;
+                });
+            }
+            if (delta.requests_count !== undefined) {
+                setRequestsCount(delta.requests_count);
+            }
+        });
+        // The server refuses streams beyond its limit; fall back to polling then.
+        let poll = null;
+        source.onerror = () => {
+            if (source.readyState === EventSource.CLOSED && poll === null) {
+                poll = setInterval(fetchData, 30000);
+            }
+        };
+        return () => {
+            source.close();
+            if (poll !== null) clearInterval(poll);
+        };
     }, []);
 
     const handleDetailClick = (outletName) => {
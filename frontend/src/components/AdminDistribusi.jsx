@@ -17,7 +17,7 @@ const AdminDistribusi = () => {
     React.useEffect(() => {
         // Load distribusi history and live outlet statuses for correct notation (Kritis/Aman/Berlebih)
         Promise.all([
-            fetch('http://localhost:5000/api/distribusi').then(res => res.json()),
+            fetch('http://localhost:5000/api/distribusi?order=desc&limit=50').then(res => res.json()),
             fetch('http://localhost:5000/api/dashboard').then(res => res.json())
         ])
         .then(([histories, dashboard]) => {
@@ -96,7 +96,7 @@ const AdminDistribusi = () => {
                     }
                 });
                 // Refresh history
-                fetch('http://localhost:5000/api/distribusi')
+                fetch('http://localhost:5000/api/distribusi?order=desc&limit=50')
                     .then(res => res.json())
                     .then(data => setHistory(data));
             });